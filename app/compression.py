@@ -0,0 +1,95 @@
+from typing import Any, Optional
+from functools import lru_cache
+import asyncio
+import gzip
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from .logging import logger
+
+
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+# Bodies at least this large are compressed in a worker thread instead of on the event loop
+THREAD_MIN_BYTES = 256 * 1024
+
+
+@lru_cache(maxsize=1)
+def _brotli() -> Any:
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """`br` or `gzip`, whichever the Accept-Encoding header prefers (brotli on ties, when installed), or None."""
+    weights = {}
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        weights[coding.strip()] = q
+    wildcard = weights.get("*", 0.0)
+    offered = [c for c in (("br",) if _brotli() is not None else ()) + ("gzip",) if weights.get(c, wildcard) > 0]
+    return max(offered, key=lambda c: weights.get(c, wildcard)) if offered else None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return _brotli().compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+class CompressionMiddleware:
+    """Compress complete JSON and text responses with brotli (`pip install brotli`) or gzip, as the client asks.
+
+    Streaming responses (the SSE and NDJSON endpoints) pass through untouched, so every event still reaches the
+    client as soon as it is sent; so do bodies under `minimum_size` and responses that are already encoded.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        if _brotli() is None:
+            logger.info("[http] 'brotli' is not installed; responses are compressed with gzip only")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", "")) if scope["type"] == "http" else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        start: Optional[Message] = None
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start
+            if message["type"] == "http.response.start":
+                # Held back until the first body message shows whether the response is worth compressing
+                start = message
+                return
+            if start is None:
+                await send(message)
+                return
+            initial, start = start, None
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                headers = MutableHeaders(raw=initial["headers"])
+                body = message.get("body", b"")
+                content_type = headers.get("content-type", "")
+                if len(body) >= self.minimum_size and "content-encoding" not in headers and content_type.startswith(COMPRESSIBLE_TYPES):
+                    body = await asyncio.to_thread(compress, body, encoding) if len(body) >= THREAD_MIN_BYTES else compress(body, encoding)
+                    headers["Content-Encoding"] = encoding
+                    headers["Content-Length"] = str(len(body))
+                    headers.add_vary_header("Accept-Encoding")
+                    message = {**message, "body": body}
+            await send(initial)
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
+
+
+__all__ = ["CompressionMiddleware", "compress", "negotiate"]
@@ -9,6 +9,7 @@ load_dotenv()
 class Settings(BaseSettings):
     google_api_key: str = Field(default="", alias="GOOGLE_API_KEY")
     google_cse_id: str = Field(default="", alias="GOOGLE_CSE_ID")
+    google_cse_endpoint: str = Field(default="", alias="GOOGLE_CSE_ENDPOINT")  # Custom Search API root; empty for Google's
 
     openrouter_api_key: str = Field(default="", alias="OPENROUTER_API_KEY")
     openrouter_base_url: str = Field(default="https://openrouter.ai/api/v1", alias="OPENROUTER_BASE_URL")
@@ -19,7 +20,82 @@ class Settings(BaseSettings):
     agent_max_steps: int = Field(default=6, alias="AGENT_MAX_STEPS")
     user_agent: str = Field(default="AI-Researcher/0.1 (+https://open-webui/openapi-servers)", alias="USER_AGENT")
 
+    fanout_concurrency: int = Field(default=8, alias="FANOUT_CONCURRENCY")
+    fetch_max_bytes: int = Field(default=2 * 1024 * 1024, alias="FETCH_MAX_BYTES")
+    fetch_page_token_budget: int = Field(default=1500, alias="FETCH_PAGE_TOKEN_BUDGET")  # 0 returns the full text
+    fetch_page_chunk_tokens: int = Field(default=200, alias="FETCH_PAGE_CHUNK_TOKENS")
+    fetch_pages_max_urls: int = Field(default=6, alias="FETCH_PAGES_MAX_URLS")
+    fetch_pages_token_budget: int = Field(default=3000, alias="FETCH_PAGES_TOKEN_BUDGET")  # shared by all pages of one call
+
+    prefetch_enabled: bool = Field(default=True, alias="PREFETCH_ENABLED")
+    prefetch_max_bytes: int = Field(default=4 * 1024 * 1024, alias="PREFETCH_MAX_BYTES")  # per research run
+    prefetch_links: int = Field(default=0, alias="PREFETCH_LINKS")  # in-site links warmed per page read
+    prefetch_concurrency: int = Field(default=4, alias="PREFETCH_CONCURRENCY")
+
+    fetch_retry_attempts: int = Field(default=3, alias="FETCH_RETRY_ATTEMPTS")  # including the first try
+    fetch_retry_backoff_seconds: float = Field(default=0.5, alias="FETCH_RETRY_BACKOFF_SECONDS")
+    fetch_retry_max_wait_seconds: float = Field(default=10.0, alias="FETCH_RETRY_MAX_WAIT_SECONDS")
+    fetch_respect_robots: bool = Field(default=True, alias="FETCH_RESPECT_ROBOTS")
+    robots_cache_ttl_seconds: int = Field(default=3600, alias="ROBOTS_CACHE_TTL_SECONDS")
+
+    http_max_connections: int = Field(default=100, alias="HTTP_MAX_CONNECTIONS")
+    http_max_keepalive_connections: int = Field(default=20, alias="HTTP_MAX_KEEPALIVE_CONNECTIONS")
+    http_keepalive_expiry_seconds: float = Field(default=30.0, alias="HTTP_KEEPALIVE_EXPIRY_SECONDS")
+    http_max_per_host: int = Field(default=6, alias="HTTP_MAX_PER_HOST")
+    http_host_rate: float = Field(default=5.0, alias="HTTP_HOST_RATE")  # requests/second per host, 0 disables
+    http_host_burst: int = Field(default=10, alias="HTTP_HOST_BURST")
+    http_circuit_failures: int = Field(default=3, alias="HTTP_CIRCUIT_FAILURES")
+    http_circuit_open_seconds: float = Field(default=30.0, alias="HTTP_CIRCUIT_OPEN_SECONDS")
+    http_http2: bool = Field(default=False, alias="HTTP_HTTP2")
+    http_dns_cache_ttl_seconds: int = Field(default=300, alias="HTTP_DNS_CACHE_TTL_SECONDS")
+
+    page_cache_enabled: bool = Field(default=True, alias="PAGE_CACHE_ENABLED")
+    page_cache_dir: str = Field(default=".cache/pages", alias="PAGE_CACHE_DIR")
+    page_cache_max_bytes: int = Field(default=256 * 1024 * 1024, alias="PAGE_CACHE_MAX_BYTES")
+    page_cache_ttl_seconds: int = Field(default=0, alias="PAGE_CACHE_TTL_SECONDS")  # lifetime when the origin sets none
+
     search_ttl_seconds: int = Field(default=900, alias="SEARCH_TTL_SECONDS")
+    search_cache_backend: str = Field(default="memory", alias="SEARCH_CACHE_BACKEND")  # memory | sqlite | redis
+    search_cache_max_entries: int = Field(default=1000, alias="SEARCH_CACHE_MAX_ENTRIES")
+    search_cache_max_bytes: int = Field(default=32 * 1024 * 1024, alias="SEARCH_CACHE_MAX_BYTES")
+    search_cache_path: str = Field(default=".cache/search.sqlite3", alias="SEARCH_CACHE_PATH")
+    search_cache_redis_url: str = Field(default="redis://localhost:6379/0", alias="SEARCH_CACHE_REDIS_URL")
+
+    result_cache_enabled: bool = Field(default=False, alias="RESULT_CACHE_ENABLED")
+    result_cache_ttl_seconds: int = Field(default=3600, alias="RESULT_CACHE_TTL_SECONDS")
+    result_cache_time_sensitive_ttl_seconds: int = Field(default=300, alias="RESULT_CACHE_TIME_SENSITIVE_TTL_SECONDS")
+    result_cache_backend: str = Field(default="memory", alias="RESULT_CACHE_BACKEND")  # memory | sqlite | redis
+    result_cache_max_entries: int = Field(default=500, alias="RESULT_CACHE_MAX_ENTRIES")
+    result_cache_max_bytes: int = Field(default=64 * 1024 * 1024, alias="RESULT_CACHE_MAX_BYTES")
+    result_cache_path: str = Field(default=".cache/results.sqlite3", alias="RESULT_CACHE_PATH")
+    result_cache_similarity: float = Field(default=0.0, alias="RESULT_CACHE_SIMILARITY")  # 0 disables near-duplicate lookup
+
+    research_executor: str = Field(default="async", alias="RESEARCH_EXECUTOR")  # async | thread | process
+    research_max_workers: int = Field(default=4, alias="RESEARCH_MAX_WORKERS")  # thread/process pool size
+    research_max_concurrent: int = Field(default=64, alias="RESEARCH_MAX_CONCURRENT")  # runs in flight with the async executor
+    parse_workers: int = Field(default=0, alias="PARSE_WORKERS")  # async executor's page-parsing processes; 0 parses in threads
+    research_max_queue: int = Field(default=16, alias="RESEARCH_MAX_QUEUE")
+    research_mode: str = Field(default="agent", alias="RESEARCH_MODE")  # fast | agent | auto
+    research_coalesce: bool = Field(default=True, alias="RESEARCH_COALESCE")
+    research_retry_after_seconds: int = Field(default=5, alias="RESEARCH_RETRY_AFTER_SECONDS")
+    research_deadline_ms: int = Field(default=0, alias="RESEARCH_DEADLINE_MS")  # default per-request deadline, 0 for none
+    budget_answer_reserve_ms: int = Field(default=5000, alias="BUDGET_ANSWER_RESERVE_MS")  # held back for the final answer
+
+    batch_concurrency: int = Field(default=4, alias="BATCH_CONCURRENCY")
+    batch_max_concurrency: int = Field(default=16, alias="BATCH_MAX_CONCURRENCY")
+    batch_max_requests: int = Field(default=200, alias="BATCH_MAX_REQUESTS")
+    batch_shared_pages: int = Field(default=500, alias="BATCH_SHARED_PAGES")  # pages kept for reuse within one batch
+    batch_max_jobs: int = Field(default=8, alias="BATCH_MAX_JOBS")  # background batch jobs running at once
+    batch_job_ttl_seconds: int = Field(default=3600, alias="BATCH_JOB_TTL_SECONDS")  # finished jobs kept for polling
+
+    response_include_content: str = Field(default="full", alias="RESPONSE_INCLUDE_CONTENT")  # full | truncated | none
+    response_page_chars: int = Field(default=2000, alias="RESPONSE_PAGE_CHARS")  # page text kept with include_content=truncated
+    response_compression: bool = Field(default=True, alias="RESPONSE_COMPRESSION")
+    response_compression_min_bytes: int = Field(default=1024, alias="RESPONSE_COMPRESSION_MIN_BYTES")
+
+    otel_exporter_otlp_endpoint: str = Field(default="", alias="OTEL_EXPORTER_OTLP_ENDPOINT")
+    otel_service_name: str = Field(default="ai-researcher", alias="OTEL_SERVICE_NAME")
+    otel_export_timeout_seconds: float = Field(default=5.0, alias="OTEL_EXPORT_TIMEOUT_SECONDS")
 
     api_token: str = Field(default="", alias="API_TOKEN")
 
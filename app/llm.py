@@ -1,9 +1,75 @@
-import os
+from typing import Any
+import threading
+import httpx
+import openai
 from langchain_openai import ChatOpenAI
 from .config import settings
+from .utils.budget import BudgetExhausted, timeout_for
 
 
-def make_llm() -> ChatOpenAI:
-    os.environ["OPENAI_API_KEY"] = settings.openrouter_api_key
-    os.environ["OPENAI_BASE_URL"] = settings.openrouter_base_url
-    return ChatOpenAI(model=settings.openrouter_model, temperature=0.2, timeout=settings.llm_timeout_seconds)
+_llms: dict[bool, ChatOpenAI] = {}
+_lock = threading.Lock()
+
+
+def _limits() -> httpx.Limits:
+    # Roughly two connections per research run that can be in flight at once
+    runs = settings.research_max_concurrent if settings.research_executor == "async" else settings.research_max_workers
+    return httpx.Limits(
+        max_connections=runs * 2,
+        max_keepalive_connections=runs * 2,
+        keepalive_expiry=settings.http_keepalive_expiry_seconds,
+    )
+
+
+class LLMBudgetExhausted(openai.OpenAIError):
+    """Raised instead of sending an LLM request (or a client-side retry of one) after the research run's
+    deadline; an OpenAIError, so the client gives up at once instead of backing off and retrying."""
+
+
+def _check_deadline(request: httpx.Request) -> None:
+    try:
+        timeout_for(0.0)
+    except BudgetExhausted as e:
+        raise LLMBudgetExhausted(str(e)) from e
+
+
+async def _acheck_deadline(request: httpx.Request) -> None:
+    _check_deadline(request)
+
+
+class _BudgetedChatOpenAI(ChatOpenAI):
+    """ChatOpenAI whose per-call timeout shrinks to what the current research run's deadline leaves."""
+
+    def _get_request_payload(self, input_: Any, *, stop: Any = None, **kwargs: Any) -> dict:
+        kwargs.setdefault("timeout", timeout_for(settings.llm_timeout_seconds))
+        return super()._get_request_payload(input_, stop=stop, **kwargs)
+
+
+def make_llm(streaming: bool = False) -> ChatOpenAI:
+    """Build a ChatOpenAI client for OpenRouter with its own pooled HTTP connections, for both invoke() and
+    ainvoke(). The async pool must only be used from the app's event loop.
+
+    Credentials are passed explicitly rather than through os.environ, which would race across worker threads.
+    Inside a research run with a deadline every call gets a timeout capped at the time the run has left.
+    """
+    return _BudgetedChatOpenAI(
+        model=settings.openrouter_model,
+        api_key=settings.openrouter_api_key,
+        base_url=settings.openrouter_base_url,
+        temperature=0.2,
+        timeout=settings.llm_timeout_seconds,
+        streaming=streaming,
+        http_client=httpx.Client(timeout=settings.llm_timeout_seconds, limits=_limits(), event_hooks={"request": [_check_deadline]}),
+        http_async_client=httpx.AsyncClient(timeout=settings.llm_timeout_seconds, limits=_limits(), event_hooks={"request": [_acheck_deadline]}),
+    )
+
+
+def get_llm(streaming: bool = False) -> ChatOpenAI:
+    """Process-wide LLM client, built once per streaming mode and shared by all requests."""
+    llm = _llms.get(streaming)
+    if llm is None:
+        with _lock:
+            llm = _llms.get(streaming)
+            if llm is None:
+                llm = _llms[streaming] = make_llm(streaming=streaming)
+    return llm
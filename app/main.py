@@ -1,10 +1,34 @@
-from fastapi import FastAPI, Depends, HTTPException, status
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Depends, HTTPException, Response, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from .routers import research
+from .compression import CompressionMiddleware
 from .config import settings
+from .responses import ORJSONResponse
+from .services.executor import research_executor
+from .services.batch import cancel_jobs
+from .services.warmup import warm_up
+from .observability import metrics
+from .utils.fetch import init_http_clients, close_http_clients
 
-app = FastAPI(title="AI Researcher Tool Server", version="0.1.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await init_http_clients()
+    research_executor.start()
+    # Serve (and answer /ready with 503) while the research stack loads in the background
+    warm_up.start()
+    try:
+        yield
+    finally:
+        warm_up.cancel()
+        cancel_jobs()
+        research_executor.shutdown()
+        await close_http_clients()
+
+
+app = FastAPI(title="AI Researcher Tool Server", version="0.1.0", lifespan=lifespan, default_response_class=ORJSONResponse)
 
 security = HTTPBearer(auto_error=False)
 
@@ -22,8 +46,23 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+if settings.response_compression:
+    app.add_middleware(CompressionMiddleware, minimum_size=settings.response_compression_min_bytes)
 
 # Apply auth dependency to all routes in the research router
 app.dependency_overrides = {}
 
 app.include_router(research.router, tags=["research"], dependencies=[Depends(verify_bearer_token)])
+
+
+@app.get("/metrics", include_in_schema=False, dependencies=[Depends(verify_bearer_token)])
+def metrics_endpoint() -> Response:
+    body, content_type = metrics.render()
+    return Response(content=body, media_type=content_type)
+
+
+@app.get("/ready", include_in_schema=False)
+def ready_endpoint() -> ORJSONResponse:
+    """Readiness probe: 200 once the startup warm-up has loaded the research stack and built its clients, else 503."""
+    stats = warm_up.stats()
+    return ORJSONResponse(stats, status_code=status.HTTP_200_OK if stats["ready"] else status.HTTP_503_SERVICE_UNAVAILABLE)
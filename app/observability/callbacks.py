@@ -1,12 +1,105 @@
-from typing import Any, List
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from uuid import UUID
+import re
+import time
 from langchain_core.callbacks.base import BaseCallbackHandler
 from ..logging import logger
+from ..utils.budget import RunBudget, current_budget
+from . import metrics
+from .tracing import Span, Tracer
+
+
+# Tag of LLM calls whose whole output is the answer (not a ReAct action for the agent)
+ANSWER_TAG = "answer"
+
+_FINAL_ANSWER = re.compile(r'"action"\s*:\s*"Final Answer"\s*,\s*"action_input"\s*:\s*"')
+_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "b": "\b", "f": "\f"}
+
+
+class _FinalAnswerText:
+    """Picks the text of a `Final Answer` action out of an agent's ReAct JSON as it streams in, so tool calls
+    never reach SSE clients as answer text."""
+
+    def __init__(self) -> None:
+        self.buffer = ""
+        self.pos: Optional[int] = None
+        self.done = False
+
+    def feed(self, token: str) -> str:
+        self.buffer += token
+        if self.done:
+            return ""
+        if self.pos is None:
+            match = _FINAL_ANSWER.search(self.buffer)
+            if match is None:
+                return ""
+            self.pos = match.end()
+        out: List[str] = []
+        buffer = self.buffer
+        while self.pos < len(buffer):
+            char = buffer[self.pos]
+            if char == '"':
+                self.done = True
+                break
+            if char != "\\":
+                out.append(char)
+                self.pos += 1
+                continue
+            # An escape; wait for the rest of it if it is split across tokens
+            if self.pos + 1 >= len(buffer):
+                break
+            kind = buffer[self.pos + 1]
+            if kind != "u":
+                out.append(_ESCAPES.get(kind, kind))
+                self.pos += 2
+                continue
+            code = int(buffer[self.pos + 2:self.pos + 6], 16) if self.pos + 6 <= len(buffer) else None
+            if code is None:
+                break
+            if 0xD800 <= code < 0xDC00:
+                # High surrogate: combine with the low one that follows
+                if self.pos + 12 > len(buffer):
+                    break
+                low = int(buffer[self.pos + 8:self.pos + 12], 16)
+                out.append(chr(0x10000 + ((code - 0xD800) << 10) + (low - 0xDC00)))
+                self.pos += 12
+            else:
+                out.append(chr(code))
+                self.pos += 6
+        return "".join(out)
+
+
+def token_usage(response: Any) -> Tuple[int, int]:
+    """(prompt, completion) tokens reported for an LLM call, or (0, 0) when the provider sent none."""
+    try:
+        message = response.generations[0][0].message
+        usage = getattr(message, "usage_metadata", None)
+        if usage:
+            return int(usage.get("input_tokens") or 0), int(usage.get("output_tokens") or 0)
+    except (AttributeError, IndexError, TypeError):
+        pass
+    usage = (getattr(response, "llm_output", None) or {}).get("token_usage") or {}
+    return int(usage.get("prompt_tokens") or 0), int(usage.get("completion_tokens") or 0)
 
 
 class ResearchLoggingHandler(BaseCallbackHandler):
+    # Cheap and thread-safe: under ainvoke, call it on the event loop instead of via a thread hop per event
+    run_inline = True
+
     def __init__(self, trace: str | None = None) -> None:
         self.trace = trace or "research"
         self.step = 0
+        self._started: Dict[UUID, Tuple[float, str]] = {}
+
+    def _start(self, run_id: Optional[UUID], name: str) -> None:
+        if run_id is not None:
+            self._started[run_id] = (time.perf_counter(), name)
+
+    def _finish(self, run_id: Optional[UUID]) -> Tuple[float, str]:
+        started = self._started.pop(run_id, None) if run_id is not None else None
+        if started is None:
+            return 0.0, "unknown"
+        return time.perf_counter() - started[0], started[1]
 
     def on_chain_start(self, serialized: dict[str, Any] | None, inputs: dict[str, Any] | None, **kwargs: Any) -> None:
         name = None
@@ -23,10 +116,22 @@ class ResearchLoggingHandler(BaseCallbackHandler):
 
     def on_llm_start(self, serialized: dict[str, Any] | None, prompts: List[str] | None, **kwargs: Any) -> None:
         n = len(prompts[0]) if prompts and len(prompts) > 0 else 0
+        self._start(kwargs.get("run_id"), "llm")
         logger.info(f"[{self.trace}] llm:start prompt_len={n}")
 
     def on_llm_end(self, response: Any, **kwargs: Any) -> None:
-        logger.info(f"[{self.trace}] llm:end")
+        elapsed, _ = self._finish(kwargs.get("run_id"))
+        prompt_tokens, completion_tokens = token_usage(response)
+        metrics.LLM_LATENCY.observe(elapsed)
+        if prompt_tokens or completion_tokens:
+            metrics.LLM_TOKENS.labels(kind="prompt").observe(prompt_tokens)
+            metrics.LLM_TOKENS.labels(kind="completion").observe(completion_tokens)
+        logger.info(f"[{self.trace}] llm:end ms={elapsed * 1000:.0f} tokens={prompt_tokens}+{completion_tokens}")
+
+    def on_llm_error(self, error: BaseException, **kwargs: Any) -> None:
+        self._finish(kwargs.get("run_id"))
+        metrics.LLM_ERRORS.inc()
+        logger.error(f"[{self.trace}] llm:error {error}")
 
     def on_tool_start(self, serialized: dict[str, Any] | None, input_str: Any, **kwargs: Any) -> None:
         self.step += 1
@@ -40,6 +145,7 @@ class ResearchLoggingHandler(BaseCallbackHandler):
         except Exception:
             snippet_raw = "<unserializable input>"
         snippet = snippet_raw if len(snippet_raw) <= 300 else snippet_raw[:297] + "..."
+        self._start(kwargs.get("run_id"), name)
         logger.info(f"[{self.trace}] step={self.step} tool:start name={name} input={snippet}")
 
     def on_tool_end(self, output: Any, **kwargs: Any) -> None:
@@ -48,10 +154,158 @@ class ResearchLoggingHandler(BaseCallbackHandler):
         except Exception:
             out_raw = "<unserializable output>"
         snippet = out_raw if len(out_raw) <= 300 else out_raw[:297] + "..."
-        logger.info(f"[{self.trace}] step={self.step} tool:end output={snippet}")
+        elapsed, name = self._finish(kwargs.get("run_id"))
+        metrics.TOOL_LATENCY.labels(tool=name).observe(elapsed)
+        logger.info(f"[{self.trace}] step={self.step} tool:end ms={elapsed * 1000:.0f} output={snippet}")
 
     def on_tool_error(self, error: BaseException, **kwargs: Any) -> None:
+        _, name = self._finish(kwargs.get("run_id"))
+        metrics.TOOL_ERRORS.labels(tool=name).inc()
         logger.error(f"[{self.trace}] step={self.step} tool:error {error}")
 
 
-__all__ = ["ResearchLoggingHandler"]
+class ResearchEventsHandler(BaseCallbackHandler):
+    """Forwards research progress to `emit(event, data)` as it happens: search results, fetched pages and answer
+    token deltas (the output of answer calls, and only the final answer out of the agent's ReAct steps)."""
+
+    run_inline = True
+
+    def __init__(self, emit: Callable[[str, Dict[str, Any]], None]) -> None:
+        self.emit = emit
+        self.llm_calls = 0
+        self._calls: Dict[UUID, Tuple[int, Optional[_FinalAnswerText]]] = {}
+
+    def on_llm_start(self, serialized: dict[str, Any] | None, prompts: List[str] | None, **kwargs: Any) -> None:
+        self.llm_calls += 1
+        self._calls[kwargs["run_id"]] = (self.llm_calls, None if ANSWER_TAG in (kwargs.get("tags") or []) else _FinalAnswerText())
+
+    def on_llm_new_token(self, token: str, **kwargs: Any) -> None:
+        call = self._calls.get(kwargs.get("run_id"))  # type: ignore[arg-type]
+        if call is None or not token:
+            return
+        number, final_answer = call
+        text = token if final_answer is None else final_answer.feed(token)
+        if text:
+            self.emit("token", {"llm_call": number, "text": text})
+
+    def on_llm_end(self, response: Any, **kwargs: Any) -> None:
+        self._calls.pop(kwargs.get("run_id"), None)  # type: ignore[arg-type]
+
+    def on_llm_error(self, error: BaseException, **kwargs: Any) -> None:
+        self._calls.pop(kwargs.get("run_id"), None)  # type: ignore[arg-type]
+
+    def on_tool_end(self, output: Any, **kwargs: Any) -> None:
+        name = kwargs.get("name")
+        if name == "cached_google_search" and isinstance(output, list):
+            self.emit("search", {
+                "results": [{"url": r.get("link"), "title": r.get("title"), "snippet": r.get("snippet")} for r in output],
+            })
+        elif name == "fetch_page" and isinstance(output, dict):
+            self._page(output)
+        elif name == "fetch_pages" and isinstance(output, list):
+            for page in output:
+                if isinstance(page, dict) and "error" not in page:
+                    self._page(page)
+
+    def _page(self, page: Dict[str, Any]) -> None:
+        self.emit("page", {
+            "url": page.get("url"),
+            "title": page.get("title"),
+            "content_len": len(page.get("content_text") or ""),
+            "links": page.get("links") or [],
+        })
+
+    def on_tool_error(self, error: BaseException, **kwargs: Any) -> None:
+        self.emit("tool_error", {"tool": kwargs.get("name"), "error": str(error)})
+
+
+class TracingHandler(BaseCallbackHandler):
+    """Builds agent iteration, LLM and tool spans from LangChain callbacks.
+
+    An iteration starts with each LLM call the agent makes and covers the tool call that follows it.
+    """
+
+    run_inline = True
+
+    def __init__(self, tracer: Tracer) -> None:
+        self.tracer = tracer
+        self._spans: Dict[UUID, Span] = {}
+        self._iteration: Optional[Span] = None
+        self._iterations = 0
+
+    def _close_iteration(self) -> None:
+        if self._iteration is not None:
+            self.tracer.end(self._iteration)
+            self._iteration = None
+
+    def on_chain_start(self, serialized: dict[str, Any] | None, inputs: dict[str, Any] | None, **kwargs: Any) -> None:
+        if kwargs.get("parent_run_id") is None:
+            name = (serialized or {}).get("name") or "agent"
+            self._spans[kwargs["run_id"]] = self.tracer.start(name, "agent", parent=self.tracer.root)
+
+    def on_chain_end(self, outputs: dict[str, Any] | None, **kwargs: Any) -> None:
+        span = self._spans.pop(kwargs.get("run_id"), None)  # type: ignore[arg-type]
+        if span is not None:
+            self._close_iteration()
+            self.tracer.end(span)
+
+    def on_chain_error(self, error: BaseException, **kwargs: Any) -> None:
+        span = self._spans.pop(kwargs.get("run_id"), None)  # type: ignore[arg-type]
+        if span is not None:
+            self._close_iteration()
+            self.tracer.end(span, error=str(error))
+
+    def on_llm_start(self, serialized: dict[str, Any] | None, prompts: List[str] | None, **kwargs: Any) -> None:
+        self._close_iteration()
+        self._iterations += 1
+        agent = next((s for s in self._spans.values() if s.kind == "agent"), self.tracer.root)
+        self._iteration = self.tracer.start(f"iteration {self._iterations}", "iteration", parent=agent)
+        prompt_chars = len(prompts[0]) if prompts else 0
+        self._spans[kwargs["run_id"]] = self.tracer.start("llm", "llm", parent=self._iteration, prompt_chars=prompt_chars)
+
+    def on_llm_end(self, response: Any, **kwargs: Any) -> None:
+        span = self._spans.pop(kwargs.get("run_id"), None)  # type: ignore[arg-type]
+        if span is not None:
+            prompt_tokens, completion_tokens = token_usage(response)
+            self.tracer.end(span, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+
+    def on_llm_error(self, error: BaseException, **kwargs: Any) -> None:
+        span = self._spans.pop(kwargs.get("run_id"), None)  # type: ignore[arg-type]
+        if span is not None:
+            self.tracer.end(span, error=str(error))
+
+    def on_tool_start(self, serialized: dict[str, Any] | None, input_str: Any, **kwargs: Any) -> None:
+        name = (serialized or {}).get("name") or "tool"
+        parent = self._iteration or self.tracer.root
+        self._spans[kwargs["run_id"]] = self.tracer.start(name, "tool", parent=parent)
+
+    def on_tool_end(self, output: Any, **kwargs: Any) -> None:
+        span = self._spans.pop(kwargs.get("run_id"), None)  # type: ignore[arg-type]
+        if span is not None:
+            self.tracer.end(span, output_chars=len(str(output)))
+
+    def on_tool_error(self, error: BaseException, **kwargs: Any) -> None:
+        span = self._spans.pop(kwargs.get("run_id"), None)  # type: ignore[arg-type]
+        if span is not None:
+            self.tracer.end(span, error=str(error))
+
+
+class BudgetHandler(BaseCallbackHandler):
+    """Charges the tokens of every LLM call to a run budget."""
+
+    run_inline = True
+
+    def __init__(self, budget: RunBudget) -> None:
+        self.budget = budget
+
+    def on_llm_end(self, response: Any, **kwargs: Any) -> None:
+        prompt_tokens, completion_tokens = token_usage(response)
+        self.budget.charge_tokens(prompt_tokens + completion_tokens)
+
+
+def budget_handlers() -> List[BaseCallbackHandler]:
+    budget = current_budget()
+    return [BudgetHandler(budget)] if budget is not None else []
+
+
+__all__ = ["ANSWER_TAG", "ResearchLoggingHandler", "ResearchEventsHandler", "TracingHandler", "BudgetHandler", "budget_handlers", "token_usage"]
@@ -0,0 +1,91 @@
+from typing import Any, Callable, Dict, Set
+import threading
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+
+
+_LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+_CPU_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1)
+_BYTES_BUCKETS = (1024, 8192, 32768, 131072, 524288, 1048576, 2097152, 8388608)
+_TOKEN_BUCKETS = (50, 100, 250, 500, 1000, 2500, 5000, 10000, 25000, 50000, 100000)
+
+REQUEST_LATENCY = Histogram("research_request_seconds", "End-to-end /research latency", ["outcome"], buckets=_LATENCY_BUCKETS)
+IN_FLIGHT = Gauge("research_in_flight_requests", "Research requests currently being served")
+AGENT_STEPS = Histogram("research_agent_steps", "Agent tool calls per research run", buckets=(0, 1, 2, 3, 4, 5, 6, 8, 10, 15, 20))
+RESEARCH_PATHS = Counter("research_paths_total", "Research runs by execution path (fast, agent, auto_fast, auto_agent)", ["path"])
+BUDGET_EXHAUSTED = Counter("research_budget_exhausted_total", "Research runs stopped early by their budget", ["reason"])
+
+LLM_LATENCY = Histogram("research_llm_call_seconds", "LLM call latency", buckets=_LATENCY_BUCKETS)
+LLM_TOKENS = Histogram("research_llm_tokens", "Tokens per LLM call", ["kind"], buckets=_TOKEN_BUCKETS)
+LLM_ERRORS = Counter("research_llm_errors_total", "Failed LLM calls")
+
+TOOL_LATENCY = Histogram("research_tool_seconds", "Agent tool call latency", ["tool"], buckets=_LATENCY_BUCKETS)
+TOOL_ERRORS = Counter("research_tool_errors_total", "Failed agent tool calls", ["tool"])
+
+FETCH_LATENCY = Histogram("research_fetch_seconds", "Outbound page fetch latency", ["host"], buckets=_LATENCY_BUCKETS)
+FETCH_BYTES = Histogram("research_fetch_bytes", "Bytes read per page fetch", ["host"], buckets=_BYTES_BUCKETS)
+FETCH_RESPONSES = Counter("research_fetch_responses_total", "Page fetch outcomes by host and status", ["host", "status"])
+FETCH_RETRIES = Counter("research_fetch_retries_total", "Page fetch retries by host and reason (status code or error)", ["host", "reason"])
+FETCH_REJECTED = Counter("research_fetch_rejected_total", "Page fetches refused before sending", ["reason"])
+
+PARSE_CPU = Histogram("research_parse_cpu_seconds", "CPU time spent extracting one page", buckets=_CPU_BUCKETS)
+CACHE_REQUESTS = Counter("research_cache_requests_total", "Cache lookups by cache and result", ["cache", "result"])
+COALESCED = Counter("research_coalesced_total", "Calls that waited for an identical in-flight call instead of repeating it", ["flight"])
+PREFETCHES = Counter("research_prefetch_total", "Speculative page loads by outcome", ["outcome"])
+
+
+# Host labels are capped so a long tail of crawled domains cannot blow up series cardinality
+MAX_HOST_LABELS = 200
+_hosts: Set[str] = set()
+_hosts_lock = threading.Lock()
+
+
+def host_label(host: str) -> str:
+    with _hosts_lock:
+        if host in _hosts:
+            return host
+        if len(_hosts) < MAX_HOST_LABELS:
+            _hosts.add(host)
+            return host
+    return "other"
+
+
+def record_cache(cache: str, result: str) -> None:
+    """Count a cache lookup; result is "hit", "miss", "revalidated" (page cache, 304) or "similar" (result cache near-duplicate)."""
+    CACHE_REQUESTS.labels(cache=cache, result=result).inc()
+
+
+def register_gauges(name: str, doc: str, stats: Callable[[], Dict[str, Any]], keys: tuple[str, ...]) -> None:
+    """Expose selected numeric fields of a stats() dict as gauges read at scrape time."""
+    for key in keys:
+        Gauge(f"{name}_{key}", f"{doc}: {key}").set_function(lambda key=key: float(stats().get(key, 0)))
+
+
+def render() -> tuple[bytes, str]:
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+
+__all__ = [
+    "REQUEST_LATENCY",
+    "IN_FLIGHT",
+    "AGENT_STEPS",
+    "RESEARCH_PATHS",
+    "BUDGET_EXHAUSTED",
+    "LLM_LATENCY",
+    "LLM_TOKENS",
+    "LLM_ERRORS",
+    "TOOL_LATENCY",
+    "TOOL_ERRORS",
+    "FETCH_LATENCY",
+    "FETCH_BYTES",
+    "FETCH_RESPONSES",
+    "FETCH_RETRIES",
+    "FETCH_REJECTED",
+    "PARSE_CPU",
+    "CACHE_REQUESTS",
+    "COALESCED",
+    "PREFETCHES",
+    "host_label",
+    "record_cache",
+    "register_gauges",
+    "render",
+]
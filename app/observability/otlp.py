@@ -0,0 +1,66 @@
+from typing import Any, Dict, List
+from ..config import settings
+from ..logging import logger
+from .tracing import Span, Tracer
+
+
+_SPAN_KIND_INTERNAL = 1
+_SPAN_KIND_SERVER = 2
+_SPAN_KIND_CLIENT = 3
+_STATUS_ERROR = 2
+
+
+def _attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+def _otlp_span(tracer: Tracer, span: Span) -> Dict[str, Any]:
+    kind = _SPAN_KIND_SERVER if span.kind == "request" else _SPAN_KIND_CLIENT if span.kind in ("llm", "fetch") else _SPAN_KIND_INTERNAL
+    out: Dict[str, Any] = {
+        "traceId": tracer.trace_id,
+        "spanId": span.span_id,
+        "name": span.name,
+        "kind": kind,
+        "startTimeUnixNano": str(span.start_unix_ns),
+        "endTimeUnixNano": str(span.start_unix_ns + int(span.duration * 1e9)),
+        "attributes": [_attribute("research.kind", span.kind)] + [_attribute(k, v) for k, v in span.attributes.items()],
+    }
+    if span.parent is not None:
+        out["parentSpanId"] = span.parent.span_id
+    if "error" in span.attributes:
+        out["status"] = {"code": _STATUS_ERROR, "message": str(span.attributes["error"])}
+    return out
+
+
+def to_otlp_json(tracer: Tracer) -> Dict[str, Any]:
+    """Encode a finished trace as an OTLP/HTTP JSON ExportTraceServiceRequest."""
+    spans: List[Dict[str, Any]] = [_otlp_span(tracer, s) for s in tracer.spans()]
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [_attribute("service.name", settings.otel_service_name)]},
+            "scopeSpans": [{"scope": {"name": "app.observability.tracing"}, "spans": spans}],
+        }]
+    }
+
+
+def export_trace(tracer: Tracer) -> None:
+    """POST the trace to the configured OTLP/HTTP collector; failures are logged, never raised."""
+    if not settings.otel_exporter_otlp_endpoint:
+        return
+    from ..utils.fetch import get_sync_client
+
+    url = settings.otel_exporter_otlp_endpoint.rstrip("/") + "/v1/traces"
+    try:
+        resp = get_sync_client().post(url, json=to_otlp_json(tracer), timeout=settings.otel_export_timeout_seconds)
+        resp.raise_for_status()
+    except Exception as e:
+        logger.warning(f"[trace] OTLP export to {url} failed: {e}")
+
+
+__all__ = ["to_otlp_json", "export_trace"]
@@ -0,0 +1,150 @@
+from typing import Any, Dict, Iterator, List, Optional
+from contextlib import contextmanager
+from contextvars import ContextVar
+import asyncio
+import os
+import threading
+import time
+
+
+def _on_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+class Span:
+    """One timed unit of work in a research run; children are nested spans in start order."""
+
+    __slots__ = ("name", "kind", "span_id", "parent", "start", "start_unix_ns", "end", "cpu", "attributes", "children",
+                 "_thread", "_cpu_start")
+
+    def __init__(self, name: str, kind: str, parent: Optional["Span"], attributes: Dict[str, Any]) -> None:
+        self.name = name
+        self.kind = kind
+        self.span_id = os.urandom(8).hex()
+        self.parent = parent
+        self.start = time.perf_counter()
+        self.start_unix_ns = time.time_ns()
+        self.end: Optional[float] = None
+        # CPU time of the thread that opened the span; only meaningful when it also closes it and, on an event
+        # loop thread, not at all (other runs' tasks execute while the span is open), so it is not recorded there
+        self.cpu: Optional[float] = None
+        self._thread = None if _on_event_loop() else threading.get_ident()
+        self._cpu_start = time.thread_time()
+        self.attributes = {k: v for k, v in attributes.items() if v is not None}
+        self.children: List["Span"] = []
+
+    @property
+    def duration(self) -> float:
+        return (self.end if self.end is not None else time.perf_counter()) - self.start
+
+    def close(self, now: float) -> None:
+        self.end = now
+        if threading.get_ident() == self._thread:
+            self.cpu = time.thread_time() - self._cpu_start
+
+    def set(self, **attributes: Any) -> None:
+        self.attributes.update({k: v for k, v in attributes.items() if v is not None})
+
+    def to_dict(self, origin: float) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "kind": self.kind,
+            "start_ms": round((self.start - origin) * 1000, 2),
+            "duration_ms": round(self.duration * 1000, 2),
+            "cpu_ms": round(self.cpu * 1000, 2) if self.cpu is not None else None,
+            "attributes": self.attributes,
+            "children": [c.to_dict(origin) for c in self.children],
+        }
+
+
+class Tracer:
+    """Collects the span tree of one research request. Thread-safe: tools may fetch concurrently."""
+
+    def __init__(self, name: str, **attributes: Any) -> None:
+        self.trace_id = os.urandom(16).hex()
+        self.root = Span(name, "request", None, attributes)
+        self._lock = threading.Lock()
+        self._open: List[Span] = [self.root]
+
+    def start(self, name: str, kind: str, parent: Optional[Span] = None, **attributes: Any) -> Span:
+        with self._lock:
+            span = Span(name, kind, parent or self._open[-1], attributes)
+            span.parent.children.append(span)  # type: ignore[union-attr]
+            self._open.append(span)
+        return span
+
+    def end(self, span: Span, **attributes: Any) -> None:
+        span.set(**attributes)
+        with self._lock:
+            span.close(time.perf_counter())
+            if span in self._open:
+                self._open.remove(span)
+
+    def current(self) -> Span:
+        """The innermost open span; explicit span() blocks take precedence via the context variable."""
+        explicit = _current_span.get()
+        if explicit is not None and explicit.end is None:
+            return explicit
+        with self._lock:
+            return self._open[-1]
+
+    def finish(self) -> None:
+        with self._lock:
+            now = time.perf_counter()
+            for span in self._open:
+                if span.end is None:
+                    span.close(now)
+            self._open = []
+
+    def spans(self) -> Iterator[Span]:
+        stack = [self.root]
+        while stack:
+            span = stack.pop()
+            yield span
+            stack.extend(span.children)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return self.root.to_dict(self.root.start)
+
+
+_current_tracer: ContextVar[Optional[Tracer]] = ContextVar("research_tracer", default=None)
+_current_span: ContextVar[Optional[Span]] = ContextVar("research_span", default=None)
+
+
+def current_tracer() -> Optional[Tracer]:
+    return _current_tracer.get()
+
+
+@contextmanager
+def tracer_scope(tracer: Optional[Tracer]) -> Iterator[Optional[Tracer]]:
+    token = _current_tracer.set(tracer)
+    try:
+        yield tracer
+    finally:
+        _current_tracer.reset(token)
+
+
+@contextmanager
+def trace_span(name: str, kind: str = "internal", parent: Optional[Span] = None, **attributes: Any) -> Iterator[Optional[Span]]:
+    """Record a child span of the current span (or of `parent`) when the request is traced; a no-op otherwise."""
+    tracer = _current_tracer.get()
+    if tracer is None:
+        yield None
+        return
+    span = tracer.start(name, kind, parent=parent or tracer.current(), **attributes)
+    token = _current_span.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        span.set(error=str(e) or type(e).__name__)
+        raise
+    finally:
+        _current_span.reset(token)
+        tracer.end(span)
+
+
+__all__ = ["Span", "Tracer", "current_tracer", "tracer_scope", "trace_span"]
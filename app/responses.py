@@ -0,0 +1,16 @@
+from typing import Any
+import orjson
+from fastapi.responses import JSONResponse
+
+
+class ORJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson, several times faster than the stdlib encoder on page-heavy results.
+
+    Defined here rather than taken from fastapi.responses, which deprecates its own copy in recent releases.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+__all__ = ["ORJSONResponse"]
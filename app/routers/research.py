@@ -1,11 +1,34 @@
-from fastapi import APIRouter, HTTPException
-from typing import List, Dict, Any
-from ..schemas import ResearchRequest, ResearchResult, Citation, ParsedPage
+import asyncio
+import time
+import orjson
+from fastapi import APIRouter, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+from typing import List, Dict, Any, AsyncIterator, Callable, Optional, Set
+from ..schemas import ResearchRequest, ResearchResult, Citation, ParsedPage, CacheHit, ResearchBatchRequest, BatchItem, BatchJobStatus
+from ..config import settings
+from ..responses import ORJSONResponse
+from ..services.executor import research_executor, QueueFullError
+from ..services.batch import BatchJob, get_job, submit_job
+from ..services.result_cache import get_result_cache
+from ..services.warmup import warm_up
+from ..utils.cache import normalize_query
+from ..utils.fetch import host_stats
+from ..utils.singleflight import SingleFlight, flight_stats
+from ..observability import metrics
 from ..logging import setup_logging, logger
 
 router = APIRouter()
 setup_logging()
 
+SSE_KEEPALIVE_SECONDS = 15
+
+# Identical concurrent /research calls share one agent run (streaming calls always run their own)
+_flight = SingleFlight("research")
+
+# Streamed runs outlive a disconnected client (their result still reaches the result cache); the event loop
+# only holds weak references to tasks, so they are kept here until done
+_stream_runs: Set["asyncio.Task[None]"] = set()
+
 
 @router.post(
     "/research",
@@ -25,48 +48,360 @@ setup_logging()
         "- Call 2: { query, parse_top_n: 4, max_iterations: 8, force_escalate: true } -> if still uncertain\n"
         "- Call 3: { query, parse_top_n: 5, max_iterations: 10, force_escalate: true }\n\n"
         "Behavior: performs one TTL-cached Google search, parses top-N results (configurable), selectively deepens via in-site links, and moves to the next result only if needed. "
-        "Returns a grounded summary with citations and structured pages to avoid hallucinations."
+        "Returns a grounded summary with citations and structured pages to avoid hallucinations.\n\n"
+        "Streaming: send `Accept: text/event-stream` to receive progress as server-sent events "
+        "(`search`, `page`, `token`) followed by a final `result` event carrying this same response body."
     ),
 )
-async def research_endpoint(payload: ResearchRequest) -> ResearchResult:
+async def research_endpoint(payload: ResearchRequest, request: Request) -> Any:
+    if "text/event-stream" in request.headers.get("accept", ""):
+        return _stream_response(payload, request)
     try:
-        logger.info(f"[request] /research query='{payload.query}' max_results={payload.max_search_results}")
-        if payload.instructions:
-            logger.info(f"[request] instructions='{payload.instructions}'")
-
-        from ..services.stepwise_research import run_stepwise_research
-        summary_text, citations_raw, pages_raw, continuation = run_stepwise_research(
-            query=payload.query,
-            instructions=payload.instructions,
-            max_results=payload.max_search_results,
-            parse_top_n=payload.parse_top_n,
-            max_iterations=payload.max_iterations,
-            force_escalate=payload.force_escalate,
-        )
-
-        citations: List[Citation] = [
-            Citation(url=c.get("url"), title=c.get("title"), snippet=c.get("snippet")) for c in citations_raw
-            if c.get("url")
-        ]
-
-        pages: List[ParsedPage] = []
-        for p in pages_raw:
-            pages.append(ParsedPage(
-                url=p.get("url"),
-                title=p.get("title"),
-                content_text=p.get("content_text"),
-                links_followed=p.get("links"),
-                metadata=None,
-            ))
-
-        logger.info(f"[response] citations={len(citations)} pages={len(pages)} summary_len={len(summary_text)}")
-        return ResearchResult(
-            topic=payload.query,
-            summary=summary_text,
-            citations=citations,
-            pages=pages,
-            continuation=continuation or None,
-        )
+        return ORJSONResponse(_dump(payload, await _research(payload, _research_kwargs(payload, request))))
+    except QueueFullError as e:
+        raise _queue_full(e)
     except Exception as e:
         logger.exception("research_endpoint error")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+async def _research(payload: ResearchRequest, kwargs: Dict[str, Any]) -> ResearchResult:
+    """One research run behind the result cache and request coalescing, with request metrics."""
+    started = time.perf_counter()
+    outcome = "error"
+    metrics.IN_FLIGHT.inc()
+    try:
+        _log_request(payload)
+        cached = await _cached_result(payload, kwargs)
+        if cached is not None:
+            outcome = "cached"
+            return cached
+        if settings.research_coalesce:
+            raw = await _flight.do_async(_flight_key(kwargs), _run_research, kwargs)
+        else:
+            raw = await _run_research(kwargs)
+        outcome = "ok"
+        return _build_result(payload, *raw)
+    except QueueFullError:
+        outcome = "rejected"
+        raise
+    finally:
+        metrics.IN_FLIGHT.dec()
+        metrics.REQUEST_LATENCY.labels(outcome=outcome).observe(time.perf_counter() - started)
+
+
+@router.post("/research/stream", include_in_schema=False)
+async def research_stream_endpoint(payload: ResearchRequest, request: Request) -> StreamingResponse:
+    """Same as POST /research with `Accept: text/event-stream`, for clients that cannot set the header."""
+    return _stream_response(payload, request)
+
+
+def _log_request(payload: ResearchRequest) -> None:
+    logger.info(f"[request] /research query='{payload.query}' max_results={payload.max_search_results} mode={payload.mode or settings.research_mode}")
+    if payload.instructions:
+        logger.info(f"[request] instructions='{payload.instructions}'")
+
+
+def _wants_trace(payload: ResearchRequest, request: Request) -> bool:
+    return payload.trace or request.headers.get("x-research-trace", "").lower() in ("1", "true", "yes")
+
+
+def _research_kwargs(payload: ResearchRequest, request: Request) -> Dict[str, Any]:
+    return {
+        "query": payload.query,
+        "instructions": payload.instructions,
+        "max_results": payload.max_search_results,
+        "parse_top_n": payload.parse_top_n,
+        "max_iterations": payload.max_iterations,
+        "force_escalate": payload.force_escalate,
+        "mode": payload.mode or settings.research_mode,
+        "trace": _wants_trace(payload, request),
+        "deadline_ms": payload.deadline_ms or settings.research_deadline_ms or None,
+        "max_tokens": payload.max_llm_tokens,
+        "max_fetches": payload.max_fetches,
+        # The deadline counts from here, so time queued for a worker is part of it
+        "started_at": time.time(),
+    }
+
+
+async def _submit(kwargs: Dict[str, Any], emit: Optional[Callable[[str, Dict[str, Any]], None]] = None) -> Any:
+    """Run one research job: as a coroutine on this event loop with the async executor, else on its worker pool
+    (a run streaming progress to `emit` always gets a thread, its callbacks being unpicklable).
+
+    The research stack is loaded by the startup warm-up; a request arriving before that finishes waits for it
+    instead of importing LangChain on the event loop.
+    """
+    await warm_up.wait()
+    from ..observability.callbacks import ResearchEventsHandler
+    from ..services.research import arun_research, run_research
+    callbacks = [ResearchEventsHandler(emit)] if emit is not None else None
+    if research_executor.asynchronous:
+        return await research_executor.submit_async(arun_research, **kwargs, callbacks=callbacks)
+    if callbacks:
+        return await research_executor.submit_threaded(run_research, **kwargs, callbacks=callbacks)
+    return await research_executor.submit(run_research, **kwargs)
+
+
+async def _run_research(kwargs: Dict[str, Any]) -> Any:
+    raw = await _submit(kwargs)
+    await _remember(kwargs, raw)
+    return raw
+
+
+def _depth(kwargs: Dict[str, Any]) -> tuple[Any, ...]:
+    return tuple(kwargs[k] for k in ("max_results", "parse_top_n", "max_iterations", "force_escalate", "mode"))
+
+
+async def _cached_result(payload: ResearchRequest, kwargs: Dict[str, Any]) -> Optional[ResearchResult]:
+    cache = get_result_cache() if payload.use_cache else None
+    if cache is None:
+        return None
+    hit = await asyncio.to_thread(cache.get, kwargs["query"], kwargs["instructions"], _depth(kwargs))
+    if hit is None:
+        return None
+    logger.info(f"[request] result cache: {hit.match} hit age={hit.age_seconds}s")
+    v = hit.value
+    result = _build_result(payload, v["summary"], v["results"], v["pages"], v["continuation"], mode=v.get("mode"))
+    result.cache = CacheHit(match=hit.match, similarity=hit.similarity, cached_query=hit.cached_query, age_seconds=hit.age_seconds)
+    return result
+
+
+async def _remember(kwargs: Dict[str, Any], raw: Any) -> None:
+    """Store a finished run in the result cache; runs that read no pages or were cut short by their budget are
+    not worth replaying."""
+    cache = get_result_cache()
+    if cache is None or not raw.summary or not raw.pages or raw.partial:
+        return
+    value = {"summary": raw.summary, "results": raw.results, "pages": raw.pages, "continuation": raw.continuation, "mode": raw.mode}
+    await asyncio.to_thread(cache.put, kwargs["query"], kwargs["instructions"], _depth(kwargs), value)
+
+
+def _flight_key(kwargs: Dict[str, Any]) -> tuple[Any, ...]:
+    return (
+        normalize_query(kwargs["query"]),
+        normalize_query(kwargs["instructions"] or ""),
+        *(kwargs[k] for k in ("max_results", "parse_top_n", "max_iterations", "force_escalate", "mode", "trace", "deadline_ms", "max_tokens", "max_fetches")),
+    )
+
+
+def _queue_full(e: QueueFullError) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=str(e),
+        headers={"Retry-After": str(e.retry_after)},
+    )
+
+
+def _build_result(
+    payload: ResearchRequest,
+    summary_text: str,
+    citations_raw: List[Dict[str, Any]],
+    pages_raw: List[Dict[str, Any]],
+    continuation: Dict[str, Any],
+    timings: Optional[Dict[str, Any]] = None,
+    mode: Optional[str] = None,
+    partial: bool = False,
+    budget: Optional[Dict[str, Any]] = None,
+) -> ResearchResult:
+    citations: List[Citation] = [
+        Citation(url=c.get("url") or c.get("link"), title=c.get("title"), snippet=c.get("snippet")) for c in citations_raw
+        if c.get("url") or c.get("link")
+    ]
+
+    content = payload.include_content or settings.response_include_content
+    pages: List[ParsedPage] = []
+    for p in pages_raw:
+        pages.append(ParsedPage(
+            url=p.get("url"),
+            title=p.get("title"),
+            description=p.get("description"),
+            content_text=_page_text(p.get("content_text"), content),
+            # Sections repeat content_text; only a full-content response carries them
+            sections=(p.get("sections") or None) if content == "full" else None,
+            links_followed=p.get("links"),
+            metadata=None,
+        ))
+
+    logger.info(f"[response] citations={len(citations)} pages={len(pages)} summary_len={len(summary_text)} partial={partial}")
+    return ResearchResult(
+        topic=payload.query,
+        summary=summary_text,
+        citations=citations,
+        pages=pages,
+        continuation=continuation or None,
+        timings=timings,
+        mode=mode,
+        partial=partial,
+        budget=budget,
+    )
+
+
+def _page_text(text: Optional[str], content: str) -> Optional[str]:
+    if content == "none" or not text:
+        return None
+    if content == "truncated" and len(text) > settings.response_page_chars:
+        return text[: settings.response_page_chars].rstrip() + "..."
+    return text
+
+
+def _dump(payload: ResearchRequest, result: ResearchResult) -> Dict[str, Any]:
+    """The JSON body of a result, limited to the request's `fields`."""
+    return result.model_dump(mode="json", include=set(payload.fields) if payload.fields else None)
+
+
+def _dump_item(requests: List[ResearchRequest], item: BatchItem) -> Dict[str, Any]:
+    data = item.model_dump(mode="json", exclude={"result"})
+    data["result"] = _dump(requests[item.index], item.result) if item.result is not None else None
+    return data
+
+
+def _dump_job(job: BatchJob, offset: int) -> ORJSONResponse:
+    snapshot = job.snapshot(offset)
+    data = snapshot.model_dump(mode="json", exclude={"items"})
+    data["items"] = [_dump_item(job.requests, item) for item in snapshot.items]
+    return ORJSONResponse(data)
+
+
+def _sse(event: str, data: Any) -> bytes:
+    return b"event: " + event.encode() + b"\ndata: " + orjson.dumps(data) + b"\n\n"
+
+
+def _stream_response(payload: ResearchRequest, request: Request) -> StreamingResponse:
+    """Run the research job and stream its progress as server-sent events.
+
+    Events: `search` (results as soon as the search returns), `page` (each fetched page),
+    `token` (answer text deltas), then `result` (the full ResearchResult) or `error`.
+    """
+    try:
+        research_executor.check_admission()
+    except QueueFullError as e:
+        raise _queue_full(e)
+    _log_request(payload)
+
+    loop = asyncio.get_running_loop()
+    events: "asyncio.Queue[tuple[str, Any]]" = asyncio.Queue()
+
+    def emit(event: str, data: Dict[str, Any]) -> None:
+        loop.call_soon_threadsafe(events.put_nowait, (event, data))
+
+    async def run() -> None:
+        started = time.perf_counter()
+        outcome = "error"
+        metrics.IN_FLIGHT.inc()
+        try:
+            kwargs = _research_kwargs(payload, request)
+            cached = await _cached_result(payload, kwargs)
+            if cached is not None:
+                outcome = "cached"
+                events.put_nowait(("result", _dump(payload, cached)))
+                return
+            raw = await _submit(kwargs, emit=emit)
+            await _remember(kwargs, raw)
+            outcome = "ok"
+            events.put_nowait(("result", _dump(payload, _build_result(payload, *raw))))
+        except QueueFullError as e:
+            outcome = "rejected"
+            events.put_nowait(("error", {"status": 503, "detail": str(e), "retry_after": e.retry_after}))
+        except Exception as e:
+            logger.exception("research_stream error")
+            events.put_nowait(("error", {"status": 500, "detail": str(e)}))
+        finally:
+            metrics.IN_FLIGHT.dec()
+            metrics.REQUEST_LATENCY.labels(outcome=outcome).observe(time.perf_counter() - started)
+
+    async def body() -> AsyncIterator[bytes]:
+        job = asyncio.create_task(run())
+        _stream_runs.add(job)
+        job.add_done_callback(_stream_runs.discard)
+        yield b": research started\n\n"
+        try:
+            while True:
+                try:
+                    event, data = await asyncio.wait_for(events.get(), timeout=SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield b": keep-alive\n\n"
+                    continue
+                yield _sse(event, data)
+                if event in ("result", "error"):
+                    break
+        finally:
+            if not job.done():
+                logger.info("[request] stream client disconnected; research continues in background")
+
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post(
+    "/research/batch",
+    response_model=None,
+    responses={200: {"content": {"application/x-ndjson": {}}, "description": "One BatchItem per line, in completion order"}, 202: {"model": BatchJobStatus}},
+    summary="Run many research requests at once",
+    description=(
+        "Runs up to BATCH_MAX_REQUESTS research requests with `concurrency` runs in flight. Identical requests run once, "
+        "and the runs share search results and fetched pages.\n\n"
+        "By default the response streams one `BatchItem` JSON object per line (NDJSON) as each request finishes. "
+        "With `job: true` the batch runs in the background: the response is 202 with a `job_id`; "
+        "poll GET /research/batch/{job_id}?offset=N for progress and finished items, DELETE it to cancel."
+    ),
+)
+async def research_batch_endpoint(payload: ResearchBatchRequest, request: Request) -> Any:
+    if len(payload.requests) > settings.batch_max_requests:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=f"At most {settings.batch_max_requests} requests per batch")
+    concurrency = min(payload.concurrency or settings.batch_concurrency, settings.batch_max_concurrency)
+    logger.info(f"[request] /research/batch requests={len(payload.requests)} concurrency={concurrency} job={payload.job}")
+
+    async def run(item: ResearchRequest) -> ResearchResult:
+        return await _research(item, _research_kwargs(item, request))
+
+    job = BatchJob(payload.requests, concurrency, run, key=lambda item: (_flight_key(_research_kwargs(item, request)), item.use_cache))
+    if payload.job:
+        try:
+            submit_job(job)
+        except QueueFullError as e:
+            raise _queue_full(e)
+        return ORJSONResponse(job.snapshot().model_dump(mode="json"), status_code=status.HTTP_202_ACCEPTED)
+
+    async def body() -> AsyncIterator[bytes]:
+        job.start()
+        try:
+            async for item in job.follow():
+                yield orjson.dumps(_dump_item(payload.requests, item)) + b"\n"
+        finally:
+            # Nobody is left to read the remaining results
+            job.cancel()
+
+    return StreamingResponse(body(), media_type="application/x-ndjson", headers={"X-Batch-Id": job.id, "X-Accel-Buffering": "no"})
+
+
+@router.get("/research/batch/{job_id}", response_model=BatchJobStatus, summary="Progress and finished items of a background batch")
+async def research_batch_status(job_id: str, offset: int = 0) -> ORJSONResponse:
+    job = get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Unknown or expired batch job")
+    return _dump_job(job, max(0, offset))
+
+
+@router.delete("/research/batch/{job_id}", response_model=BatchJobStatus, summary="Cancel a background batch")
+async def research_batch_cancel(job_id: str) -> ORJSONResponse:
+    job = get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Unknown or expired batch job")
+    job.cancel()
+    return _dump_job(job, len(job.items))
+
+
+@router.get("/research/queue", include_in_schema=False)
+async def research_queue_stats() -> Dict[str, Any]:
+    """Worker pool occupancy, queue depth and admission wait times for sizing RESEARCH_MAX_WORKERS."""
+    cache = get_result_cache()
+    return {**research_executor.stats(), "coalescing": flight_stats(), "result_cache": cache.stats() if cache else None}
+
+
+@router.get("/research/hosts", include_in_schema=False)
+async def research_host_stats() -> Dict[str, Any]:
+    """Per-host fetch scheduler state: rate-limit tokens, Retry-After cooldowns, circuit breakers, robots.txt cache."""
+    return host_stats()
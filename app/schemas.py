@@ -1,4 +1,4 @@
-from typing import List, Optional, Dict, Any
+from typing import List, Literal, Optional, Dict, Any
 from pydantic import BaseModel, HttpUrl, Field
 
 
@@ -9,6 +9,29 @@ class ResearchRequest(BaseModel):
     parse_top_n: int = Field(3, ge=1, le=5, description="Parse top-N result pages into structured output")
     force_escalate: bool = Field(False, description="Encourage deeper parsing across multiple results")
     max_iterations: Optional[int] = Field(None, description="Override agent max tool calls for this request")
+    use_cache: bool = Field(True, description="Set false to skip the result cache and force a fresh run (the fresh result is still cached)")
+    trace: bool = Field(False, description="Return a per-stage timing tree in `timings` (also enabled by header X-Research-Trace: 1)")
+    mode: Optional[Literal["fast", "agent", "auto"]] = Field(
+        None,
+        description="`agent`: the agent decides what to search and read (thorough, several LLM calls). "
+        "`fast`: search, read the top results, answer in one LLM call. "
+        "`auto`: fast first, the agent only if that answer is uncertain. Default: RESEARCH_MODE",
+    )
+    deadline_ms: Optional[int] = Field(
+        None, ge=1000,
+        description="Answer within this many milliseconds of arrival; when time runs out the answer is built from the pages read so far "
+        "and the result is marked `partial`. Default: RESEARCH_DEADLINE_MS",
+    )
+    max_llm_tokens: Optional[int] = Field(None, ge=1, description="Stop taking agent steps once the LLM calls used this many tokens")
+    max_fetches: Optional[int] = Field(None, ge=1, description="Load at most this many pages for this request")
+    include_content: Optional[Literal["full", "truncated", "none"]] = Field(
+        None,
+        description="Page text in `pages`: `full`, `truncated` (the first RESPONSE_PAGE_CHARS characters, no sections) "
+        "or `none` (url, title and description only). Default: RESPONSE_INCLUDE_CONTENT",
+    )
+    fields: Optional[List[Literal["topic", "summary", "citations", "pages", "continuation", "timings", "mode", "cache", "partial", "budget"]]] = Field(
+        None, description='Return only these top-level result fields, e.g. ["summary", "citations"]. Default: all',
+    )
 
 
 class PageSection(BaseModel):
@@ -37,6 +60,36 @@ class ContinuationHint(BaseModel):
     suggested_parse_top_n: Optional[int] = None
     suggested_max_iterations: Optional[int] = None
     suggested_force_escalate: Optional[bool] = None
+    suggested_mode: Optional[str] = None
+    suggested_deadline_ms: Optional[int] = None
+
+
+class CacheHit(BaseModel):
+    match: str = Field(..., description="`exact` for the same normalized query, `similar` for a near-duplicate")
+    similarity: Optional[float] = None
+    cached_query: str
+    age_seconds: int
+
+
+class TraceSpan(BaseModel):
+    name: str
+    kind: str
+    start_ms: float
+    duration_ms: float
+    cpu_ms: Optional[float] = None
+    attributes: Dict[str, Any] = Field(default_factory=dict)
+    children: List["TraceSpan"] = Field(default_factory=list)
+
+
+class BudgetReport(BaseModel):
+    deadline_ms: Optional[int] = None
+    elapsed_ms: float
+    max_tokens: Optional[int] = None
+    tokens_used: int
+    llm_calls: int
+    max_fetches: Optional[int] = None
+    fetches_used: int
+    exhausted: Optional[str] = Field(None, description="`deadline`, `tokens` or `fetches` when that limit stopped the run early")
 
 
 class ResearchResult(BaseModel):
@@ -45,6 +98,39 @@ class ResearchResult(BaseModel):
     citations: List[Citation]
     pages: List[ParsedPage]
     continuation: Optional[ContinuationHint] = None
+    timings: Optional[TraceSpan] = None
+    mode: Optional[str] = Field(None, description="Execution path that produced the answer: `fast` or `agent`")
+    cache: Optional[CacheHit] = Field(None, description="Set when this result was served from the result cache")
+    partial: bool = Field(False, description="The run's budget ran out; the summary is built from the pages read so far")
+    budget: Optional[BudgetReport] = Field(None, description="What this run used of its deadline, token and fetch budget")
+
+
+class ResearchBatchRequest(BaseModel):
+    requests: List[ResearchRequest] = Field(..., min_length=1, description="Research requests to run (at most BATCH_MAX_REQUESTS)")
+    concurrency: Optional[int] = Field(None, ge=1, description="Runs in flight at once (default BATCH_CONCURRENCY, capped at BATCH_MAX_CONCURRENCY)")
+    job: bool = Field(False, description="Run in the background: respond 202 with a job id to poll at GET /research/batch/{job_id}")
+
+
+class BatchItem(BaseModel):
+    index: int = Field(..., description="Position of the request in the batch")
+    status: str = Field(..., description="`ok`, `cached` (served from the result cache) or `error`")
+    result: Optional[ResearchResult] = None
+    error: Optional[str] = None
+    duplicate_of: Optional[int] = Field(None, description="Set when an identical earlier request's run was reused")
+    elapsed_ms: float
+
+
+class BatchJobStatus(BaseModel):
+    job_id: str
+    status: str = Field(..., description="`running`, `done` or `cancelled`")
+    total: int
+    completed: int
+    failed: int
+    concurrency: int
+    elapsed_ms: float
+    shared: Dict[str, int] = Field(default_factory=dict, description="Work shared across the batch: duplicate requests and page reuse")
+    items: List[BatchItem] = Field(default_factory=list, description="Finished items in completion order, from `offset`")
+    next_offset: int = 0
 
 
 __all__ = [
@@ -53,5 +139,11 @@ __all__ = [
     "PageSection",
     "Citation",
     "ContinuationHint",
+    "CacheHit",
+    "TraceSpan",
+    "BudgetReport",
     "ResearchResult",
+    "ResearchBatchRequest",
+    "BatchItem",
+    "BatchJobStatus",
 ]
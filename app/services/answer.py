@@ -0,0 +1,40 @@
+from typing import Any, Dict, List, Optional
+from langchain_core.messages import HumanMessage, SystemMessage
+
+
+UNCERTAIN_MARKER = "UNCERTAIN:"
+
+SYSTEM_PROMPT = (
+    "You answer research questions using only the numbered web sources provided. "
+    "Write a concise, grounded answer and cite sources inline as [n]. "
+    "Do not use outside knowledge. "
+    f"If the sources do not contain the answer, begin your reply with {UNCERTAIN_MARKER} and say what is missing."
+)
+
+
+def _sources(observations: List[Dict[str, Any]]) -> str:
+    blocks = []
+    for i, page in enumerate(observations, start=1):
+        header = f"[{i}] {page.get('title') or ''} — {page.get('url')}".strip()
+        blocks.append(f"{header}\n{page.get('content_text') or ''}")
+    return "\n\n".join(blocks)
+
+
+def answer_messages(query: str, instructions: str | None, observations: List[Dict[str, Any]]) -> Optional[List[Any]]:
+    """Prompt for one LLM call answering `query` from the given page observations, or None when no page
+    had content to answer from."""
+    observations = [p for p in observations if "error" not in p and p.get("content_text")]
+    if not observations:
+        return None
+    question = query if not instructions else f"{query}\nInstructions: {instructions}"
+    return [SystemMessage(content=SYSTEM_PROMPT), HumanMessage(content=f"Question: {question}\n\nSources:\n{_sources(observations)}")]
+
+
+def strip_uncertain(text: str) -> tuple[str, bool]:
+    """The answer without a leading UNCERTAIN marker, and whether it had one."""
+    if text.upper().startswith(UNCERTAIN_MARKER):
+        return text[len(UNCERTAIN_MARKER):].strip(), True
+    return text, False
+
+
+__all__ = ["UNCERTAIN_MARKER", "SYSTEM_PROMPT", "answer_messages", "strip_uncertain"]
@@ -0,0 +1,219 @@
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Hashable, Iterator, List, Optional
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+import asyncio
+import threading
+import time
+import uuid
+from ..config import settings
+from ..logging import logger
+from ..schemas import BatchItem, BatchJobStatus, ResearchRequest, ResearchResult
+from ..utils.urls import normalize_url
+from .executor import QueueFullError
+
+
+class SharedPages:
+    """Pages loaded by any run of one batch, so related questions reading the same URL fetch and parse it once
+    even when the page cache is off. Holds at most `max_entries` pages (oldest dropped first)."""
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self.hits = 0
+        self._pages: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            page = self._pages.get(normalize_url(url))
+            if page is not None:
+                self.hits += 1
+            return page
+
+    def put(self, url: str, page: Dict[str, Any]) -> None:
+        if self.max_entries <= 0 or page.get("skipped"):
+            return
+        with self._lock:
+            self._pages[normalize_url(url)] = page
+            while len(self._pages) > self.max_entries:
+                self._pages.popitem(last=False)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._pages)
+
+
+_current_shared: ContextVar[Optional[SharedPages]] = ContextVar("batch_shared_pages", default=None)
+
+
+def current_shared_pages() -> Optional[SharedPages]:
+    return _current_shared.get()
+
+
+@contextmanager
+def shared_pages_scope(shared: Optional[SharedPages]) -> Iterator[Optional[SharedPages]]:
+    token = _current_shared.set(shared)
+    try:
+        yield shared
+    finally:
+        _current_shared.reset(token)
+
+
+RunOne = Callable[[ResearchRequest], Awaitable[ResearchResult]]
+
+
+class BatchJob:
+    """Runs a list of research requests with bounded concurrency and collects the results in completion order.
+
+    Identical requests (same `key`) run once and every copy gets the result. Pages are shared across the runs
+    through SharedPages; searches already are, through the search cache. A run rejected by a full research
+    queue waits Retry-After and tries again instead of failing its item.
+    """
+
+    def __init__(self, requests: List[ResearchRequest], concurrency: int, run: RunOne, key: Callable[[ResearchRequest], Hashable]) -> None:
+        self.id = uuid.uuid4().hex
+        self.requests = requests
+        self.concurrency = max(1, concurrency)
+        self.items: List[BatchItem] = []
+        self.failed = 0
+        self.duplicates = 0
+        self.status = "running"
+        self.shared = SharedPages(settings.batch_shared_pages)
+        self._run = run
+        self._key = key
+        self._started = time.perf_counter()
+        self._finished: Optional[float] = None
+        self._updated = asyncio.Event()
+        self._task: Optional["asyncio.Task[None]"] = None
+
+    @property
+    def done(self) -> bool:
+        return self.status != "running"
+
+    def expired(self, now: float) -> bool:
+        return self._finished is not None and now - self._finished > settings.batch_job_ttl_seconds
+
+    def start(self) -> "BatchJob":
+        self._task = asyncio.create_task(self.run())
+        return self
+
+    def cancel(self) -> None:
+        if self._task is not None and not self._task.done():
+            self.status = "cancelled"
+            self._task.cancel()
+
+    async def run(self) -> None:
+        groups: Dict[Hashable, List[int]] = {}
+        for i, request in enumerate(self.requests):
+            groups.setdefault(self._key(request), []).append(i)
+        self.duplicates = len(self.requests) - len(groups)
+        slots = asyncio.Semaphore(self.concurrency)
+        logger.info(f"[batch] {self.id} start requests={len(self.requests)} unique={len(groups)} concurrency={self.concurrency}")
+        try:
+            with shared_pages_scope(self.shared):
+                await asyncio.gather(*(self._group(indices, slots) for indices in groups.values()))
+            self.status = "done"
+        except asyncio.CancelledError:
+            self.status = "cancelled"
+            raise
+        finally:
+            self._finished = time.perf_counter()
+            self._notify()
+            logger.info(f"[batch] {self.id} {self.status} completed={len(self.items)}/{len(self.requests)} failed={self.failed} shared_pages={self.shared.hits}")
+
+    async def _group(self, indices: List[int], slots: asyncio.Semaphore) -> None:
+        first = indices[0]
+        async with slots:
+            started = time.perf_counter()
+            result: Optional[ResearchResult] = None
+            error: Optional[str] = None
+            while True:
+                try:
+                    result = await self._run(self.requests[first])
+                    break
+                except QueueFullError as e:
+                    await asyncio.sleep(e.retry_after)
+                except Exception as e:
+                    logger.warning(f"[batch] {self.id} item {first} failed: {e}")
+                    error = str(e) or type(e).__name__
+                    break
+            elapsed_ms = round((time.perf_counter() - started) * 1000, 2)
+        for i in indices:
+            item_result = result if i == first or result is None else result.model_copy(update={"topic": self.requests[i].query})
+            self._emit(BatchItem(
+                index=i,
+                status="error" if result is None else ("cached" if result.cache is not None else "ok"),
+                result=item_result,
+                error=error,
+                duplicate_of=None if i == first else first,
+                elapsed_ms=elapsed_ms,
+            ))
+
+    def _emit(self, item: BatchItem) -> None:
+        self.items.append(item)
+        if item.status == "error":
+            self.failed += 1
+        self._notify()
+
+    def _notify(self) -> None:
+        updated, self._updated = self._updated, asyncio.Event()
+        updated.set()
+
+    async def follow(self, offset: int = 0) -> AsyncIterator[BatchItem]:
+        """Yield finished items from `offset` on, waiting for new ones until the job ends."""
+        while True:
+            while offset < len(self.items):
+                yield self.items[offset]
+                offset += 1
+            if self.done:
+                return
+            await self._updated.wait()
+
+    def snapshot(self, offset: int = 0) -> BatchJobStatus:
+        end = self._finished if self._finished is not None else time.perf_counter()
+        return BatchJobStatus(
+            job_id=self.id,
+            status=self.status,
+            total=len(self.requests),
+            completed=len(self.items),
+            failed=self.failed,
+            concurrency=self.concurrency,
+            elapsed_ms=round((end - self._started) * 1000, 2),
+            shared={"duplicate_requests": self.duplicates, "page_reuses": self.shared.hits},
+            items=self.items[offset:],
+            next_offset=len(self.items),
+        )
+
+
+# Background jobs by id; finished ones are kept for BATCH_JOB_TTL_SECONDS so clients can collect results
+_jobs: Dict[str, BatchJob] = {}
+
+
+def _prune() -> None:
+    now = time.perf_counter()
+    for job_id, job in list(_jobs.items()):
+        if job.expired(now):
+            del _jobs[job_id]
+
+
+def submit_job(job: BatchJob) -> BatchJob:
+    """Start `job` in the background; raise QueueFullError when BATCH_MAX_JOBS jobs are already running."""
+    _prune()
+    if sum(1 for j in _jobs.values() if not j.done) >= settings.batch_max_jobs:
+        raise QueueFullError(settings.research_retry_after_seconds)
+    _jobs[job.id] = job.start()
+    return job
+
+
+def get_job(job_id: str) -> Optional[BatchJob]:
+    _prune()
+    return _jobs.get(job_id)
+
+
+def cancel_jobs() -> None:
+    for job in _jobs.values():
+        job.cancel()
+    _jobs.clear()
+
+
+__all__ = ["SharedPages", "current_shared_pages", "shared_pages_scope", "BatchJob", "submit_job", "get_job", "cancel_jobs"]
@@ -0,0 +1,214 @@
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+from contextlib import asynccontextmanager
+import asyncio
+import contextvars
+import functools
+import importlib
+import multiprocessing
+import time
+from ..config import settings
+from ..logging import logger
+from ..observability import metrics
+
+
+# Pool workers are spawned, not forked: a fork of the running server (event loop, HTTP pools, threads) could
+# inherit a lock another thread holds at that moment and deadlock on it
+_SPAWN = multiprocessing.get_context("spawn")
+# Module of what parse-pool workers run (pages._parse_timed); warm_up() imports it in each of them
+PARSE_MODULE = f"{__package__}.pages"
+
+
+def _import(module: str) -> None:
+    importlib.import_module(module)
+
+
+class QueueFullError(Exception):
+    """Raised when a research job cannot be admitted because the wait queue is full."""
+
+    def __init__(self, retry_after: int) -> None:
+        super().__init__("Research queue is full, retry later")
+        self.retry_after = retry_after
+
+
+class ResearchExecutor:
+    """Runs research jobs with a cap on concurrent jobs and a bounded wait queue.
+
+    Admission happens on the event loop: at most `max_workers` jobs run at once, at most `max_queue`
+    more may wait for a slot, and anything beyond that is rejected immediately with QueueFullError.
+    With kind "thread" or "process" blocking jobs run on a worker pool of that size; with kind "async"
+    jobs are coroutines awaited on the event loop (submit_async) and `max_workers` only bounds how many
+    are in flight, since a run waiting on the network holds no thread.
+
+    Async runs hand CPU-bound work to run_cpu(). With `parse_workers` > 0 it goes to a process pool of that
+    size, so pages are parsed on all CPUs instead of taking turns for the GIL; otherwise it runs in a thread.
+    """
+
+    def __init__(self, kind: str = "thread", max_workers: int = 4, max_queue: int = 16, retry_after: int = 5, parse_workers: int = 0) -> None:
+        self.kind = kind
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+        self.retry_after = retry_after
+        self.parse_workers = max(0, parse_workers) if kind == "async" else 0
+        self._pool: Optional[Executor] = None
+        self._thread_pool: Optional[ThreadPoolExecutor] = None
+        self._parse_pool: Optional[ProcessPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._queued = 0
+        self._active = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._wait_last = 0.0
+
+    @property
+    def asynchronous(self) -> bool:
+        return self.kind == "async"
+
+    def start(self) -> None:
+        if self._slots is not None:
+            return
+        if not self.asynchronous:
+            self._thread_pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="research")
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=_SPAWN) if self.kind == "process" else self._thread_pool
+        if self.parse_workers:
+            self._parse_pool = ProcessPoolExecutor(max_workers=self.parse_workers, mp_context=_SPAWN)
+        self._slots = asyncio.Semaphore(self.max_workers)
+        logger.info(f"[executor] started kind={self.kind} max_workers={self.max_workers} max_queue={self.max_queue} parse_workers={self.parse_workers}")
+
+    def warm_up(self, module: str) -> None:
+        """Import `module` in every process-pool worker (and the parsers in every parse worker) now, so their
+        first jobs do not pay for it."""
+        futures = []
+        if isinstance(self._pool, ProcessPoolExecutor):
+            futures += [self._pool.submit(_import, module) for _ in range(self.max_workers)]
+        if self._parse_pool is not None:
+            futures += [self._parse_pool.submit(_import, PARSE_MODULE) for _ in range(self.parse_workers)]
+        for future in futures:
+            future.result()
+
+    @property
+    def parses_in_processes(self) -> bool:
+        return self._parse_pool is not None
+
+    async def run_cpu(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run CPU-bound `fn(*args)` off the event loop: on the parse process pool when there is one (`fn` and
+        its arguments must then be picklable), else in a thread."""
+        if self._parse_pool is None:
+            return await asyncio.to_thread(fn, *args)
+        return await asyncio.get_running_loop().run_in_executor(self._parse_pool, functools.partial(fn, *args))
+
+    def shutdown(self) -> None:
+        if self._slots is None:
+            return
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+        if self._thread_pool is not None and self._thread_pool is not self._pool:
+            self._thread_pool.shutdown(wait=False, cancel_futures=True)
+        if self._parse_pool is not None:
+            self._parse_pool.shutdown(wait=False, cancel_futures=True)
+        self._pool = None
+        self._thread_pool = None
+        self._parse_pool = None
+        self._slots = None
+        logger.info("[executor] shutdown")
+
+    def check_admission(self) -> None:
+        """Raise QueueFullError if a job submitted now would be rejected."""
+        if self._slots is not None and self._slots.locked() and self._queued >= self.max_queue:
+            self._rejected += 1
+            logger.warning(f"[executor] rejected active={self._active} queued={self._queued}")
+            raise QueueFullError(self.retry_after)
+
+    async def submit(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Run `fn(*args, **kwargs)` on the pool once a slot is free; raise QueueFullError if the queue is full."""
+        return await self._run(False, fn, args, kwargs)
+
+    async def submit_threaded(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Like submit, but always runs in a thread so `fn` may take unpicklable arguments (callbacks, queues)."""
+        return await self._run(True, fn, args, kwargs)
+
+    async def submit_async(self, fn: Callable[..., Awaitable[Any]], *args: Any, **kwargs: Any) -> Any:
+        """Await `fn(*args, **kwargs)` on the event loop once a slot is free; raise QueueFullError if the queue is full."""
+        async with self._slot():
+            return await fn(*args, **kwargs)
+
+    async def _run(self, threaded: bool, fn: Callable[..., Any], args: tuple[Any, ...], kwargs: Dict[str, Any]) -> Any:
+        async with self._slot():
+            if self._thread_pool is None:
+                # An async executor still runs the odd blocking job (e.g. from a script) on a lazily started pool
+                self._thread_pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="research")
+            pool = self._thread_pool if threaded or self._pool is None else self._pool
+            call = functools.partial(fn, *args, **kwargs)
+            if isinstance(pool, ThreadPoolExecutor):
+                # Carry request-scoped context (e.g. a batch's shared pages) into the worker thread
+                call = functools.partial(contextvars.copy_context().run, call)
+            return await asyncio.get_running_loop().run_in_executor(pool, call)
+
+    @asynccontextmanager
+    async def _slot(self) -> AsyncIterator[None]:
+        if self._slots is None:
+            self.start()
+        assert self._slots is not None
+        slots = self._slots
+        self.check_admission()
+
+        enqueued_at = time.monotonic()
+        self._queued += 1
+        try:
+            await slots.acquire()
+        finally:
+            self._queued -= 1
+        waited = time.monotonic() - enqueued_at
+        self._wait_last = waited
+        self._wait_total += waited
+        self._wait_max = max(self._wait_max, waited)
+
+        self._active += 1
+        try:
+            yield
+            self._completed += 1
+        except Exception:
+            self._failed += 1
+            raise
+        finally:
+            self._active -= 1
+            slots.release()
+
+    def stats(self) -> Dict[str, Any]:
+        started = self._completed + self._failed + self._active
+        return {
+            "kind": self.kind,
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "parse_workers": self.parse_workers,
+            "active": self._active,
+            "queued": self._queued,
+            "completed": self._completed,
+            "failed": self._failed,
+            "rejected": self._rejected,
+            "wait_ms_last": round(self._wait_last * 1000, 1),
+            "wait_ms_avg": round(self._wait_total / started * 1000, 1) if started else 0.0,
+            "wait_ms_max": round(self._wait_max * 1000, 1),
+        }
+
+
+research_executor = ResearchExecutor(
+    kind=settings.research_executor,
+    max_workers=settings.research_max_concurrent if settings.research_executor == "async" else settings.research_max_workers,
+    max_queue=settings.research_max_queue,
+    retry_after=settings.research_retry_after_seconds,
+    parse_workers=settings.parse_workers,
+)
+
+metrics.register_gauges(
+    "research_executor",
+    "Research worker pool",
+    research_executor.stats,
+    ("active", "queued", "rejected", "max_workers", "max_queue", "wait_ms_avg", "wait_ms_max"),
+)
+
+
+__all__ = ["ResearchExecutor", "QueueFullError", "research_executor"]
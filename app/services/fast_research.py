@@ -0,0 +1,175 @@
+from typing import Any, Dict, Iterator, List, Optional
+from contextlib import contextmanager
+import asyncio
+import time
+from langchain_core.callbacks.base import BaseCallbackHandler
+from ..llm import get_llm
+from ..tools.cached_google_search import cached_google_search
+from ..tools.fetch_pages import fetch_pages
+from ..utils.budget import current_budget
+from .answer import answer_messages, strip_uncertain
+from .page_store import PageStore, page_store_scope
+from .stepwise_research import Steps, StepwiseOutcome, adrive, drive, looks_uncertain
+from ..logging import logger
+from ..observability.callbacks import ANSWER_TAG, ResearchLoggingHandler, TracingHandler, budget_handlers
+from ..observability.otlp import export_trace
+from ..observability.tracing import Tracer, tracer_scope
+
+
+# Same heuristic as research_web: a page with less text than this probably does not hold the answer
+MIN_ANSWER_CHARS = 800
+
+
+def _lacks_answer(page: Dict[str, Any]) -> bool:
+    return "error" in page or len(page.get("content_text") or "") < MIN_ANSWER_CHARS
+
+
+class _FastRun:
+    """Per-request state shared by the sync and async fast paths."""
+
+    def __init__(self, query: str, instructions: str | None, max_results: int, parse_top_n: int,
+                 callbacks: Optional[List[BaseCallbackHandler]], trace: bool, tracer: Optional[Tracer]) -> None:
+        logger.info(f"[fast] start query='{query}' max_results={max_results} parse_top_n={parse_top_n}")
+        self.query = query
+        self.instructions = instructions
+        self.max_results = max_results
+        self.parse_top_n = parse_top_n
+        self.streaming = bool(callbacks)
+        handlers: List[BaseCallbackHandler] = [ResearchLoggingHandler(trace=query[:60]), *(callbacks or [])]
+        self.own_tracer = tracer is None and trace
+        if self.own_tracer:
+            tracer = Tracer("research", query=query[:200], max_results=max_results, parse_top_n=parse_top_n, mode="fast")
+        if tracer is not None:
+            handlers.append(TracingHandler(tracer))
+        handlers += budget_handlers()
+        self.tracer = tracer
+        self.config: Dict[str, Any] = {"callbacks": handlers}
+        # For the calls whose whole output is the answer (streamed to SSE clients as `token` events)
+        self.answer_config: Dict[str, Any] = {**self.config, "tags": [ANSWER_TAG]}
+        self.store = PageStore(query=query)
+        self.budget = current_budget()
+        self.started = time.perf_counter()
+        # Set when the pages were read but none had content to answer from
+        self.unreadable = False
+
+    @contextmanager
+    def scope(self) -> Iterator[None]:
+        with page_store_scope(self.store), tracer_scope(self.tracer):
+            yield
+
+    def split(self, results: List[Dict[str, Any]]) -> tuple[List[str], List[str]]:
+        """The top `parse_top_n` result links, and the rest."""
+        links = [r["link"] for r in results if r.get("link")]
+        top = links[: max(1, self.parse_top_n)]
+        return top, links[len(top):]
+
+    def escalate(self, observations: List[Dict[str, Any]], rest: List[str]) -> bool:
+        if rest and all(_lacks_answer(p) for p in observations):
+            logger.info(f"[fast] top results lack content, escalating to urls={rest}")
+            return True
+        return False
+
+    def messages(self, observations: List[Dict[str, Any]]) -> Optional[List[Any]]:
+        """The single LLM call's prompt, or None when no page had content to answer from."""
+        messages = answer_messages(self.query, self.instructions, observations)
+        self.unreadable = messages is None
+        if messages is not None and self.budget is not None:
+            # This is the answer; it may use the time held back for it
+            self.budget.answering = True
+        return messages
+
+    def stopped(self, error: Exception) -> bool:
+        """Whether `error` comes from the run's budget running out (the run then ends with what it has)."""
+        if self.budget is None or not self.budget.expired():
+            return False
+        logger.warning(f"[fast] budget exhausted ({self.budget.exhausted}): {error}")
+        return True
+
+    def unanswered(self, results: List[Dict[str, Any]], partial: bool) -> str:
+        """Summary for a run that ended without an answer, saying why."""
+        if partial:
+            return f"The research stopped before finding an answer: its {self.budget.exhausted if self.budget else None} budget ran out. The pages read so far are included."
+        if not results:
+            return "No sources: the search returned no results to answer from."
+        if self.unreadable:
+            return f"No readable sources: none of the pages read from the {len(results)} search results had content to answer from."
+        return "The research did not produce an answer from the pages read; they are included."
+
+    def steps(self) -> Steps:
+        """The run's search, page reads and LLM call, as the runnable calls drive()/adrive() make; returns the
+        answer and the search results."""
+        final_text = ""
+        results: List[Dict[str, Any]] = []
+        try:
+            results = yield cached_google_search, {"query": self.query, "max_results": self.max_results}, self.config
+            top, rest = self.split(results)
+            observations: List[Dict[str, Any]] = (yield fetch_pages, {"urls": top}, self.config) if top else []
+            if self.escalate(observations, rest):
+                observations += yield fetch_pages, {"urls": rest}, self.config
+            messages = self.messages(observations)
+            if messages is not None:
+                final_text = str((yield get_llm(streaming=self.streaming), messages, self.answer_config).content).strip()
+        except Exception as e:
+            if not self.stopped(e):
+                raise
+        return final_text, results
+
+    def outcome(self, final_text: str, results: List[Dict[str, Any]]) -> tuple[StepwiseOutcome, bool]:
+        pages = self.store.pages()
+        final_text, marked = strip_uncertain(final_text)
+        uncertain = not final_text or marked or looks_uncertain(final_text)
+        partial = self.budget is not None and self.budget.exhausted is not None
+        logger.info(f"[fast] done ms={(time.perf_counter() - self.started) * 1000:.0f} pages={len(pages)} uncertain={uncertain} partial={partial}")
+        if not final_text:
+            final_text = self.unanswered(results, partial)
+
+        continuation: Dict[str, Any] = {}
+        if uncertain:
+            continuation = {
+                "message": "The fast path could not settle this; call /research again with mode=agent to let the agent dig deeper.",
+                "suggested_mode": "agent",
+                "suggested_parse_top_n": min(5, self.parse_top_n + 1),
+            }
+
+        timings = None
+        if self.tracer is not None:
+            self.tracer.root.set(fast_pages=len(pages), fast_uncertain=uncertain)
+            if self.own_tracer:
+                self.tracer.finish()
+                timings = self.tracer.to_dict()
+        return StepwiseOutcome(final_text, results, pages, continuation, timings, "fast", partial), uncertain
+
+    def export(self) -> None:
+        """Send the trace the run started itself to the OTLP collector; a caller-owned tracer is the caller's to export."""
+        if self.own_tracer and self.tracer is not None:
+            export_trace(self.tracer)
+
+
+def run_fast_research(query: str, instructions: str | None, max_results: int = 5, *, parse_top_n: int = 3, callbacks: Optional[List[BaseCallbackHandler]] = None, trace: bool = False, tracer: Optional[Tracer] = None) -> tuple[StepwiseOutcome, bool]:
+    """Answer without the agent loop: one search, the top `parse_top_n` results read concurrently (the rest of the
+    results too when none of them has real content), their most query-relevant passages, one LLM call.
+
+    Returns the outcome and whether the answer is uncertain (the model said the sources fall short, or no
+    page had content). With `tracer`, spans are recorded into it and the caller finishes the trace. When the
+    run's budget runs out the outcome is partial: whatever was answered plus the pages read. Without an answer
+    the summary says why (budget, no search results or no readable page).
+    """
+    run = _FastRun(query, instructions, max_results, parse_top_n, callbacks, trace, tracer)
+    with run.scope():
+        final_text, results = drive(run.steps())
+    outcome = run.outcome(final_text, results)
+    run.export()
+    return outcome
+
+
+async def arun_fast_research(query: str, instructions: str | None, max_results: int = 5, *, parse_top_n: int = 3, callbacks: Optional[List[BaseCallbackHandler]] = None, trace: bool = False, tracer: Optional[Tracer] = None) -> tuple[StepwiseOutcome, bool]:
+    """run_fast_research() on the event loop."""
+    run = _FastRun(query, instructions, max_results, parse_top_n, callbacks, trace, tracer)
+    with run.scope():
+        final_text, results = await adrive(run.steps())
+    outcome = run.outcome(final_text, results)
+    await asyncio.to_thread(run.export)
+    return outcome
+
+
+__all__ = ["run_fast_research", "arun_fast_research"]
@@ -0,0 +1,53 @@
+from typing import Any, Dict, Iterator, List, Optional
+from contextlib import contextmanager
+from contextvars import ContextVar
+import threading
+from ..utils.urls import normalize_url
+
+
+class PageStore:
+    """Request-scoped record of every page fetched during one research run, in the order it was read."""
+
+    def __init__(self, query: Optional[str] = None) -> None:
+        self.query = query
+        self._pages: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._pages.get(normalize_url(url))
+
+    def record(self, url: str, page: Dict[str, Any]) -> None:
+        with self._lock:
+            self._pages.setdefault(normalize_url(url), page)
+
+    def __contains__(self, url: str) -> bool:
+        with self._lock:
+            return normalize_url(url) in self._pages
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._pages)
+
+    def pages(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self._pages.values())
+
+
+_current_store: ContextVar[Optional[PageStore]] = ContextVar("page_store", default=None)
+
+
+def current_page_store() -> Optional[PageStore]:
+    return _current_store.get()
+
+
+@contextmanager
+def page_store_scope(store: PageStore) -> Iterator[PageStore]:
+    token = _current_store.set(store)
+    try:
+        yield store
+    finally:
+        _current_store.reset(token)
+
+
+__all__ = ["PageStore", "current_page_store", "page_store_scope"]
@@ -0,0 +1,156 @@
+from typing import Any, Dict, Optional
+import asyncio
+import time
+from ..utils.budget import BudgetExhausted
+from ..utils.fetch import FetchBudgetExceeded, FetchResult, UnsupportedContentError, fetch, fetch_sync
+from ..utils.hosts import RobotsDisallowedError
+from ..utils.parse import parse_page
+from ..utils.page_cache import CachedPage, cache_policy, get_page_cache
+from ..utils.singleflight import SingleFlight
+from ..utils.urls import normalize_url
+from ..logging import logger
+from ..observability import metrics
+from ..observability.tracing import Span, trace_span
+from .batch import current_shared_pages
+from .executor import research_executor
+
+
+# A prefetch aborted by its own byte budget, or a run out of time, must not fail the fetch of another run that joined it
+_flight = SingleFlight("page", retry_on=(FetchBudgetExceeded, BudgetExhausted))
+
+
+def parse_html(url: str, html: str, content_type: Optional[str] = None) -> Dict[str, Any]:
+    if content_type == "text/plain":
+        return {"url": url, "title": None, "description": None, "content_text": html, "sections": [], "links": []}
+    return {"url": url, **parse_page(html, url)}
+
+
+def _parse_timed(url: str, html: str, content_type: Optional[str]) -> tuple[Dict[str, Any], float]:
+    """parse_html() and the CPU time it took, for running in a parse-pool process."""
+    started = time.thread_time()
+    page = parse_html(url, html, content_type)
+    return page, time.thread_time() - started
+
+
+def _skipped(url: str, reason: str) -> Dict[str, Any]:
+    logger.info(f"[fetch] skipped ({reason}) url={url}")
+    return {"url": url, "title": None, "content_text": "", "links": [], "skipped": reason}
+
+
+def _cached(url: str) -> tuple[Optional[CachedPage], Optional[Dict[str, str]]]:
+    """Look up the page cache: return (entry, None) for a fresh hit, (entry, conditional headers) for a stale one."""
+    cache = get_page_cache()
+    entry = cache.get(url) if cache else None
+    if entry is None:
+        if cache is not None:
+            metrics.record_cache("page", "miss")
+        logger.info(f"[fetch] cache: miss url={url}")
+        return None, None
+    if cache is not None and cache.is_fresh(entry):
+        metrics.record_cache("page", "hit")
+        logger.info(f"[fetch] cache: hit age={int(entry.age())}s url={url}")
+        return entry, None
+    logger.info(f"[fetch] cache: stale age={int(entry.age())}s -> revalidate url={url}")
+    return entry, entry.conditional_headers()
+
+
+def _complete(url: str, entry: Optional[CachedPage], result: FetchResult, page: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """The page for a fetch result (parsed here unless `page` is given), stored in or refreshed in the page cache."""
+    cache = get_page_cache()
+    policy = cache_policy(result.cache_control, result.expires, result.date)
+    if result.not_modified and entry is not None:
+        metrics.record_cache("page", "revalidated")
+        logger.info(f"[fetch] cache: revalidated 304 url={url}")
+        if cache is not None:
+            cache.touch(url, result.etag, result.last_modified, policy.max_age)
+        return {**entry.page, "url": url}
+    if entry is not None:
+        metrics.record_cache("page", "miss")
+    if page is None:
+        with trace_span("parse", "parse", url=url, bytes=len(result.text)):
+            page = parse_html(url, result.text, result.content_type)
+    if cache is not None:
+        if policy.store:
+            cache.put(url, page, result.etag, result.last_modified, policy.max_age)
+        else:
+            logger.info(f"[fetch] cache: not stored (Cache-Control: {result.cache_control}) url={url}")
+            if entry is not None:
+                cache.delete(url)
+    return page
+
+
+def load_page_sync(url: str) -> Dict[str, Any]:
+    """Fetch and parse a page, serving fresh hits from the page cache and revalidating stale ones.
+
+    Concurrent loads of the same URL (across requests and threads) share one fetch and parse, and runs of
+    one batch reuse each other's pages.
+    """
+    shared = current_shared_pages()
+    page = shared.get(url) if shared is not None else None
+    if page is None:
+        page = _flight.do(normalize_url(url), _load_page_sync, url)
+        if shared is not None:
+            shared.put(url, page)
+    return {**page, "url": url}
+
+
+async def load_page(url: str) -> Dict[str, Any]:
+    """load_page_sync() for the event loop; parsing and page-cache I/O run in worker threads."""
+    shared = current_shared_pages()
+    page = shared.get(url) if shared is not None else None
+    if page is None:
+        page = await _flight.do_async(normalize_url(url), _load_page, url)
+        if shared is not None:
+            shared.put(url, page)
+    return {**page, "url": url}
+
+
+def _load_page_sync(url: str) -> Dict[str, Any]:
+    with trace_span("fetch", "fetch", url=url) as span:
+        entry, headers = _cached(url)
+        if entry is not None and headers is None:
+            _annotate(span, "hit", None)
+            return {**entry.page, "url": url}
+        try:
+            result = fetch_sync(url, headers=headers)
+        except UnsupportedContentError as e:
+            return _skipped(url, f"unsupported content-type {e.content_type}")
+        except RobotsDisallowedError:
+            return _skipped(url, "disallowed by robots.txt")
+        _annotate(span, "revalidated" if result.not_modified else "miss", result)
+    return _complete(url, entry, result)
+
+
+async def _load_page(url: str) -> Dict[str, Any]:
+    with trace_span("fetch", "fetch", url=url) as span:
+        entry, headers = await asyncio.to_thread(_cached, url) if get_page_cache() is not None else _cached(url)
+        if entry is not None and headers is None:
+            _annotate(span, "hit", None)
+            return {**entry.page, "url": url}
+        try:
+            result = await fetch(url, headers=headers)
+        except UnsupportedContentError as e:
+            return _skipped(url, f"unsupported content-type {e.content_type}")
+        except RobotsDisallowedError:
+            return _skipped(url, "disallowed by robots.txt")
+        _annotate(span, "revalidated" if result.not_modified else "miss", result)
+    # Parsing is CPU-bound and the cache write touches disk: keep both off the event loop
+    if result.not_modified or not research_executor.parses_in_processes:
+        return await asyncio.to_thread(_complete, url, entry, result)
+    with trace_span("parse", "parse", url=url, bytes=len(result.text)) as span:
+        page, cpu = await research_executor.run_cpu(_parse_timed, url, result.text, result.content_type)
+        metrics.PARSE_CPU.observe(cpu)
+        if span is not None:
+            span.cpu = cpu
+    return await asyncio.to_thread(_complete, url, entry, result, page)
+
+
+def _annotate(span: Optional[Span], cache: str, result: Optional[FetchResult]) -> None:
+    if span is None:
+        return
+    span.set(cache=cache)
+    if result is not None:
+        span.set(status=result.status_code, bytes=len(result.text), truncated=result.truncated or None)
+
+
+__all__ = ["parse_html", "load_page", "load_page_sync"]
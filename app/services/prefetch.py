@@ -0,0 +1,166 @@
+from typing import Any, Dict, Iterator, List, Optional, Set, Union
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+import asyncio
+import contextvars
+import threading
+from ..config import settings
+from ..logging import logger
+from ..observability import metrics
+from ..observability.tracing import current_tracer, trace_span
+from ..utils.fetch import FetchBudget, fetch_budget_scope
+from ..utils.urls import normalize_url
+from .pages import load_page, load_page_sync
+
+
+_pool: Optional[ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ThreadPoolExecutor:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ThreadPoolExecutor(max_workers=max(1, settings.prefetch_concurrency), thread_name_prefix="prefetch")
+    return _pool
+
+
+def _retrieve(task: "asyncio.Task[Dict[str, Any]]") -> None:
+    # Prefetches nobody takes still have their errors retrieved, so the loop does not log them as lost
+    if not task.cancelled():
+        task.exception()
+
+
+class Prefetcher:
+    """Speculatively loads pages the agent is likely to read next while it waits on the LLM.
+
+    Request-scoped: prefetched pages are held here (not in the page store) until the agent asks for one,
+    all speculative downloads share one FetchBudget of `max_bytes`, and close() cancels whatever is
+    still queued or downloading when the run ends. An `asynchronous` prefetcher serves a run on the event
+    loop: downloads are tasks (at most PREFETCH_CONCURRENCY at once) and pages are collected with atake().
+    """
+
+    def __init__(self, top_n: int, max_bytes: int, links_per_page: int = 0, asynchronous: bool = False) -> None:
+        self.top_n = top_n
+        self.links_per_page = links_per_page
+        self.asynchronous = asynchronous
+        self.budget = FetchBudget(max_bytes)
+        self._jobs: Dict[str, Union["Future[Dict[str, Any]]", "asyncio.Task[Dict[str, Any]]"]] = {}
+        self._lock = threading.Lock()
+        self._slots = asyncio.Semaphore(max(1, settings.prefetch_concurrency)) if asynchronous else None
+        self._started: Set[str] = set()
+        self._tracer = current_tracer()
+        self.used = 0
+        self.closed = False
+
+    def prefetch(self, urls: List[str]) -> None:
+        with self._lock:
+            for url in urls:
+                key = normalize_url(url) if url else ""
+                if not key or key in self._jobs or self.closed or self.budget.exhausted:
+                    continue
+                if self.asynchronous:
+                    task = asyncio.get_running_loop().create_task(self._aload(key, url))
+                    task.add_done_callback(_retrieve)
+                    self._jobs[key] = task
+                else:
+                    ctx = contextvars.copy_context()
+                    self._jobs[key] = _get_pool().submit(ctx.run, self._load, url)
+
+    def prefetch_links(self, page: Dict[str, Any]) -> None:
+        if self.links_per_page > 0:
+            self.prefetch((page.get("links") or [])[: self.links_per_page])
+
+    def _load(self, url: str) -> Dict[str, Any]:
+        parent = self._tracer.root if self._tracer is not None else None
+        with fetch_budget_scope(self.budget), trace_span("prefetch", "prefetch", parent=parent, url=url):
+            return load_page_sync(url)
+
+    async def _aload(self, key: str, url: str) -> Dict[str, Any]:
+        assert self._slots is not None
+        async with self._slots:
+            self._started.add(key)
+            parent = self._tracer.root if self._tracer is not None else None
+            with fetch_budget_scope(self.budget), trace_span("prefetch", "prefetch", parent=parent, url=url):
+                return await load_page(url)
+
+    def take(self, url: str) -> Optional[Dict[str, Any]]:
+        """Return the prefetched page for `url`, waiting if its download is already under way.
+
+        Returns None (the caller fetches it itself) when it was never prefetched, is still queued, or failed.
+        """
+        with self._lock:
+            fut = self._jobs.get(normalize_url(url))
+        if fut is None or isinstance(fut, asyncio.Task):
+            return None
+        if not fut.running() and not fut.done():
+            fut.cancel()
+            return None
+        try:
+            page = fut.result()
+        except Exception:
+            return None
+        return self._hit(url, page)
+
+    async def atake(self, url: str) -> Optional[Dict[str, Any]]:
+        """take() for an asynchronous prefetcher."""
+        key = normalize_url(url)
+        with self._lock:
+            task = self._jobs.get(key)
+        if not isinstance(task, asyncio.Task):
+            return None
+        if key not in self._started or task.cancelled():
+            task.cancel()
+            return None
+        try:
+            # Shielded so that cancelling this run does not also cancel the download for other waiters
+            page = await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if not task.cancelled():
+                raise
+            # The prefetch itself was cancelled (by close() or the budget): the caller fetches the page itself
+            return None
+        except Exception:
+            return None
+        return self._hit(url, page)
+
+    def _hit(self, url: str, page: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            self.used += 1
+        logger.info(f"[prefetch] hit url={url}")
+        return page
+
+    def close(self) -> Dict[str, Any]:
+        """Cancel queued prefetches and abort running downloads; return usage stats."""
+        with self._lock:
+            self.closed = True
+            jobs = list(self._jobs.values())
+        self.budget.cancel()
+        cancelled = sum(1 for f in jobs if f.cancel())
+        stats = {"prefetched": len(jobs), "used": self.used, "cancelled": cancelled, "bytes": self.budget.used}
+        metrics.PREFETCHES.labels(outcome="used").inc(self.used)
+        metrics.PREFETCHES.labels(outcome="cancelled").inc(cancelled)
+        metrics.PREFETCHES.labels(outcome="unused").inc(max(0, len(jobs) - self.used - cancelled))
+        logger.info(f"[prefetch] done {stats}")
+        return stats
+
+
+_current_prefetcher: ContextVar[Optional[Prefetcher]] = ContextVar("prefetcher", default=None)
+
+
+def current_prefetcher() -> Optional[Prefetcher]:
+    return _current_prefetcher.get()
+
+
+@contextmanager
+def prefetch_scope(prefetcher: Optional[Prefetcher]) -> Iterator[Optional[Prefetcher]]:
+    token = _current_prefetcher.set(prefetcher)
+    try:
+        yield prefetcher
+    finally:
+        _current_prefetcher.reset(token)
+
+
+__all__ = ["Prefetcher", "current_prefetcher", "prefetch_scope"]
@@ -0,0 +1,115 @@
+from typing import Any, Dict, List, Optional
+import asyncio
+import time
+from langchain_core.callbacks.base import BaseCallbackHandler
+from ..config import settings
+from ..logging import logger
+from ..observability import metrics
+from ..observability.otlp import export_trace
+from ..observability.tracing import Tracer
+from ..utils.budget import RunBudget, budget_scope
+from .batch import SharedPages, current_shared_pages, shared_pages_scope
+from .fast_research import arun_fast_research, run_fast_research
+from .stepwise_research import StepwiseOutcome, arun_stepwise_research, run_stepwise_research
+
+
+MODES = ("fast", "agent", "auto")
+
+
+def _start(query: str, max_results: int, parse_top_n: int, mode: Optional[str], trace: bool) -> tuple[str, Optional[Tracer]]:
+    mode = mode or settings.research_mode
+    if mode not in MODES:
+        raise ValueError(f"unknown research mode '{mode}'")
+    return mode, Tracer("research", query=query[:200], max_results=max_results, parse_top_n=parse_top_n, mode=mode) if trace else None
+
+
+def _budget(deadline_ms: Optional[int], max_tokens: Optional[int], max_fetches: Optional[int], started_at: Optional[float]) -> RunBudget:
+    # started_at is the wall-clock arrival of the request, so time spent queued for a worker counts too
+    elapsed = time.time() - started_at if started_at else 0.0
+    return RunBudget(deadline_ms, max_tokens, max_fetches, reserve_ms=settings.budget_answer_reserve_ms, elapsed=elapsed)
+
+
+def _finish(outcome: StepwiseOutcome, path: str, tracer: Optional[Tracer], budget: RunBudget) -> StepwiseOutcome:
+    metrics.RESEARCH_PATHS.labels(path=path).inc()
+    report = budget.report()
+    outcome = outcome._replace(budget=report, partial=outcome.partial or budget.exhausted is not None)
+    if outcome.partial:
+        logger.info(f"[research] partial result, {budget.exhausted} budget exhausted: {report}")
+        suggestion: Dict[str, Any] = {"message": f"Stopped early: the {budget.exhausted} budget ran out. Call /research again with a larger budget for a complete answer."}
+        if budget.exhausted == "deadline" and budget.deadline_ms:
+            suggestion["suggested_deadline_ms"] = budget.deadline_ms * 2
+        outcome = outcome._replace(continuation={**outcome.continuation, **suggestion})
+    if tracer is None:
+        return outcome
+    tracer.root.set(path=path, **{f"budget_{k}": v for k, v in report.items() if v is not None})
+    tracer.finish()
+    return outcome._replace(timings=tracer.to_dict())
+
+
+def run_research(query: str, instructions: str | None, max_results: int = 5, *, mode: Optional[str] = None, parse_top_n: int = 3, max_iterations: int | None = None, force_escalate: bool = False, callbacks: Optional[List[BaseCallbackHandler]] = None, trace: bool = False, deadline_ms: Optional[int] = None, max_tokens: Optional[int] = None, max_fetches: Optional[int] = None, started_at: Optional[float] = None) -> StepwiseOutcome:
+    """Run one research request in the requested execution mode (default RESEARCH_MODE).
+
+    - agent: the ReAct agent decides what to search and read.
+    - fast: search, read the top results concurrently, one LLM call over their most relevant passages.
+    - auto: fast first; when that answer is uncertain (or force_escalate is set) the agent takes over,
+      reusing the pages the fast path already loaded.
+
+    LLM calls, searches and fetches share one budget: `deadline_ms` (counted from `started_at`, the request's
+    arrival) and optional caps on LLM tokens and page fetches. When it runs out the run answers from what it
+    has and the outcome is marked partial instead of failing; the outcome always reports what was used.
+    """
+    mode, tracer = _start(query, max_results, parse_top_n, mode, trace)
+    budget = _budget(deadline_ms, max_tokens, max_fetches, started_at)
+    agent_kwargs: Dict[str, Any] = {"parse_top_n": parse_top_n, "max_iterations": max_iterations, "force_escalate": force_escalate, "callbacks": callbacks, "tracer": tracer}
+
+    with budget_scope(budget):
+        if mode == "fast":
+            outcome, _ = run_fast_research(query, instructions, max_results, parse_top_n=parse_top_n, callbacks=callbacks, tracer=tracer)
+            path = "fast"
+        elif mode == "auto" and not force_escalate:
+            with shared_pages_scope(current_shared_pages() or SharedPages(settings.batch_shared_pages)):
+                outcome, uncertain = run_fast_research(query, instructions, max_results, parse_top_n=parse_top_n, callbacks=callbacks, tracer=tracer)
+                path = "auto_fast"
+                if uncertain and not budget.should_stop():
+                    logger.info("[research] auto: fast answer is uncertain, handing over to the agent")
+                    outcome = run_stepwise_research(query, instructions, max_results, **agent_kwargs)
+                    path = "auto_agent"
+        else:
+            outcome = run_stepwise_research(query, instructions, max_results, **agent_kwargs)
+            path = "agent"
+
+    outcome = _finish(outcome, path, tracer, budget)
+    if tracer is not None:
+        export_trace(tracer)
+    return outcome
+
+
+async def arun_research(query: str, instructions: str | None, max_results: int = 5, *, mode: Optional[str] = None, parse_top_n: int = 3, max_iterations: int | None = None, force_escalate: bool = False, callbacks: Optional[List[BaseCallbackHandler]] = None, trace: bool = False, deadline_ms: Optional[int] = None, max_tokens: Optional[int] = None, max_fetches: Optional[int] = None, started_at: Optional[float] = None) -> StepwiseOutcome:
+    """run_research() as a coroutine on the event loop (RESEARCH_EXECUTOR=async)."""
+    mode, tracer = _start(query, max_results, parse_top_n, mode, trace)
+    budget = _budget(deadline_ms, max_tokens, max_fetches, started_at)
+    agent_kwargs: Dict[str, Any] = {"parse_top_n": parse_top_n, "max_iterations": max_iterations, "force_escalate": force_escalate, "callbacks": callbacks, "tracer": tracer}
+
+    with budget_scope(budget):
+        if mode == "fast":
+            outcome, _ = await arun_fast_research(query, instructions, max_results, parse_top_n=parse_top_n, callbacks=callbacks, tracer=tracer)
+            path = "fast"
+        elif mode == "auto" and not force_escalate:
+            with shared_pages_scope(current_shared_pages() or SharedPages(settings.batch_shared_pages)):
+                outcome, uncertain = await arun_fast_research(query, instructions, max_results, parse_top_n=parse_top_n, callbacks=callbacks, tracer=tracer)
+                path = "auto_fast"
+                if uncertain and not budget.should_stop():
+                    logger.info("[research] auto: fast answer is uncertain, handing over to the agent")
+                    outcome = await arun_stepwise_research(query, instructions, max_results, **agent_kwargs)
+                    path = "auto_agent"
+        else:
+            outcome = await arun_stepwise_research(query, instructions, max_results, **agent_kwargs)
+            path = "agent"
+
+    outcome = _finish(outcome, path, tracer, budget)
+    if tracer is not None:
+        await asyncio.to_thread(export_trace, tracer)
+    return outcome
+
+
+__all__ = ["MODES", "run_research", "arun_research"]
@@ -0,0 +1,176 @@
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+from collections import OrderedDict
+import hashlib
+import random
+import re
+import threading
+import time
+from ..config import settings
+from ..logging import logger
+from ..observability import metrics
+from ..utils.cache import BaseCache, make_cache, normalize_query
+
+
+# Queries about things that change by the hour get a much shorter TTL
+_TIME_SENSITIVE = re.compile(
+    r"\b(today|tonight|tomorrow|now|current|latest|live|news|price|prices|cost|tickets?|showtimes?|schedule|weather|rate|stock)\b"
+    r"|сегодня|завтра|сейчас|новост|цен|стоимост|билет|сеанс|расписан|афиш|погод|курс",
+    re.IGNORECASE,
+)
+_DIGITS = re.compile(r"\d+")
+
+_NUM_PERM = 64
+_MERSENNE = (1 << 61) - 1
+_rng = random.Random(0x5EED)
+_PERMS = [(_rng.randrange(1, _MERSENNE), _rng.randrange(0, _MERSENNE)) for _ in range(_NUM_PERM)]
+
+
+def is_time_sensitive(text: str) -> bool:
+    return bool(_TIME_SENSITIVE.search(text))
+
+
+def _shingles(text: str, n: int = 3) -> List[int]:
+    padded = f" {text} "
+    grams = {padded[i:i + n] for i in range(max(1, len(padded) - n + 1))}
+    return [int.from_bytes(hashlib.blake2b(g.encode(), digest_size=8).digest(), "big") for g in grams]
+
+
+def minhash(text: str) -> Tuple[int, ...]:
+    """MinHash signature over character trigrams; matching slots estimate Jaccard similarity."""
+    hashes = _shingles(text)
+    return tuple(min((a * h + b) % _MERSENNE for h in hashes) for a, b in _PERMS)
+
+
+def similarity(a: Tuple[int, ...], b: Tuple[int, ...]) -> float:
+    return sum(1 for x, y in zip(a, b) if x == y) / _NUM_PERM
+
+
+class CachedResult(NamedTuple):
+    value: Dict[str, Any]
+    match: str  # "exact" | "similar"
+    similarity: Optional[float]
+    cached_query: str
+    age_seconds: int
+
+
+class _Entry(NamedTuple):
+    signature: Tuple[int, ...]
+    digits: Tuple[str, ...]
+    text: str
+
+
+class ResultCache:
+    """Cache of complete research outcomes keyed by normalized query, instructions and depth settings.
+
+    With `min_similarity` > 0, a miss falls back to the most similar cached query with the same depth
+    settings and the same numbers in it (dates, years, counts), judged by MinHash over character trigrams.
+    The similarity index lives in this process; exact lookups go through the configured backend.
+    """
+
+    def __init__(self, store: BaseCache, ttl: float, time_sensitive_ttl: float, min_similarity: float = 0.0, max_index: int = 500) -> None:
+        self.store = store
+        self.ttl = ttl
+        self.time_sensitive_ttl = time_sensitive_ttl
+        self.min_similarity = min_similarity
+        self.max_index = max_index
+        self._index: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.similar_hits = 0
+
+    @staticmethod
+    def _text(query: str, instructions: Optional[str]) -> str:
+        return normalize_query(f"{query} {instructions or ''}")
+
+    @staticmethod
+    def _key(text: str, depth: Tuple[Any, ...]) -> str:
+        return text + "|" + "|".join(str(d) for d in depth)
+
+    def get(self, query: str, instructions: Optional[str], depth: Tuple[Any, ...]) -> Optional[CachedResult]:
+        text = self._text(query, instructions)
+        key = self._key(text, depth)
+        entry = self.store.get(key)
+        if entry is not None:
+            metrics.record_cache("result", "hit")
+            return CachedResult(entry.value, "exact", None, text, int(time.time() - entry.stored_at))
+        similar = self._similar(text, depth) if self.min_similarity > 0 else None
+        if similar is not None:
+            similar_key, cached_text, score = similar
+            entry = self.store.get(similar_key)
+            if entry is not None:
+                with self._lock:
+                    self.similar_hits += 1
+                metrics.record_cache("result", "similar")
+                logger.info(f"[result-cache] similar hit score={score:.2f} query='{text}' cached='{cached_text}'")
+                return CachedResult(entry.value, "similar", round(score, 3), cached_text, int(time.time() - entry.stored_at))
+            with self._lock:
+                self._index.pop(similar_key, None)
+        metrics.record_cache("result", "miss")
+        return None
+
+    def _similar(self, text: str, depth: Tuple[Any, ...]) -> Optional[Tuple[str, str, float]]:
+        """Key, query text and score of the most similar indexed query, if any reaches min_similarity."""
+        signature = minhash(text)
+        digits = tuple(_DIGITS.findall(text))
+        suffix = self._key("", depth)
+        # Scored on a snapshot: put() and eviction change the index concurrently and need not wait for the scan
+        with self._lock:
+            candidates = list(self._index.items())
+        best: Optional[Tuple[str, str, float]] = None
+        for key, entry in candidates:
+            if not key.endswith(suffix) or entry.digits != digits:
+                continue
+            score = similarity(signature, entry.signature)
+            if score >= self.min_similarity and (best is None or score > best[2]):
+                best = (key, entry.text, score)
+        return best
+
+    def put(self, query: str, instructions: Optional[str], depth: Tuple[Any, ...], value: Dict[str, Any]) -> None:
+        text = self._text(query, instructions)
+        key = self._key(text, depth)
+        ttl = self.time_sensitive_ttl if is_time_sensitive(text) else self.ttl
+        self.store.set(key, value, ttl=ttl)
+        if self.min_similarity > 0:
+            with self._lock:
+                self._index[key] = _Entry(minhash(text), tuple(_DIGITS.findall(text)), text)
+                self._index.move_to_end(key)
+                while len(self._index) > self.max_index:
+                    self._index.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            indexed = len(self._index)
+        return {**self.store.stats(), "similar_hits": self.similar_hits, "indexed": indexed}
+
+
+_result_cache: Optional[ResultCache] = None
+_result_cache_lock = threading.Lock()
+
+
+def get_result_cache() -> Optional[ResultCache]:
+    """Process-wide research result cache, or None unless RESULT_CACHE_ENABLED is set."""
+    global _result_cache
+    if not settings.result_cache_enabled:
+        return None
+    if _result_cache is None:
+        with _result_cache_lock:
+            if _result_cache is None:
+                store = make_cache(
+                    "result",
+                    settings.result_cache_ttl_seconds,
+                    settings.result_cache_backend,
+                    max_entries=settings.result_cache_max_entries,
+                    max_bytes=settings.result_cache_max_bytes,
+                    path=settings.result_cache_path,
+                    redis_url=settings.search_cache_redis_url,
+                )
+                _result_cache = ResultCache(
+                    store,
+                    ttl=settings.result_cache_ttl_seconds,
+                    time_sensitive_ttl=settings.result_cache_time_sensitive_ttl_seconds,
+                    min_similarity=settings.result_cache_similarity,
+                    max_index=settings.result_cache_max_entries,
+                )
+    return _result_cache
+
+
+__all__ = ["CachedResult", "ResultCache", "get_result_cache", "is_time_sensitive", "minhash", "similarity"]
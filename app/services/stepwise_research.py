@@ -1,45 +1,104 @@
-from typing import Dict, Any, List, Tuple
-from langchain.agents import initialize_agent, AgentType
+from typing import Dict, Any, Generator, Iterator, List, NamedTuple, Optional, Tuple
+from contextlib import contextmanager
+import asyncio
+import threading
+import time
+from langchain.agents import AgentExecutor, StructuredChatAgent
+from langchain_core.callbacks.base import BaseCallbackHandler
+from langchain_core.runnables import Runnable, RunnableLambda
 from langchain_core.tools import BaseTool
-from ..llm import make_llm
+from ..llm import get_llm
 from ..tools.cached_google_search import cached_google_search
 from ..tools.fetch_page import fetch_page
+from ..tools.fetch_pages import compact_pages, fetch_pages
+from ..utils.budget import current_budget
+from .answer import answer_messages, strip_uncertain
+from .page_store import PageStore, page_store_scope
+from .prefetch import Prefetcher, prefetch_scope
 from ..logging import logger
-from ..observability.callbacks import ResearchLoggingHandler
+from ..observability.callbacks import ANSWER_TAG, ResearchLoggingHandler, TracingHandler, budget_handlers
+from ..observability import metrics
+from ..observability.otlp import export_trace
+from ..observability.tracing import Tracer, tracer_scope
 from ..config import settings
 
 
 MAX_STEPS_DEFAULT = settings.agent_max_steps
+# What AgentExecutor returns when it stops without a final answer (early_stopping_method="force")
+STOPPED_OUTPUT = "Agent stopped due to iteration limit or time limit."
+TOOLS: List[BaseTool] = [cached_google_search, fetch_pages, fetch_page]
 
+# The structured-chat agent (prompt + LLM chain) is stateless and built once per streaming mode;
+# only the cheap AgentExecutor wrapper carrying per-request limits is created per call.
+_agents: Dict[bool, StructuredChatAgent] = {}
+_agents_lock = threading.Lock()
 
-def make_stepwise_agent(max_steps: int) -> Any:
-    tools: List[BaseTool] = [cached_google_search, fetch_page]
-    llm = make_llm()
-    agent = initialize_agent(
-        tools=tools,
-        llm=llm,
-        agent=AgentType.STRUCTURED_CHAT_ZERO_SHOT_REACT_DESCRIPTION,
+
+def _get_agent(streaming: bool) -> StructuredChatAgent:
+    agent = _agents.get(streaming)
+    if agent is None:
+        with _agents_lock:
+            agent = _agents.get(streaming)
+            if agent is None:
+                agent = _agents[streaming] = StructuredChatAgent.from_llm_and_tools(get_llm(streaming=streaming), TOOLS)
+    return agent
+
+
+class _BudgetedAgentExecutor(AgentExecutor):
+    """AgentExecutor that also stops taking steps once the current research run's budget is used up."""
+
+    def _should_continue(self, iterations: int, time_elapsed: float) -> bool:
+        budget = current_budget()
+        return super()._should_continue(iterations, time_elapsed) and not (budget is not None and budget.should_stop())
+
+
+def make_stepwise_agent(max_steps: int, streaming: bool = False) -> AgentExecutor:
+    return _BudgetedAgentExecutor.from_agent_and_tools(
+        agent=_get_agent(streaming),
+        tools=TOOLS,
         verbose=False,
         handle_parsing_errors=True,
         max_iterations=max_steps,
     )
-    return agent
 
 
-def run_stepwise_research(query: str, instructions: str | None, max_results: int = 5, *, parse_top_n: int = 3, max_iterations: int | None = None, force_escalate: bool = False) -> Tuple[str, List[Dict[str, Any]], List[Dict[str, Any]], Dict[str, Any]]:
-    logger.info(f"[stepwise] start query='{query}' max_results={max_results} parse_top_n={parse_top_n} max_iter={max_iterations or MAX_STEPS_DEFAULT}")
-    if instructions:
-        logger.info(f"[stepwise] instructions='{instructions}'")
+def warm_up() -> None:
+    """Build the shared LLM clients and agents ahead of the first request."""
+    for streaming in (False, True):
+        _get_agent(streaming)
+
+
+class StepwiseOutcome(NamedTuple):
+    summary: str
+    results: List[Dict[str, Any]]
+    pages: List[Dict[str, Any]]
+    continuation: Dict[str, Any]
+    timings: Optional[Dict[str, Any]] = None
+    mode: str = "agent"
+    # Stopped early by the run's budget; the summary is whatever could be answered from the pages read so far
+    partial: bool = False
+    budget: Optional[Dict[str, Any]] = None
+
+
+# Phrases in an answer that mean the sources did not settle the question
+UNCERTAIN_PHRASES = ("неизвест", "недоступн", "точное расписание", "not available", "unknown", "closer to the date")
 
-    agent = make_stepwise_agent(max_steps=(max_iterations or MAX_STEPS_DEFAULT))
 
+def looks_uncertain(text: str) -> bool:
+    lowered = text.lower()
+    return any(kw in lowered for kw in UNCERTAIN_PHRASES)
+
+
+def _system_prompt(max_steps: int, force_escalate: bool) -> str:
     system_prompt = (
         "You are a stepwise researcher. This tool is designed for iterative use and may be called multiple times if uncertainty remains. "
-        "Strict rules: Use cached_google_search ONCE per call. Begin with the FIRST result. "
-        "After each fetch_page, decide if the page already contains the answer. "
-        "If it likely contains the answer but needs context, fetch a FEW in-site links (via fetch_page on those links). "
-        "If it clearly does NOT contain the answer, move to the NEXT Google result. "
-        f"Stop after at most {max_iterations or MAX_STEPS_DEFAULT} total tool calls. "
+        "Strict rules: Use cached_google_search ONCE per call. "
+        "Then read the most promising results together with ONE fetch_pages call (usually the top 2-3 URLs) instead of one fetch_page call per URL; every tool call costs a full round-trip. "
+        "After each fetch, decide if the pages already contain the answer. "
+        "If they likely contain the answer but need context, fetch a FEW in-site links in a single fetch_pages call. "
+        "If they clearly do NOT contain the answer, move on to the NEXT Google results. "
+        "Use fetch_page only for a single URL. "
+        f"Stop after at most {max_steps} total tool calls. "
         "Only rely on content you fetched. Finish with a concise grounded answer. "
         "If uncertain, explicitly recommend a follow-up tool call with higher parse_top_n and max_iterations and set force_escalate=true. "
         "For time/place-sensitive queries (e.g., movie showtimes, tickets, schedules in a city on a date), do NOT give generic disclaimers. "
@@ -47,35 +106,213 @@ def run_stepwise_research(query: str, instructions: str | None, max_results: int
     )
     if force_escalate:
         system_prompt += " Always escalate across multiple relevant results before concluding."
+    return system_prompt
+
+
+# A research run written once for both entry points: a generator yielding (runnable, input, config) for each
+# call it makes and receiving the call's output (or its exception, thrown in) back. drive() makes the calls with
+# invoke(), adrive() with ainvoke(); the generator's return value is theirs.
+Steps = Generator[Tuple[Runnable, Any, Optional[Dict[str, Any]]], Any, Any]
+
+# compact_pages() as a runnable, so adrive() runs it in a worker thread
+_COMPACT_PAGES = RunnableLambda(compact_pages)
+
 
-    q = query if not instructions else f"{query}\nInstructions: {instructions}"
-    cb = ResearchLoggingHandler(trace=query[:60])
-    result = agent.invoke(q + "\n" + system_prompt, config={"callbacks": [cb]})
-    final_text: str = result["output"]
-    logger.info(f"[stepwise] summary_len={len(final_text)}")
+def drive(steps: Steps) -> Any:
+    send, value = steps.send, None
+    while True:
+        try:
+            runnable, input, config = send(value)
+        except StopIteration as done:
+            return done.value
+        try:
+            send, value = steps.send, runnable.invoke(input, config=config)
+        except Exception as e:
+            send, value = steps.throw, e
 
-    results = cached_google_search.invoke({"query": query, "max_results": max_results})
 
-    pages: List[Dict[str, Any]] = []
-    for r in results[:max(1, min(parse_top_n, len(results)))]:
-        if not r.get("link"):
-            continue
+async def adrive(steps: Steps) -> Any:
+    send, value = steps.send, None
+    while True:
         try:
-            logger.info(f"[stepwise] include result url={r['link']}")
-            parsed = fetch_page.invoke({"url": r["link"]})
-            if parsed:
-                pages.append(parsed)
+            runnable, input, config = send(value)
+        except StopIteration as done:
+            return done.value
+        try:
+            send, value = steps.send, await runnable.ainvoke(input, config=config)
         except Exception as e:
-            logger.warning(f"[stepwise] failed to parse page: {e}")
-
-    uncertain = any(kw in final_text.lower() for kw in ["неизвест", "недоступн", "точное расписание", "not available", "unknown", "closer to the date"])
-    continuation: Dict[str, Any] = {}
-    if uncertain and len(pages) < parse_top_n and len(results) > len(pages):
-        continuation = {
-            "message": "Consider calling /research again with deeper settings to parse more sources.",
-            "suggested_parse_top_n": min(5, parse_top_n + 1),
-            "suggested_max_iterations": (max_iterations or MAX_STEPS_DEFAULT) + 2,
-            "suggested_force_escalate": True,
-        }
-
-    return final_text, results, pages, continuation
+            send, value = steps.throw, e
+
+
+class _StepwiseRun:
+    """Per-request state shared by the sync and async entry points: the agent, its input and callbacks, the
+    page store, the trace and the prefetcher, plus turning the agent's answer into a StepwiseOutcome."""
+
+    def __init__(self, query: str, instructions: str | None, max_results: int, parse_top_n: int, max_iterations: int | None,
+                 force_escalate: bool, callbacks: Optional[List[BaseCallbackHandler]], trace: bool, tracer: Optional[Tracer]) -> None:
+        logger.info(f"[stepwise] start query='{query}' max_results={max_results} parse_top_n={parse_top_n} max_iter={max_iterations or MAX_STEPS_DEFAULT}")
+        if instructions:
+            logger.info(f"[stepwise] instructions='{instructions}'")
+        self.query = query
+        self.instructions = instructions
+        self.streaming = bool(callbacks)
+        self.max_results = max_results
+        self.parse_top_n = parse_top_n
+        self.max_iterations = max_iterations
+
+        # Extra callbacks (e.g. the SSE events handler) want LLM token deltas, which requires a streaming model
+        setup_started = time.perf_counter()
+        self.agent = make_stepwise_agent(max_steps=(max_iterations or MAX_STEPS_DEFAULT), streaming=bool(callbacks))
+        logger.info(f"[stepwise] setup_ms={(time.perf_counter() - setup_started) * 1000:.2f}")
+
+        q = query if not instructions else f"{query}\nInstructions: {instructions}"
+        self.input = q + "\n" + _system_prompt(max_iterations or MAX_STEPS_DEFAULT, force_escalate)
+        self.cb = ResearchLoggingHandler(trace=query[:60])
+        handlers: List[BaseCallbackHandler] = [self.cb, *(callbacks or [])]
+        self.own_tracer = tracer is None and trace
+        if self.own_tracer:
+            tracer = Tracer("research", query=query[:200], max_results=max_results, parse_top_n=parse_top_n)
+        if tracer is not None:
+            handlers.append(TracingHandler(tracer))
+        handlers += budget_handlers()
+        self.tracer = tracer
+        self.config: Dict[str, Any] = {"callbacks": handlers}
+        # For the calls whose whole output is the answer (streamed to SSE clients as `token` events)
+        self.answer_config: Dict[str, Any] = {**self.config, "tags": [ANSWER_TAG]}
+        self.store = PageStore(query=query)
+        self.budget = current_budget()
+        self.prefetch_stats: Optional[Dict[str, Any]] = None
+
+    @contextmanager
+    def scope(self, asynchronous: bool = False) -> Iterator[None]:
+        with page_store_scope(self.store), tracer_scope(self.tracer):
+            # Speculative loads of the pages the agent is likely to read next; whatever is unused is cancelled at the end
+            prefetcher = Prefetcher(self.parse_top_n, settings.prefetch_max_bytes, settings.prefetch_links, asynchronous=asynchronous) if settings.prefetch_enabled else None
+            try:
+                with prefetch_scope(prefetcher):
+                    yield
+            finally:
+                self.prefetch_stats = prefetcher.close() if prefetcher is not None else None
+
+    @property
+    def out_of_budget(self) -> bool:
+        return self.budget is not None and self.budget.exhausted is not None
+
+    def cut_short(self, final_text: str) -> bool:
+        """Whether the budget stopped the agent before it gave a final answer."""
+        return self.out_of_budget and (not final_text or final_text == STOPPED_OUTPUT)
+
+    def stopped(self, error: Exception) -> bool:
+        """Whether `error` comes from the run's budget running out (the run then wraps up with what it has)."""
+        if self.budget is None or not self.budget.expired():
+            return False
+        logger.warning(f"[stepwise] budget exhausted ({self.budget.exhausted}) mid-step: {error}")
+        return True
+
+    def wrap_up(self, observations: List[Dict[str, Any]]) -> Optional[List[Any]]:
+        """Prompt for answering from the pages read so far once the budget stopped the agent, or None without any."""
+        logger.info(f"[stepwise] budget exhausted ({self.budget.exhausted if self.budget else None}), answering from pages_read={len(self.store)}")
+        if self.budget is not None:
+            # The final answer may use the time held back for it
+            self.budget.answering = True
+        return answer_messages(self.query, self.instructions, observations)
+
+    def wrapped_up(self, final_text: str) -> str:
+        final_text, _ = strip_uncertain(final_text.strip())
+        if final_text:
+            return final_text
+        reason = self.budget.exhausted if self.budget is not None else None
+        return f"The research stopped before finding an answer: its {reason} budget ran out. The pages read so far are included."
+
+    def answered(self, final_text: str) -> None:
+        metrics.AGENT_STEPS.observe(self.cb.step)
+        logger.info(f"[stepwise] summary_len={len(final_text)} pages_read={len(self.store)}")
+
+    def missing(self, results: List[Dict[str, Any]]) -> List[str]:
+        """Top-N results the agent never opened; they are fetched together to fill in the pages output."""
+        missing = [r["link"] for r in results[:max(1, min(self.parse_top_n, len(results)))] if r.get("link") and r["link"] not in self.store]
+        if missing:
+            logger.info(f"[stepwise] include results urls={missing}")
+        return missing
+
+    def steps(self) -> Steps:
+        """The run from the agent to the pages output, as the runnable calls drive()/adrive() make; returns
+        the answer and the search results."""
+        final_text = ""
+        results: List[Dict[str, Any]] = []
+        try:
+            final_text = (yield self.agent, self.input, self.config)["output"]
+        except Exception as e:
+            if not self.stopped(e):
+                raise
+        if self.cut_short(final_text):
+            messages = self.wrap_up((yield _COMPACT_PAGES, self.store.pages(), None))
+            if messages is not None:
+                try:
+                    final_text = str((yield get_llm(streaming=self.streaming), messages, self.answer_config).content)
+                except Exception as e:
+                    logger.warning(f"[stepwise] final answer failed: {e}")
+                    final_text = ""
+            final_text = self.wrapped_up(final_text if messages is not None else "")
+        self.answered(final_text)
+        try:
+            results = yield cached_google_search, {"query": self.query, "max_results": self.max_results}, None
+        except Exception as e:
+            if not self.out_of_budget:
+                raise
+            logger.warning(f"[stepwise] no search results to include: {e}")
+        missing = [] if self.out_of_budget else self.missing(results)
+        if missing:
+            try:
+                yield fetch_pages, {"urls": missing}, self.config
+            except Exception as e:
+                logger.warning(f"[stepwise] failed to parse pages: {e}")
+        return final_text, results
+
+    def outcome(self, final_text: str, results: List[Dict[str, Any]]) -> StepwiseOutcome:
+        # Pages the agent actually read come first, then the top-N results it never opened
+        pages: List[Dict[str, Any]] = self.store.pages()
+        continuation: Dict[str, Any] = {}
+        if looks_uncertain(final_text) and len(pages) < self.parse_top_n and len(results) > len(pages):
+            continuation = {
+                "message": "Consider calling /research again with deeper settings to parse more sources.",
+                "suggested_parse_top_n": min(5, self.parse_top_n + 1),
+                "suggested_max_iterations": (self.max_iterations or MAX_STEPS_DEFAULT) + 2,
+                "suggested_force_escalate": True,
+            }
+
+        timings = None
+        if self.tracer is not None:
+            self.tracer.root.set(agent_steps=self.cb.step, pages=len(pages))
+            if self.prefetch_stats is not None:
+                self.tracer.root.set(**{f"prefetch_{k}": v for k, v in self.prefetch_stats.items()})
+            if self.own_tracer:
+                self.tracer.finish()
+                timings = self.tracer.to_dict()
+        return StepwiseOutcome(final_text, results, pages, continuation, timings, "agent", self.out_of_budget)
+
+    def export(self) -> None:
+        """Send the trace the run started itself to the OTLP collector; a caller-owned tracer is the caller's to export."""
+        if self.own_tracer and self.tracer is not None:
+            export_trace(self.tracer)
+
+
+def run_stepwise_research(query: str, instructions: str | None, max_results: int = 5, *, parse_top_n: int = 3, max_iterations: int | None = None, force_escalate: bool = False, callbacks: Optional[List[BaseCallbackHandler]] = None, trace: bool = False, tracer: Optional[Tracer] = None) -> StepwiseOutcome:
+    """Answer with the ReAct agent. With `tracer`, spans are recorded into it and the caller finishes the trace."""
+    run = _StepwiseRun(query, instructions, max_results, parse_top_n, max_iterations, force_escalate, callbacks, trace, tracer)
+    with run.scope():
+        final_text, results = drive(run.steps())
+    outcome = run.outcome(final_text, results)
+    run.export()
+    return outcome
+
+
+async def arun_stepwise_research(query: str, instructions: str | None, max_results: int = 5, *, parse_top_n: int = 3, max_iterations: int | None = None, force_escalate: bool = False, callbacks: Optional[List[BaseCallbackHandler]] = None, trace: bool = False, tracer: Optional[Tracer] = None) -> StepwiseOutcome:
+    """run_stepwise_research() on the event loop: the agent, its LLM calls and its tools all run as coroutines,
+    so a run waiting on the network holds no thread."""
+    run = _StepwiseRun(query, instructions, max_results, parse_top_n, max_iterations, force_escalate, callbacks, trace, tracer)
+    with run.scope(asynchronous=True):
+        final_text, results = await adrive(run.steps())
+    outcome = run.outcome(final_text, results)
+    await asyncio.to_thread(run.export)
+    return outcome
\ No newline at end of file
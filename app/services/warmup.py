@@ -0,0 +1,97 @@
+from typing import Any, Callable, Dict, Optional, Tuple
+import asyncio
+import importlib
+import time
+from ..logging import logger
+from ..observability import metrics
+from .executor import research_executor
+
+
+# Entry point of the research stack: importing it loads LangChain's agents, the OpenAI client, lxml and the tools
+RESEARCH_MODULE = f"{__package__}.research"
+
+
+def _import_research() -> None:
+    importlib.import_module(RESEARCH_MODULE)
+
+
+def _build_agents() -> None:
+    from .stepwise_research import warm_up as warm_up_agents
+    warm_up_agents()
+
+
+def _open_caches() -> None:
+    from ..utils.cache import get_search_cache
+    from ..utils.page_cache import get_page_cache
+    from .result_cache import get_result_cache
+    get_search_cache()
+    get_page_cache()
+    get_result_cache()
+
+
+def _start_workers() -> None:
+    research_executor.warm_up(RESEARCH_MODULE)
+
+
+STAGES: Tuple[Tuple[str, Callable[[], None]], ...] = (
+    ("imports", _import_research),
+    ("agents", _build_agents),
+    ("caches", _open_caches),
+    ("workers", _start_workers),
+)
+
+
+class WarmUp:
+    """Loads the research stack in the background once the server is up, so the process answers probes at once
+    and no request pays for imports, client and agent construction or opening caches.
+
+    Each stage runs in a thread, off the event loop. Research requests that arrive earlier wait for it (wait())
+    instead of importing on the loop. `ready` turns true only when every stage has succeeded; after a failure
+    it stays false and `error` says why, while requests go ahead and build what they need on first use.
+    """
+
+    def __init__(self, stages: Tuple[Tuple[str, Callable[[], None]], ...] = STAGES) -> None:
+        self.stages = stages
+        self.ready = False
+        self.error: Optional[str] = None
+        self.timings: Dict[str, float] = {}
+        self.elapsed_ms = 0.0
+        self._task: Optional["asyncio.Task[None]"] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def wait(self) -> None:
+        if self._task is not None and not self._task.done():
+            await asyncio.shield(self._task)
+
+    async def _run(self) -> None:
+        started = time.perf_counter()
+        try:
+            for name, stage in self.stages:
+                stage_started = time.perf_counter()
+                await asyncio.to_thread(stage)
+                self.timings[name] = round((time.perf_counter() - stage_started) * 1000, 1)
+            self.ready = True
+        except Exception as e:
+            self.error = f"{type(e).__name__}: {e}"
+            logger.warning(f"[warmup] incomplete, clients will be built on first use: {self.error}")
+        finally:
+            self.elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+        logger.info(f"[warmup] ready={self.ready} ms={self.elapsed_ms:.0f} stages={self.timings}")
+
+    def cancel(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"ready": self.ready, "error": self.error, "elapsed_ms": self.elapsed_ms, "stages": self.timings}
+
+
+warm_up = WarmUp()
+
+metrics.register_gauges("warmup", "Startup warm-up", warm_up.stats, ("ready", "elapsed_ms"))
+
+
+__all__ = ["WarmUp", "warm_up"]
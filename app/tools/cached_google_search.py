@@ -1,32 +1,99 @@
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Optional
 import time
-from langchain_core.tools import tool
+from langchain_core.tools import StructuredTool
 from .google_search import google_search as google_search_tool
-from ..config import settings
+from ..utils.cache import CacheEntry, get_search_cache, search_cache_key
+from ..utils.singleflight import SingleFlight
+from ..services.prefetch import current_prefetcher
 from ..logging import logger
+from ..observability import metrics
+from ..observability.tracing import Span, trace_span
 
 
-_CACHE: dict[Tuple[str, int], tuple[float, List[Dict[str, Any]]]] = {}
+# Identical searches that miss the cache at the same time share one Google CSE call
+_flight = SingleFlight("search")
 
 
-@tool("cached_google_search", return_direct=False)
-def cached_google_search(query: str, max_results: int = 5) -> List[Dict[str, Any]]:
-    """Return top N Google CSE results with TTL caching. Only one call should be used per research."""
-    key = (query, max_results)
-    now = time.time()
-    ttl = settings.search_ttl_seconds
-    logger.info(f"[search] query='{query}' max_results={max_results}")
-    if key in _CACHE:
-        ts, payload = _CACHE[key]
-        if now - ts <= ttl:
-            logger.info(f"[search] cache: hit age={int(now - ts)}s results={len(payload)}")
-            return payload
-        else:
-            logger.info(f"[search] cache: expired age={int(now - ts)}s -> refresh")
-    else:
-        logger.info("[search] cache: miss -> perform Google CSE")
-    results = google_search_tool.invoke({"query": query, "max_results": max_results})
+def _log_results(results: List[Dict[str, Any]]) -> None:
     for idx, r in enumerate(results, start=1):
         logger.info(f"[search] {idx}. title='{r.get('title')}' url={r.get('link')}")
-    _CACHE[key] = (now, results)
+
+
+def _search(query: str, max_results: int, key: str) -> List[Dict[str, Any]]:
+    results = google_search_tool.invoke({"query": query, "max_results": max_results})
+    _log_results(results)
+    get_search_cache().set(key, results)
     return results
+
+
+async def _asearch(query: str, max_results: int, key: str) -> List[Dict[str, Any]]:
+    results = await google_search_tool.ainvoke({"query": query, "max_results": max_results})
+    _log_results(results)
+    await get_search_cache().aset(key, results)
+    return results
+
+
+def _lookup(cached: Optional[CacheEntry], span: Optional[Span]) -> None:
+    metrics.record_cache("search", "hit" if cached is not None else "miss")
+    if span is not None:
+        span.set(cache="hit" if cached is not None else "miss")
+    if cached is not None:
+        logger.info(f"[search] cache: hit age={int(time.time() - cached.stored_at)}s results={len(cached.value)}")
+    else:
+        logger.info("[search] cache: miss -> perform Google CSE")
+
+
+def search_with_cache(query: str, max_results: int = 5) -> List[Dict[str, Any]]:
+    """Google CSE search through the shared TTL cache; keys ignore case and whitespace differences.
+
+    Concurrent misses for the same key are coalesced into a single CSE call.
+    """
+    key = search_cache_key(query, max_results)
+    logger.info(f"[search] query='{query}' max_results={max_results}")
+    with trace_span("search", "search", query=query[:200]) as span:
+        cached = get_search_cache().get(key)
+        _lookup(cached, span)
+        if cached is not None:
+            return cached.value
+        results = _flight.do(key, _search, query, max_results, key)
+        if span is not None:
+            span.set(results=len(results))
+        return results
+
+
+async def asearch_with_cache(query: str, max_results: int = 5) -> List[Dict[str, Any]]:
+    """search_with_cache() for the event loop: the CSE call goes over the shared async pool."""
+    key = search_cache_key(query, max_results)
+    logger.info(f"[search] query='{query}' max_results={max_results}")
+    with trace_span("search", "search", query=query[:200]) as span:
+        cached = await get_search_cache().aget(key)
+        _lookup(cached, span)
+        if cached is not None:
+            return cached.value
+        results = await _flight.do_async(key, _asearch, query, max_results, key)
+        if span is not None:
+            span.set(results=len(results))
+        return results
+
+
+def _prefetch(results: List[Dict[str, Any]]) -> None:
+    # The agent reads the top results next; start loading them while it waits on the LLM
+    prefetcher = current_prefetcher()
+    if prefetcher is not None:
+        prefetcher.prefetch([r.get("link") for r in results[:prefetcher.top_n] if r.get("link")])
+
+
+def _cached_google_search(query: str, max_results: int = 5) -> List[Dict[str, Any]]:
+    """Return top N Google CSE results with TTL caching. Only one call should be used per research."""
+    results = search_with_cache(query, max_results)
+    _prefetch(results)
+    return results
+
+
+async def _acached_google_search(query: str, max_results: int = 5) -> List[Dict[str, Any]]:
+    results = await asearch_with_cache(query, max_results)
+    _prefetch(results)
+    return results
+
+
+cached_google_search = StructuredTool.from_function(func=_cached_google_search, coroutine=_acached_google_search, name="cached_google_search")
@@ -1,22 +1,119 @@
-from typing import Dict, Any
-from langchain_core.tools import tool
-from ..utils.fetch import fetch_text_sync
-from ..utils.parse import extract_main_content, extract_links
+from typing import Dict, Any, Optional
+import asyncio
+from langchain_core.tools import StructuredTool
+from ..config import settings
+from ..services.page_store import current_page_store
+from ..services.prefetch import Prefetcher, current_prefetcher
+from ..services.pages import load_page, load_page_sync
+from ..utils.budget import BudgetExhausted, current_budget
+from ..utils.compact import compact_text
+from ..observability.tracing import trace_span
 from ..logging import logger
 
 
-@tool("fetch_page", return_direct=False)
-def fetch_page(url: str) -> Dict[str, Any]:
+def observation(page: Dict[str, Any], query: Optional[str], budget_tokens: Optional[int] = None) -> Dict[str, Any]:
+    """What the agent sees of a page: the text cut down to the excerpts most relevant to the research query.
+
+    Every observation is re-sent to the LLM on each later step, so it is kept within FETCH_PAGE_TOKEN_BUDGET.
+    Sections repeat content_text; they stay out of the prompt and only appear in the final pages output,
+    which is built from the full page kept in the request's page store.
+    """
+    obs = {k: v for k, v in page.items() if k != "sections"}
+    text = page.get("content_text")
+    if not text:
+        return obs
+    with trace_span("compact", "compact") as span:
+        budget = settings.fetch_page_token_budget if budget_tokens is None else budget_tokens
+        compacted = compact_text(text, query or page.get("title") or "", budget, settings.fetch_page_chunk_tokens)
+        if span is not None:
+            span.set(chars_in=len(text), tokens_out=compacted["tokens"], chunks_total=compacted["chunks_total"], chunks_kept=compacted["chunks_kept"])
+    obs["content_text"] = compacted["text"]
+    if compacted["compacted"]:
+        logger.info(f"[fetch] compacted chars={len(text)} -> tokens~{compacted['tokens']} chunks={compacted['chunks_kept']}/{compacted['chunks_total']}")
+        obs["content_note"] = (
+            f"Showing the {compacted['chunks_kept']} of {compacted['chunks_total']} passages most relevant to the query; "
+            "'...' marks omitted text."
+        )
+    return obs
+
+
+def _stored(url: str) -> Optional[Dict[str, Any]]:
+    store = current_page_store()
+    stored = store.get(url) if store is not None else None
+    if stored is not None:
+        logger.info(f"[fetch] url={url} store: hit")
+    else:
+        logger.info(f"[fetch] url={url}")
+    return stored
+
+
+def _record(url: str, page: Dict[str, Any], prefetcher: Optional[Prefetcher]) -> Dict[str, Any]:
+    if prefetcher is not None:
+        prefetcher.prefetch_links(page)
+    content_text = page.get("content_text")
+    logger.info(f"[fetch] parsed title='{page.get('title')}' content_len={len(content_text) if content_text else 0} links={len(page.get('links') or [])}")
+    store = current_page_store()
+    if store is not None:
+        store.record(url, page)
+    return page
+
+
+def _charge() -> None:
+    budget = current_budget()
+    if budget is not None:
+        budget.charge_fetch()
+
+
+def read_page(url: str) -> Dict[str, Any]:
+    """Return the full page for `url`, from the request's page store if this run already read it, else from
+    the run's prefetches or by loading it, recording it in the store.
+
+    Every page read this way counts against the run's fetch budget, prefetched or not; raises BudgetExhausted
+    when it (or the deadline) is used up.
+    """
+    stored = _stored(url)
+    if stored is not None:
+        return stored
+    _charge()
+    prefetcher = current_prefetcher()
+    page = prefetcher.take(url) if prefetcher is not None else None
+    page = load_page_sync(url) if page is None else {**page, "url": url}
+    return _record(url, page, prefetcher)
+
+
+async def aread_page(url: str) -> Dict[str, Any]:
+    """read_page() for the event loop."""
+    stored = _stored(url)
+    if stored is not None:
+        return stored
+    _charge()
+    prefetcher = current_prefetcher()
+    page = await prefetcher.atake(url) if prefetcher is not None else None
+    page = await load_page(url) if page is None else {**page, "url": url}
+    return _record(url, page, prefetcher)
+
+
+def _query() -> Optional[str]:
+    store = current_page_store()
+    return store.query if store is not None else None
+
+
+def _fetch_page(url: str) -> Dict[str, Any]:
     """Fetch a URL and return extracted content and in-site links."""
-    logger.info(f"[fetch] url={url}")
-    html = fetch_text_sync(url)
-    content_text, meta = extract_main_content(html)
-    links = extract_links(html, url)
-    title = meta.get("title")
-    logger.info(f"[fetch] parsed title='{title}' content_len={len(content_text) if content_text else 0} links={len(links)}")
-    return {
-        "url": url,
-        "title": title,
-        "content_text": content_text,
-        "links": links,
-    }
+    try:
+        page = read_page(url)
+    except BudgetExhausted as e:
+        return {"url": url, "error": str(e)}
+    return observation(page, _query())
+
+
+async def _afetch_page(url: str) -> Dict[str, Any]:
+    try:
+        page = await aread_page(url)
+    except BudgetExhausted as e:
+        return {"url": url, "error": str(e)}
+    # Compaction scores every passage of the page; keep it off the event loop
+    return await asyncio.to_thread(observation, page, _query())
+
+
+fetch_page = StructuredTool.from_function(func=_fetch_page, coroutine=_afetch_page, name="fetch_page")
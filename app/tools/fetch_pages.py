@@ -0,0 +1,93 @@
+from typing import Any, Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import contextvars
+import threading
+from langchain_core.tools import StructuredTool
+from ..config import settings
+from ..services.page_store import current_page_store
+from ..observability.tracing import trace_span
+from ..utils.concurrency import bounded
+from ..utils.urls import normalize_url
+from ..logging import logger
+from .fetch_page import aread_page, observation, read_page
+
+
+# Never less than this per page, however many URLs share the budget
+MIN_PAGE_TOKENS = 300
+
+_pool: Optional[ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ThreadPoolExecutor:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ThreadPoolExecutor(max_workers=max(1, settings.fanout_concurrency), thread_name_prefix="fetch")
+    return _pool
+
+
+def _unique(urls: List[str]) -> List[str]:
+    return list({normalize_url(u): u for u in urls if u}.values())[: max(1, settings.fetch_pages_max_urls)]
+
+
+def _read(url: str) -> Dict[str, Any]:
+    try:
+        return read_page(url)
+    except Exception as e:
+        logger.warning(f"[fetch] url={url} failed: {e}")
+        return {"url": url, "error": str(e)}
+
+
+async def _aread(url: str) -> Dict[str, Any]:
+    try:
+        return await aread_page(url)
+    except Exception as e:
+        logger.warning(f"[fetch] url={url} failed: {e}")
+        return {"url": url, "error": str(e)}
+
+
+def read_pages(urls: List[str]) -> List[Dict[str, Any]]:
+    """Load pages concurrently on the shared fan-out pool, in input order; failures come back as `{url, error}`.
+
+    Each load runs in a copy of the caller's context so it records into the same request page store and trace.
+    """
+    unique = _unique(urls)
+    with trace_span("fetch_pages", "fanout", urls=len(unique)):
+        if len(unique) == 1:
+            return [_read(unique[0])]
+        pool = _get_pool()
+        futures = [pool.submit(contextvars.copy_context().run, _read, u) for u in unique]
+        return [f.result() for f in futures]
+
+
+async def aread_pages(urls: List[str]) -> List[Dict[str, Any]]:
+    """read_pages() as tasks on the event loop, at most FANOUT_CONCURRENCY at once per call."""
+    unique = _unique(urls)
+    with trace_span("fetch_pages", "fanout", urls=len(unique)):
+        read = bounded(settings.fanout_concurrency)(_aread)
+        return list(await asyncio.gather(*(read(u) for u in unique)))
+
+
+def compact_pages(pages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Observations of several pages sharing FETCH_PAGES_TOKEN_BUDGET; `{url, error}` entries pass through."""
+    store = current_page_store()
+    query = store.query if store is not None else None
+    budget = max(MIN_PAGE_TOKENS, settings.fetch_pages_token_budget // max(1, len(pages)))
+    return [p if "error" in p else observation(p, query, budget) for p in pages]
+
+
+def _fetch_pages(urls: List[str]) -> List[Dict[str, Any]]:
+    """Fetch several URLs at once (e.g. the top search results, or a few in-site links) and return the extracted content and in-site links of each, in order."""
+    return compact_pages(read_pages(urls))
+
+
+async def _afetch_pages(urls: List[str]) -> List[Dict[str, Any]]:
+    pages = await aread_pages(urls)
+    # Compaction scores every passage of every page; keep it off the event loop
+    return await asyncio.to_thread(compact_pages, pages)
+
+
+fetch_pages = StructuredTool.from_function(func=_fetch_pages, coroutine=_afetch_pages, name="fetch_pages")
@@ -1,21 +1,49 @@
 from typing import List, Dict, Any
-import os
-from langchain_community.utilities.google_search import GoogleSearchAPIWrapper
-from langchain_core.tools import tool
+import asyncio
+from langchain_core.tools import StructuredTool
 from ..config import settings
+from ..utils.budget import timeout_for
+from ..utils.fetch import get_async_client, get_sync_client
 
 
-def _make_wrapper() -> GoogleSearchAPIWrapper:
-    os.environ["GOOGLE_API_KEY"] = settings.google_api_key
-    os.environ["GOOGLE_CSE_ID"] = settings.google_cse_id
-    return GoogleSearchAPIWrapper()
+GOOGLE_CSE_ENDPOINT = "https://customsearch.googleapis.com/"
 
 
-@tool("google_search", return_direct=False)
-def google_search(query: str, max_results: int = 5) -> List[Dict[str, Any]]:
-    """Search Google CSE and return up to top N results with title, link, and snippet."""
-    wrapper = _make_wrapper()
-    results = wrapper.results(query, max_results)
+def _url() -> str:
+    return (settings.google_cse_endpoint or GOOGLE_CSE_ENDPOINT).rstrip("/") + "/customsearch/v1"
+
+
+def _params(query: str, max_results: int) -> Dict[str, Any]:
+    return {
+        "key": settings.google_api_key,
+        "cx": settings.google_cse_id,
+        "q": query,
+        "num": max(1, min(max_results, 10)),
+    }
+
+
+def cse_results(query: str, max_results: int) -> List[Dict[str, Any]]:
+    """Call the Custom Search JSON API over the shared connection pool and return its raw `items`.
+
+    The API returns at most 10 results per call. It is called directly rather than through googleapiclient,
+    whose httplib2 transport has no async API, no per-call timeout and no connection sharing across threads.
+    """
+    resp = get_sync_client().get(_url(), params=_params(query, max_results), timeout=timeout_for(settings.request_timeout_seconds))
+    resp.raise_for_status()
+    return resp.json().get("items") or []
+
+
+async def acse_results(query: str, max_results: int) -> List[Dict[str, Any]]:
+    """cse_results() on the shared async pool; off the app's event loop it runs the sync call in a thread."""
+    client = get_async_client()
+    if client is None:
+        return await asyncio.to_thread(cse_results, query, max_results)
+    resp = await client.get(_url(), params=_params(query, max_results), timeout=timeout_for(settings.request_timeout_seconds))
+    resp.raise_for_status()
+    return resp.json().get("items") or []
+
+
+def _prune(results: List[Dict[str, Any]], max_results: int) -> List[Dict[str, Any]]:
     pruned = []
     for r in results[:max_results]:
         pruned.append({
@@ -24,3 +52,15 @@ def google_search(query: str, max_results: int = 5) -> List[Dict[str, Any]]:
             "snippet": r.get("snippet") or r.get("snippet_highlighted_words"),
         })
     return pruned
+
+
+def _google_search(query: str, max_results: int = 5) -> List[Dict[str, Any]]:
+    """Search Google CSE and return up to top N results with title, link, and snippet."""
+    return _prune(cse_results(query, max_results), max_results)
+
+
+async def _agoogle_search(query: str, max_results: int = 5) -> List[Dict[str, Any]]:
+    return _prune(await acse_results(query, max_results), max_results)
+
+
+google_search = StructuredTool.from_function(func=_google_search, coroutine=_agoogle_search, name="google_search")
@@ -1,38 +1,36 @@
 from typing import Dict, Any, List
 from urllib.parse import urljoin
 from langchain_core.tools import tool
-from ..utils.fetch import fetch_text
-from ..utils.parse import extract_main_content, extract_links
+from ..config import settings
+from ..services.pages import load_page
+from ..utils.concurrency import bounded, gather_ordered
 
 
 @tool("research_page", return_direct=False)
 async def research_page(url: str) -> Dict[str, Any]:
     """Fetch and parse a web page, extracting main content and following up to 5 in-site links."""
-    html = await fetch_text(url)
-    content_text, meta = extract_main_content(html)
-    links = extract_links(html, url)
+    page = await load_page(url)
+    links = page["links"]
 
     followed: List[str] = []
     subpages: List[Dict[str, Any]] = []
 
-    for href in links[:5]:
-        absolute = urljoin(url, href)
-        try:
-            sub_html = await fetch_text(absolute)
-            sub_text, sub_meta = extract_main_content(sub_html)
-            subpages.append({
-                "url": absolute,
-                "title": sub_meta.get("title"),
-                "content_text": sub_text,
-            })
-            followed.append(absolute)
-        except Exception:
+    absolutes = [urljoin(url, href) for href in links[:5]]
+    load = bounded(settings.fanout_concurrency)(load_page)
+    for absolute, sub in zip(absolutes, await gather_ordered([load(a) for a in absolutes])):
+        if isinstance(sub, BaseException):
             continue
+        subpages.append({
+            "url": absolute,
+            "title": sub.get("title"),
+            "content_text": sub.get("content_text"),
+        })
+        followed.append(absolute)
 
     return {
         "url": url,
-        "title": meta.get("title"),
-        "content_text": content_text,
+        "title": page.get("title"),
+        "content_text": page.get("content_text"),
         "subpages": subpages,
         "links_followed": followed,
     }
@@ -1,45 +1,24 @@
-from typing import Dict, Any, List, Tuple
-import time
+from typing import Dict, Any, List
+import asyncio
 from urllib.parse import urljoin
 from langchain_core.tools import tool
+from .cached_google_search import asearch_with_cache
 from ..config import settings
-from .google_search import google_search as google_search_tool
-from ..utils.fetch import fetch_text
-from ..utils.parse import extract_main_content, extract_links
-
-
-_SEARCH_CACHE: Dict[Tuple[str, int], Tuple[float, List[Dict[str, Any]]]] = {}
-
-
-def _get_cached_search(query: str, max_results: int) -> List[Dict[str, Any]]:
-    key = (query, max_results)
-    now = time.time()
-    ttl = settings.search_ttl_seconds
-    cached = _SEARCH_CACHE.get(key)
-    if cached:
-        ts, payload = cached
-        if now - ts <= ttl:
-            return payload
-    results = google_search_tool.invoke({"query": query, "max_results": max_results})
-    _SEARCH_CACHE[key] = (now, results)
-    return results
+from ..services.pages import load_page
+from ..utils.concurrency import bounded, gather_ordered, cancel_all
 
 
 @tool("research_web", return_direct=False)
 async def research_web(query: str, max_results: int = 5) -> Dict[str, Any]:
     """Perform a single TTL-cached web search; parse the first result thoroughly.
     If first page lacks an answer, escalate to parse additional top results; only then follow in-site links."""
-    results = _get_cached_search(query, max_results)
+    results = await asearch_with_cache(query, max_results)
     if not results:
         return {"query": query, "results": [], "pages": []}
 
     pages: List[Dict[str, Any]] = []
-
-    async def parse_single(url: str) -> Dict[str, Any]:
-        html = await fetch_text(url)
-        content_text, meta = extract_main_content(html)
-        links = extract_links(html, url)
-        return {"url": url, "title": meta.get("title"), "content_text": content_text, "links": links}
+    # One bound per call; per-host limits are enforced in the fetch layer
+    parse_single = bounded(settings.fanout_concurrency)(load_page)
 
     # Parse first result
     first_url = results[0].get("link")
@@ -61,42 +40,41 @@ async def research_web(query: str, max_results: int = 5) -> Dict[str, Any]:
         need_escalation = False
 
     if need_escalation:
-        for r in results[1:]:
-            url = r.get("link")
-            if not url:
-                continue
+        # Fetch the remaining results concurrently but consume them in rank order;
+        # the first page that passes the check cancels everything still outstanding.
+        tasks = [asyncio.create_task(parse_single(r["link"])) for r in results[1:] if r.get("link")]
+        for i, task in enumerate(tasks):
             try:
-                parsed = await parse_single(url)
-                pages.append(parsed)
-                if not lacks_answer(parsed.get("content_text", "")):
-                    break
+                parsed = await task
             except Exception:
                 continue
+            pages.append(parsed)
+            if not lacks_answer(parsed.get("content_text", "")):
+                await cancel_all(tasks[i + 1:])
+                break
+
+    async def fetch_sub(abs_url: str) -> Dict[str, Any]:
+        sub = await parse_single(abs_url)
+        return {
+            "url": abs_url,
+            "title": sub.get("title"),
+            "content_text": sub.get("content_text"),
+        }
+
+    async def enrich(p: Dict[str, Any]) -> Dict[str, Any]:
+        subs = await gather_ordered([fetch_sub(urljoin(p["url"], href)) for href in p.get("links", [])[:5]])
+        return {
+            "url": p["url"],
+            "title": p.get("title"),
+            "content_text": p.get("content_text"),
+            "subpages": [s for s in subs if not isinstance(s, BaseException)],
+        }
 
     # Optional: For the final chosen page(s), follow a few in-site links to enrich
-    enriched: List[Dict[str, Any]] = []
-    for p in pages[:2]:  # limit enrichment cost
-        try:
-            subpages: List[Dict[str, Any]] = []
-            for href in p.get("links", [])[:5]:
-                abs_url = urljoin(p["url"], href)
-                try:
-                    sub_html = await fetch_text(abs_url)
-                    sub_text, sub_meta = extract_main_content(sub_html)
-                    subpages.append({
-                        "url": abs_url,
-                        "title": sub_meta.get("title"),
-                        "content_text": sub_text,
-                    })
-                except Exception:
-                    continue
-            enriched.append({
-                "url": p["url"],
-                "title": p.get("title"),
-                "content_text": p.get("content_text"),
-                "subpages": subpages,
-            })
-        except Exception:
-            enriched.append(p)
+    chosen = pages[:2]  # limit enrichment cost
+    enriched_or_errors = await gather_ordered([enrich(p) for p in chosen])
+    enriched: List[Dict[str, Any]] = [
+        p if isinstance(e, BaseException) else e for p, e in zip(chosen, enriched_or_errors)
+    ]
 
     return {"query": query, "results": results, "pages": enriched}
@@ -0,0 +1,141 @@
+from typing import Any, Dict, Iterator, Optional
+from contextlib import contextmanager
+from contextvars import ContextVar
+import threading
+import time
+from ..observability import metrics
+
+
+class BudgetExhausted(Exception):
+    """Raised instead of starting (or waiting on) work the current research run has no budget left for."""
+
+    def __init__(self, reason: str) -> None:
+        super().__init__(f"research {reason} budget exhausted")
+        self.reason = reason
+
+
+class RunBudget:
+    """Deadline and cost limits of one research run, shared by everything the run does.
+
+    - Deadline: LLM calls, searches and fetches get timeouts shrunk to the time left. The last `reserve_ms`
+      (at most a quarter of the deadline) is kept back for the final answer; work started after that point
+      raises BudgetExhausted, and should_stop() tells the agent loop to wrap up.
+    - Tokens: prompt + completion tokens of every LLM call (charged by BudgetHandler); once `max_tokens` is
+      reached no further agent step starts.
+    - Fetches: pages the run reads, whether loaded for it or served by a prefetch (charged when the run takes
+      the page, not when the speculative download starts); rereads from the run's page store are free. Further
+      reads are refused.
+
+    `elapsed` is time already spent on the request before the run started (e.g. waiting for a worker).
+    Limits left as None are only counted.
+    """
+
+    def __init__(self, deadline_ms: Optional[int] = None, max_tokens: Optional[int] = None, max_fetches: Optional[int] = None,
+                 reserve_ms: int = 0, elapsed: float = 0.0) -> None:
+        self.started = time.monotonic() - max(0.0, elapsed)
+        self.deadline_ms = deadline_ms or None
+        self.deadline = self.started + self.deadline_ms / 1000 if self.deadline_ms else None
+        self.reserve = min(reserve_ms / 1000, self.deadline_ms / 4000) if self.deadline_ms else 0.0
+        self.max_tokens = max_tokens
+        self.max_fetches = max_fetches
+        self.tokens = 0
+        self.llm_calls = 0
+        self.fetches = 0
+        # Set by the final-answer call, which may use the reserve
+        self.answering = False
+        self.exhausted: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left for work (excluding the answer reserve unless answering), or None without a deadline."""
+        if self.deadline is None:
+            return None
+        return self.deadline - time.monotonic() - (0.0 if self.answering else self.reserve)
+
+    def _exhaust(self, reason: str) -> BudgetExhausted:
+        with self._lock:
+            first = self.exhausted is None
+            if first:
+                self.exhausted = reason
+        if first:
+            metrics.BUDGET_EXHAUSTED.labels(reason=reason).inc()
+        return BudgetExhausted(reason)
+
+    def timeout(self, default: float) -> float:
+        """`default` capped at the time left; raises BudgetExhausted when none is left."""
+        remaining = self.remaining()
+        if remaining is None:
+            return default
+        if remaining <= 0:
+            raise self._exhaust("deadline")
+        return min(default, remaining)
+
+    def charge_tokens(self, n: int) -> None:
+        with self._lock:
+            self.tokens += n
+            self.llm_calls += 1
+
+    def charge_fetch(self) -> None:
+        """Count one page load; raises BudgetExhausted when the fetch limit or the deadline is reached."""
+        self.timeout(0.0)
+        with self._lock:
+            allowed = self.max_fetches is None or self.fetches < self.max_fetches
+            if allowed:
+                self.fetches += 1
+        if not allowed:
+            raise self._exhaust("fetches")
+
+    def expired(self) -> bool:
+        """Whether the deadline has passed (recorded as the exhausted limit) or another limit already stopped the run."""
+        remaining = self.remaining()
+        if remaining is not None and remaining <= 0:
+            self._exhaust("deadline")
+        return self.exhausted is not None
+
+    def should_stop(self) -> bool:
+        """Whether the run should stop taking steps and answer from what it has; ask only before starting one.
+
+        A limit counts as exhausted only once it refuses work: the token limit here, where it refuses the next
+        step, and the fetch limit in charge_fetch(). A run that used exactly its allowance but needed nothing
+        more is not reported as cut short.
+        """
+        if not self.expired() and self.max_tokens is not None and self.tokens >= self.max_tokens:
+            self._exhaust("tokens")
+        return self.exhausted is not None
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "deadline_ms": self.deadline_ms,
+            "elapsed_ms": round((time.monotonic() - self.started) * 1000, 2),
+            "max_tokens": self.max_tokens,
+            "tokens_used": self.tokens,
+            "llm_calls": self.llm_calls,
+            "max_fetches": self.max_fetches,
+            "fetches_used": self.fetches,
+            "exhausted": self.exhausted,
+        }
+
+
+_current_budget: ContextVar[Optional[RunBudget]] = ContextVar("research_budget", default=None)
+
+
+def current_budget() -> Optional[RunBudget]:
+    return _current_budget.get()
+
+
+@contextmanager
+def budget_scope(budget: Optional[RunBudget]) -> Iterator[Optional[RunBudget]]:
+    token = _current_budget.set(budget)
+    try:
+        yield budget
+    finally:
+        _current_budget.reset(token)
+
+
+def timeout_for(default: float) -> float:
+    """`default` capped at the current run's remaining time (unchanged outside a budgeted run)."""
+    budget = _current_budget.get()
+    return budget.timeout(default) if budget is not None else default
+
+
+__all__ = ["BudgetExhausted", "RunBudget", "budget_scope", "current_budget", "timeout_for"]
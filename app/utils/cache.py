@@ -0,0 +1,337 @@
+from typing import Any, Dict, NamedTuple, Optional
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+import asyncio
+import os
+import re
+import sqlite3
+import threading
+import time
+import orjson
+from ..config import settings
+from ..logging import logger
+
+
+class CacheEntry(NamedTuple):
+    value: Any
+    stored_at: float
+
+
+def normalize_query(query: str) -> str:
+    """Case- and whitespace-insensitive form of a query so trivial variants share one cache entry."""
+    return re.sub(r"\s+", " ", query).strip().casefold()
+
+
+class BaseCache(ABC):
+    """Key/value cache with per-entry TTL. Values must be JSON-serializable; they are stored as orjson bytes."""
+
+    def __init__(self, namespace: str, default_ttl: float) -> None:
+        self.namespace = namespace
+        self.default_ttl = default_ttl
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[CacheEntry]:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        ...
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        ...
+
+    @abstractmethod
+    def clear(self) -> None:
+        ...
+
+    async def aget(self, key: str) -> Optional[CacheEntry]:
+        """get() for callers on the event loop; backends doing disk or network I/O run it in a worker thread."""
+        return await asyncio.to_thread(self.get, key)
+
+    async def aset(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        await asyncio.to_thread(self.set, key, value, ttl)
+
+    def _count(self, entry: Optional[CacheEntry]) -> Optional[CacheEntry]:
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return entry
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": type(self).__name__, "namespace": self.namespace, "hits": self.hits, "misses": self.misses}
+
+
+class MemoryCache(BaseCache):
+    """In-process LRU cache bounded by entry count and total value bytes; expired entries are dropped on access or when the bounds are hit."""
+
+    def __init__(self, namespace: str, default_ttl: float, max_entries: int = 1000, max_bytes: int = 32 * 1024 * 1024) -> None:
+        super().__init__(namespace, default_ttl)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._data: "OrderedDict[str, tuple[float, float, bytes]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def _drop(self, key: str) -> None:
+        _, _, blob = self._data.pop(key)
+        self._bytes -= len(blob)
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        k = self._key(key)
+        now = time.time()
+        with self._lock:
+            item = self._data.get(k)
+            if item is None:
+                return self._count(None)
+            stored_at, expires_at, blob = item
+            if expires_at <= now:
+                self._drop(k)
+                return self._count(None)
+            self._data.move_to_end(k)
+        return self._count(CacheEntry(orjson.loads(blob), stored_at))
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        k = self._key(key)
+        blob = orjson.dumps(value)
+        if len(blob) > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock:
+            if k in self._data:
+                self._drop(k)
+            self._data[k] = (now, now + (ttl if ttl is not None else self.default_ttl), blob)
+            self._bytes += len(blob)
+            if len(self._data) > self.max_entries or self._bytes > self.max_bytes:
+                for stale in [sk for sk, (_, exp, _) in self._data.items() if exp <= now]:
+                    self._drop(stale)
+            while len(self._data) > self.max_entries or self._bytes > self.max_bytes:
+                self._drop(next(iter(self._data)))
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            if self._key(key) in self._data:
+                self._drop(self._key(key))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**super().stats(), "entries": len(self._data), "bytes": self._bytes}
+
+    async def aget(self, key: str) -> Optional[CacheEntry]:
+        return self.get(key)
+
+    async def aset(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        self.set(key, value, ttl)
+
+
+class SQLiteCache(BaseCache):
+    """Out-of-process cache in a SQLite file, shared by every uvicorn worker on the host.
+
+    Also serves as the local stand-in for a shared Redis-compatible store in development.
+
+    Hits do not write: their access times are buffered and written in one batch with the next set(), or once
+    `touch_batch` of them are pending, so LRU order is approximate between writes. Entry count and total size
+    are kept in a one-row table by triggers, so bounding the cache does not scan it.
+    """
+
+    def __init__(self, namespace: str, default_ttl: float, path: str, max_entries: int = 1000, max_bytes: int = 32 * 1024 * 1024,
+                 touch_batch: int = 64) -> None:
+        super().__init__(namespace, default_ttl)
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.touch_batch = touch_batch
+        self._local = threading.local()
+        self._touched: Dict[str, float] = {}
+        self._touched_lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        conn = self._conn()
+        # One transaction, so another worker cannot write between seeding the totals and creating their triggers
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, "
+            "stored_at REAL NOT NULL, expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed_at)")
+        conn.execute("CREATE INDEX IF NOT EXISTS cache_expires ON cache (expires_at)")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache_totals (id INTEGER PRIMARY KEY CHECK (id = 0), entries INTEGER NOT NULL, bytes INTEGER NOT NULL)"
+        )
+        conn.execute("INSERT OR IGNORE INTO cache_totals SELECT 0, COUNT(*), COALESCE(SUM(size), 0) FROM cache")
+        conn.execute(
+            "CREATE TRIGGER IF NOT EXISTS cache_inserted AFTER INSERT ON cache BEGIN "
+            "UPDATE cache_totals SET entries = entries + 1, bytes = bytes + new.size; END"
+        )
+        conn.execute(
+            "CREATE TRIGGER IF NOT EXISTS cache_deleted AFTER DELETE ON cache BEGIN "
+            "UPDATE cache_totals SET entries = entries - 1, bytes = bytes - old.size; END"
+        )
+        conn.execute(
+            "CREATE TRIGGER IF NOT EXISTS cache_resized AFTER UPDATE OF size ON cache BEGIN "
+            "UPDATE cache_totals SET bytes = bytes - old.size + new.size; END"
+        )
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        k = self._key(key)
+        now = time.time()
+        conn = self._conn()
+        row = conn.execute("SELECT value, stored_at, expires_at FROM cache WHERE key = ?", (k,)).fetchone()
+        # Expired rows are left for the next set() to sweep
+        if row is None or row[2] <= now:
+            return self._count(None)
+        with self._touched_lock:
+            self._touched[k] = now
+            pending = len(self._touched) >= self.touch_batch
+        if pending:
+            with conn:
+                self._flush_touched(conn)
+        return self._count(CacheEntry(orjson.loads(row[0]), row[1]))
+
+    def _flush_touched(self, conn: sqlite3.Connection) -> None:
+        with self._touched_lock:
+            touched, self._touched = self._touched, {}
+        if touched:
+            conn.executemany(
+                "UPDATE cache SET accessed_at = MAX(accessed_at, ?) WHERE key = ?", [(at, k) for k, at in touched.items()]
+            )
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        blob = orjson.dumps(value)
+        if len(blob) > self.max_bytes:
+            return
+        now = time.time()
+        conn = self._conn()
+        with conn:
+            self._flush_touched(conn)
+            # An upsert rather than INSERT OR REPLACE: REPLACE's implicit delete does not fire the totals trigger
+            conn.execute(
+                "INSERT INTO cache (key, value, size, stored_at, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET value = excluded.value, size = excluded.size, stored_at = excluded.stored_at, "
+                "expires_at = excluded.expires_at, accessed_at = excluded.accessed_at",
+                (self._key(key), blob, len(blob), now, now + (ttl if ttl is not None else self.default_ttl), now),
+            )
+            conn.execute("DELETE FROM cache WHERE expires_at <= ?", (now,))
+            count, total = conn.execute("SELECT entries, bytes FROM cache_totals").fetchone()
+            while count > self.max_entries or total > self.max_bytes:
+                victim = conn.execute("SELECT key, size FROM cache ORDER BY accessed_at LIMIT 1").fetchone()
+                if victim is None:
+                    break
+                conn.execute("DELETE FROM cache WHERE key = ?", (victim[0],))
+                count -= 1
+                total -= victim[1]
+
+    def delete(self, key: str) -> None:
+        with self._conn() as conn:
+            conn.execute("DELETE FROM cache WHERE key = ?", (self._key(key),))
+
+    def clear(self) -> None:
+        with self._conn() as conn:
+            conn.execute("DELETE FROM cache WHERE key LIKE ?", (f"{self.namespace}:%",))
+
+    def stats(self) -> Dict[str, Any]:
+        count, total = self._conn().execute("SELECT entries, bytes FROM cache_totals").fetchone()
+        return {**super().stats(), "entries": count, "bytes": total, "path": self.path}
+
+
+class RedisCache(BaseCache):
+    """Cache in a Redis-compatible server shared across replicas; bounds are enforced by the server's maxmemory policy."""
+
+    def __init__(self, namespace: str, default_ttl: float, url: str, max_bytes: int = 32 * 1024 * 1024) -> None:
+        super().__init__(namespace, default_ttl)
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("Cache backend 'redis' requires the 'redis' package (pip install redis)") from e
+        self.max_bytes = max_bytes
+        self._client = redis.Redis.from_url(url)
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        raw = self._client.get(self._key(key))
+        if raw is None:
+            return self._count(None)
+        payload = orjson.loads(raw)
+        return self._count(CacheEntry(payload["v"], payload["t"]))
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        blob = orjson.dumps({"v": value, "t": time.time()})
+        if len(blob) > self.max_bytes:
+            return
+        self._client.set(self._key(key), blob, px=int((ttl if ttl is not None else self.default_ttl) * 1000))
+
+    def delete(self, key: str) -> None:
+        self._client.delete(self._key(key))
+
+    def clear(self) -> None:
+        for k in self._client.scan_iter(match=f"{self.namespace}:*"):
+            self._client.delete(k)
+
+
+def make_cache(namespace: str, default_ttl: float, backend: str, *, max_entries: int, max_bytes: int, path: str = "", redis_url: str = "") -> BaseCache:
+    if backend == "sqlite":
+        return SQLiteCache(namespace, default_ttl, path, max_entries=max_entries, max_bytes=max_bytes)
+    if backend == "redis":
+        return RedisCache(namespace, default_ttl, redis_url, max_bytes=max_bytes)
+    if backend != "memory":
+        logger.warning(f"[cache] unknown backend '{backend}' for {namespace}; using memory")
+    return MemoryCache(namespace, default_ttl, max_entries=max_entries, max_bytes=max_bytes)
+
+
+_search_cache: Optional[BaseCache] = None
+_search_cache_lock = threading.Lock()
+
+
+def get_search_cache() -> BaseCache:
+    """Process-wide Google search cache shared by cached_google_search and research_web."""
+    global _search_cache
+    if _search_cache is None:
+        with _search_cache_lock:
+            if _search_cache is None:
+                _search_cache = make_cache(
+                    "search",
+                    settings.search_ttl_seconds,
+                    settings.search_cache_backend,
+                    max_entries=settings.search_cache_max_entries,
+                    max_bytes=settings.search_cache_max_bytes,
+                    path=settings.search_cache_path,
+                    redis_url=settings.search_cache_redis_url,
+                )
+    return _search_cache
+
+
+def search_cache_key(query: str, max_results: int) -> str:
+    return f"{normalize_query(query)}|{max_results}"
+
+
+__all__ = [
+    "CacheEntry",
+    "BaseCache",
+    "MemoryCache",
+    "SQLiteCache",
+    "RedisCache",
+    "make_cache",
+    "normalize_query",
+    "get_search_cache",
+    "search_cache_key",
+]
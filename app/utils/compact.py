@@ -0,0 +1,145 @@
+from typing import Any, Dict, List
+from collections import Counter
+import math
+import re
+
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+_SPACE = re.compile(r"[ \t\u00a0\u200b]+")
+_SENTENCE_END = re.compile(r"(?<=[.!?…])\s+")
+
+# Chars per token for budgeting; close enough for Latin and Cyrillic text without shipping a tokenizer
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+# Shorter lines are usually inline fragments (link text, emphasis) of a sentence, so repeats are kept
+MIN_DEDUPE_CHARS = 24
+
+
+def clean_lines(text: str) -> List[str]:
+    """Collapse runs of whitespace, drop empty lines and keep only the first copy of repeated lines
+    (menus, share blocks, cookie notices and footers repeated across a page)."""
+    seen = set()
+    lines: List[str] = []
+    for raw in text.splitlines():
+        line = _SPACE.sub(" ", raw).strip()
+        if len(line) < 2:
+            continue
+        if len(line) >= MIN_DEDUPE_CHARS:
+            key = line.casefold()
+            if key in seen:
+                continue
+            seen.add(key)
+        lines.append(line)
+    return lines
+
+
+def _split_long(line: str, max_chars: int) -> List[str]:
+    if len(line) <= max_chars:
+        return [line]
+    parts: List[str] = []
+    current = ""
+    for sentence in _SENTENCE_END.split(line):
+        while len(sentence) > max_chars:
+            cut = sentence.rfind(" ", 0, max_chars)
+            cut = cut if cut > 0 else max_chars
+            if current:
+                parts.append(current)
+                current = ""
+            parts.append(sentence[:cut])
+            sentence = sentence[cut:].lstrip()
+        if current and len(current) + 1 + len(sentence) > max_chars:
+            parts.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        parts.append(current)
+    return parts
+
+
+def chunk_lines(lines: List[str], chunk_tokens: int) -> List[str]:
+    """Group consecutive lines into chunks of about `chunk_tokens`, splitting overlong lines at sentence breaks."""
+    max_chars = max(1, chunk_tokens) * CHARS_PER_TOKEN
+    chunks: List[str] = []
+    current: List[str] = []
+    size = 0
+    for line in lines:
+        for piece in _split_long(line, max_chars):
+            if current and size + len(piece) > max_chars:
+                chunks.append("\n".join(current))
+                current, size = [], 0
+            current.append(piece)
+            size += len(piece) + 1
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
+
+
+def _terms(text: str) -> List[str]:
+    return [t.casefold() for t in _WORD.findall(text)]
+
+
+def bm25_scores(query: str, chunks: List[str], k1: float = 1.5, b: float = 0.75) -> List[float]:
+    """Okapi BM25 score of each chunk for the query, with the chunks themselves as the corpus."""
+    docs = [_terms(c) for c in chunks]
+    n = len(docs)
+    if not n:
+        return []
+    avg_len = sum(len(d) for d in docs) / n or 1.0
+    df: Counter = Counter()
+    for d in docs:
+        df.update(set(d))
+    query_terms = set(_terms(query))
+    scores: List[float] = []
+    for d in docs:
+        tf = Counter(d)
+        score = 0.0
+        for term in query_terms:
+            f = tf.get(term)
+            if not f:
+                continue
+            idf = math.log(1 + (n - df[term] + 0.5) / (df[term] + 0.5))
+            score += idf * f * (k1 + 1) / (f + k1 * (1 - b + b * len(d) / avg_len))
+        scores.append(score)
+    return scores
+
+
+def compact_text(text: str, query: str, budget_tokens: int, chunk_tokens: int = 200) -> Dict[str, Any]:
+    """Shrink page text to the chunks most relevant to `query`, at most `budget_tokens` in total.
+
+    Chunks are picked by BM25 score (leading chunks win ties, which also covers pages with no query
+    terms at all) and returned in page order, with `...` marking the gaps between them.
+    """
+    lines = clean_lines(text)
+    cleaned = "\n".join(lines)
+    if budget_tokens <= 0 or estimate_tokens(cleaned) <= budget_tokens:
+        return {"text": cleaned, "tokens": estimate_tokens(cleaned), "chunks_total": None, "chunks_kept": None, "compacted": False}
+
+    chunks = chunk_lines(lines, chunk_tokens)
+    scores = bm25_scores(query, chunks)
+    ranked = sorted(range(len(chunks)), key=lambda i: (-scores[i], i))
+    kept: List[int] = []
+    used = 0
+    for i in ranked:
+        cost = estimate_tokens(chunks[i])
+        if used + cost > budget_tokens:
+            continue
+        kept.append(i)
+        used += cost
+    kept.sort()
+
+    parts: List[str] = []
+    for pos, i in enumerate(kept):
+        if pos and i != kept[pos - 1] + 1:
+            parts.append("...")
+        parts.append(chunks[i])
+    out = "\n".join(parts)
+    return {"text": out, "tokens": estimate_tokens(out), "chunks_total": len(chunks), "chunks_kept": len(kept), "compacted": True}
+
+
+__all__ = ["estimate_tokens", "clean_lines", "chunk_lines", "bm25_scores", "compact_text"]
@@ -0,0 +1,33 @@
+from typing import Any, Awaitable, Callable, List, Sequence, TypeVar
+import asyncio
+
+
+T = TypeVar("T")
+
+
+def bounded(limit: int) -> Callable[[Callable[..., Awaitable[T]]], Callable[..., Awaitable[T]]]:
+    """Wrap a coroutine function so at most `limit` calls run concurrently (per wrapped function)."""
+    sem = asyncio.Semaphore(max(1, limit))
+
+    def wrap(fn: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+        async def run(*args: Any, **kwargs: Any) -> T:
+            async with sem:
+                return await fn(*args, **kwargs)
+        return run
+
+    return wrap
+
+
+async def gather_ordered(coros: Sequence[Awaitable[T]]) -> List[T | BaseException]:
+    """Run awaitables concurrently and return results (or the raised exception) in the original order."""
+    return list(await asyncio.gather(*coros, return_exceptions=True))
+
+
+async def cancel_all(tasks: Sequence["asyncio.Task[Any]"]) -> None:
+    for t in tasks:
+        t.cancel()
+    if tasks:
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+__all__ = ["bounded", "gather_ordered", "cancel_all"]
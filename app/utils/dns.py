@@ -0,0 +1,125 @@
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+import socket
+import threading
+import time
+import anyio
+import httpcore
+import httpx
+
+
+class DNSCache:
+    """Resolved addresses per (host, port), reused for `ttl_seconds` (0 disables caching)."""
+
+    def __init__(self, ttl_seconds: float, max_entries: int = 1024) -> None:
+        self.ttl_seconds = float(ttl_seconds)
+        self.max_entries = max_entries
+        self._entries: Dict[Tuple[str, int], Tuple[float, List[str]]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, host: str, port: int) -> Optional[List[str]]:
+        with self._lock:
+            hit = self._entries.get((host, port))
+        if hit is None or time.monotonic() - hit[0] > self.ttl_seconds:
+            return None
+        return hit[1]
+
+    def put(self, host: str, port: int, addresses: List[str]) -> None:
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._entries.clear()
+            self._entries[(host, port)] = (time.monotonic(), addresses)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+def _addresses(infos: Iterable[Any]) -> List[str]:
+    return list(dict.fromkeys(info[4][0] for info in infos))
+
+
+class _CachingBackend(httpcore.NetworkBackend):
+    """Resolves through a DNSCache, then connects to the addresses in order with the wrapped backend.
+
+    TLS still verifies and sends SNI for the URL's host name: httpcore takes it from the request origin, not
+    from the address connected to.
+    """
+
+    def __init__(self, cache: DNSCache, backend: httpcore.NetworkBackend) -> None:
+        self.cache = cache
+        self.backend = backend
+
+    def connect_tcp(self, host: str, port: int, timeout: Optional[float] = None, local_address: Optional[str] = None,
+                    socket_options: Optional[Iterable[Any]] = None) -> httpcore.NetworkStream:
+        addresses = self.cache.get(host, port)
+        if addresses is None:
+            try:
+                addresses = _addresses(socket.getaddrinfo(host, port, type=socket.SOCK_STREAM))
+            except OSError as e:
+                raise httpcore.ConnectError(str(e)) from e
+            self.cache.put(host, port, addresses)
+        error: Optional[Exception] = None
+        for address in addresses:
+            try:
+                return self.backend.connect_tcp(address, port, timeout=timeout, local_address=local_address, socket_options=socket_options)
+            except httpcore.ConnectError as e:
+                error = e
+        raise error or httpcore.ConnectError(f"no addresses for {host}")
+
+    def connect_unix_socket(self, path: str, timeout: Optional[float] = None,
+                            socket_options: Optional[Iterable[Any]] = None) -> httpcore.NetworkStream:
+        return self.backend.connect_unix_socket(path, timeout=timeout, socket_options=socket_options)
+
+    def sleep(self, seconds: float) -> None:
+        self.backend.sleep(seconds)
+
+
+class _AsyncCachingBackend(httpcore.AsyncNetworkBackend):
+    """_CachingBackend for async clients; lookups go through the running loop's resolver."""
+
+    def __init__(self, cache: DNSCache, backend: httpcore.AsyncNetworkBackend) -> None:
+        self.cache = cache
+        self.backend = backend
+
+    async def connect_tcp(self, host: str, port: int, timeout: Optional[float] = None, local_address: Optional[str] = None,
+                          socket_options: Optional[Iterable[Any]] = None) -> httpcore.AsyncNetworkStream:
+        addresses = self.cache.get(host, port)
+        if addresses is None:
+            try:
+                with anyio.fail_after(timeout):
+                    addresses = _addresses(await anyio.getaddrinfo(host, port, type=socket.SOCK_STREAM))
+            except TimeoutError as e:
+                raise httpcore.ConnectTimeout(f"resolving {host} timed out") from e
+            except OSError as e:
+                raise httpcore.ConnectError(str(e)) from e
+            self.cache.put(host, port, addresses)
+        error: Optional[Exception] = None
+        for address in addresses:
+            try:
+                return await self.backend.connect_tcp(address, port, timeout=timeout, local_address=local_address, socket_options=socket_options)
+            except httpcore.ConnectError as e:
+                error = e
+        raise error or httpcore.ConnectError(f"no addresses for {host}")
+
+    async def connect_unix_socket(self, path: str, timeout: Optional[float] = None,
+                                  socket_options: Optional[Iterable[Any]] = None) -> httpcore.AsyncNetworkStream:
+        return await self.backend.connect_unix_socket(path, timeout=timeout, socket_options=socket_options)
+
+    async def sleep(self, seconds: float) -> None:
+        await self.backend.sleep(seconds)
+
+
+def cached_transport(cache: DNSCache, asynchronous: bool, **kwargs: Any) -> Union[httpx.HTTPTransport, httpx.AsyncHTTPTransport]:
+    """An httpx transport (built with `kwargs`) whose connections resolve host names through `cache`.
+
+    Only clients using this transport see cached DNS; socket.getaddrinfo and every other library are untouched.
+    """
+    transport: Union[httpx.HTTPTransport, httpx.AsyncHTTPTransport] = (httpx.AsyncHTTPTransport if asynchronous else httpx.HTTPTransport)(**kwargs)
+    if cache.ttl_seconds > 0:
+        # httpx has no option for it, but its httpcore pool hands this backend to every connection it opens
+        pool: Any = transport._pool
+        pool._network_backend = (_AsyncCachingBackend if asynchronous else _CachingBackend)(cache, pool._network_backend)
+    return transport
+
+
+__all__ = ["DNSCache", "cached_transport"]
@@ -1,21 +1,582 @@
+import asyncio
+import re
+import threading
+import time
+import weakref
 import httpx
-from typing import Optional
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Callable, Dict, Iterator, NamedTuple, Optional
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+from tenacity import AsyncRetrying, RetryCallState, Retrying, retry_if_exception, stop_after_attempt, wait_random_exponential
 from ..config import settings
+from ..logging import logger
+from ..observability import metrics
+from .budget import BudgetExhausted, current_budget, timeout_for
+from .dns import DNSCache, cached_transport
+from .hosts import HostScheduler, HostUnavailableError, RobotsDisallowedError, parse_retry_after
+from .singleflight import SingleFlight
 
 
-async def fetch_text(url: str, timeout: Optional[int] = None) -> str:
+# Process-wide connection pools, created at app startup and closed at shutdown.
+# Every fetch to the same host reuses keep-alive connections instead of paying a fresh TCP+TLS handshake.
+_sync_client: Optional[httpx.Client] = None
+_async_client: Optional[httpx.AsyncClient] = None
+_async_loop: Optional[asyncio.AbstractEventLoop] = None
+_client_lock = threading.Lock()
+# Host name lookups for these clients' connections (not process-wide: socket.getaddrinfo is left alone)
+_dns_cache = DNSCache(settings.http_dns_cache_ttl_seconds)
+
+# Per-host concurrency limits on top of the global pool limits (httpx only limits connections globally).
+# Held weakly: fetches in or waiting for a slot keep their host's semaphore alive, and an idle one (all slots
+# free, the same as a new one) is dropped, so crawling many domains does not grow these maps without bound.
+_host_locks: "weakref.WeakValueDictionary[str, threading.BoundedSemaphore]" = weakref.WeakValueDictionary()
+_async_host_locks: "weakref.WeakValueDictionary[str, asyncio.Semaphore]" = weakref.WeakValueDictionary()
+
+# Rate limits, Retry-After cooldowns, circuit breakers and robots.txt per host, shared by sync and async fetches
+_scheduler: Optional[HostScheduler] = None
+# Concurrent first fetches to a host share one robots.txt download
+_robots_flight = SingleFlight("robots", retry_on=(BudgetExhausted,))
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+ROBOTS_TIMEOUT_SECONDS = 5.0
+
+
+def _http2_enabled() -> bool:
+    if not settings.http_http2:
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        logger.warning("[http] HTTP_HTTP2 is set but the 'h2' package is not installed; using HTTP/1.1")
+        return False
+    return True
+
+
+def _client_kwargs(asynchronous: bool) -> Dict[str, object]:
+    transport = cached_transport(
+        _dns_cache,
+        asynchronous,
+        http2=_http2_enabled(),
+        limits=httpx.Limits(
+            max_connections=settings.http_max_connections,
+            max_keepalive_connections=settings.http_max_keepalive_connections,
+            keepalive_expiry=settings.http_keepalive_expiry_seconds,
+        ),
+    )
+    return {
+        "timeout": settings.request_timeout_seconds,
+        "headers": {"User-Agent": settings.user_agent},
+        "follow_redirects": True,
+        "transport": transport,
+    }
+
+
+def get_sync_client() -> httpx.Client:
+    """Return the shared sync client, creating it lazily (e.g. inside process-pool workers)."""
+    global _sync_client
+    if _sync_client is None:
+        with _client_lock:
+            if _sync_client is None:
+                _sync_client = httpx.Client(**_client_kwargs(False))  # type: ignore[arg-type]
+    return _sync_client
+
+
+def get_async_client() -> Optional[httpx.AsyncClient]:
+    """Return the shared async client if it belongs to the running event loop.
+
+    An AsyncClient is bound to the loop it was created on; callers running on another loop
+    (e.g. a worker thread with its own loop) get None and fall back to a short-lived client.
+    """
+    global _async_client, _async_loop
+    loop = asyncio.get_running_loop()
+    if _async_client is None:
+        _async_client = httpx.AsyncClient(**_client_kwargs(True))  # type: ignore[arg-type]
+        _async_loop = loop
+    if _async_loop is not loop:
+        return None
+    return _async_client
+
+
+async def init_http_clients() -> None:
+    get_sync_client()
+    get_async_client()
+    logger.info(
+        f"[http] pools ready max_connections={settings.http_max_connections} "
+        f"keepalive={settings.http_max_keepalive_connections} per_host={settings.http_max_per_host} "
+        f"http2={_http2_enabled()} dns_ttl={settings.http_dns_cache_ttl_seconds}s"
+    )
+
+
+async def close_http_clients() -> None:
+    global _sync_client, _async_client, _async_loop
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
+        _async_loop = None
+    if _sync_client is not None:
+        _sync_client.close()
+        _sync_client = None
+    _async_host_locks.clear()
+    get_host_scheduler().clear()
+    _dns_cache.clear()
+    logger.info("[http] pools closed")
+
+
+@contextmanager
+def _host_slot(url: str) -> Iterator[None]:
+    host = urlparse(url).netloc
+    with _client_lock:
+        sem = _host_locks.get(host)
+        if sem is None:
+            sem = _host_locks[host] = threading.BoundedSemaphore(settings.http_max_per_host)
+    with sem:
+        yield
+
+
+@asynccontextmanager
+async def _async_host_slot(url: str) -> AsyncIterator[None]:
+    host = urlparse(url).netloc
+    sem = _async_host_locks.get(host)
+    if sem is None:
+        sem = _async_host_locks[host] = asyncio.Semaphore(settings.http_max_per_host)
+    async with sem:
+        yield
+
+
+def get_host_scheduler() -> HostScheduler:
+    global _scheduler
+    if _scheduler is None:
+        with _client_lock:
+            if _scheduler is None:
+                _scheduler = HostScheduler(
+                    rate=settings.http_host_rate,
+                    burst=settings.http_host_burst,
+                    failure_threshold=settings.http_circuit_failures,
+                    open_seconds=settings.http_circuit_open_seconds,
+                    max_wait=settings.fetch_retry_max_wait_seconds,
+                    robots_ttl=settings.robots_cache_ttl_seconds,
+                )
+    return _scheduler
+
+
+def host_stats() -> Dict[str, object]:
+    return get_host_scheduler().stats()
+
+
+class UnsupportedContentError(Exception):
+    """Raised before the body is read when the response is not a document we can parse (PDF, images, archives...)."""
+
+    def __init__(self, url: str, content_type: str) -> None:
+        super().__init__(f"Unsupported content-type '{content_type}' for {url}")
+        self.url = url
+        self.content_type = content_type
+
+
+class FetchBudgetExceeded(Exception):
+    """Raised mid-download when the fetch budget of the current context is used up or cancelled."""
+
+
+class FetchBudget:
+    """Byte allowance shared by a group of fetches (e.g. one request's speculative prefetches).
+
+    Fetches running in a context with a budget charge every chunk they read against it and abort with
+    FetchBudgetExceeded once it is exhausted or cancelled.
+    """
+
+    def __init__(self, max_bytes: Optional[int] = None) -> None:
+        self.max_bytes = max_bytes
+        self.used = 0
+        self.cancelled = False
+        self._lock = threading.Lock()
+
+    def charge(self, n: int) -> None:
+        with self._lock:
+            self.used += n
+        if self.exhausted:
+            raise FetchBudgetExceeded(f"fetch budget exhausted ({self.used} bytes)" if not self.cancelled else "fetch cancelled")
+
+    def cancel(self) -> None:
+        self.cancelled = True
+
+    @property
+    def exhausted(self) -> bool:
+        return self.cancelled or (self.max_bytes is not None and self.used >= self.max_bytes)
+
+
+_budget: ContextVar[Optional[FetchBudget]] = ContextVar("fetch_budget", default=None)
+
+
+@contextmanager
+def fetch_budget_scope(budget: Optional[FetchBudget]) -> Iterator[Optional[FetchBudget]]:
+    token = _budget.set(budget)
+    try:
+        yield budget
+    finally:
+        _budget.reset(token)
+
+
+def _check_budget() -> Optional[FetchBudget]:
+    budget = _budget.get()
+    if budget is not None and budget.exhausted:
+        raise FetchBudgetExceeded("fetch budget exhausted" if not budget.cancelled else "fetch cancelled")
+    return budget
+
+
+class FetchResult(NamedTuple):
+    url: str
+    status_code: int
+    text: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    content_type: Optional[str] = None
+    truncated: bool = False
+    # Freshness headers, for the page cache
+    cache_control: Optional[str] = None
+    expires: Optional[str] = None
+    date: Optional[str] = None
+
+    @property
+    def not_modified(self) -> bool:
+        return self.status_code == 304
+
+
+TEXT_CONTENT_TYPES = ("text/html", "application/xhtml+xml", "text/plain", "text/xml", "application/xml")
+_BODY_END = b"</body"
+_META_CHARSET = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?\s*([a-zA-Z0-9_\-]+)""", re.IGNORECASE)
+
+
+class _BodyReader:
+    """Accumulates a streamed body up to FETCH_MAX_BYTES and stops early once the closing body tag arrives."""
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self.buffer = bytearray()
+        self.truncated = False
+
+    def feed(self, chunk: bytes) -> bool:
+        """Append a chunk; return False once reading should stop."""
+        room = self.max_bytes - len(self.buffer)
+        if len(chunk) > room:
+            self.buffer += chunk[:room]
+            self.truncated = True
+            return False
+        tail_start = max(0, len(self.buffer) - len(_BODY_END))
+        self.buffer += chunk
+        return _BODY_END not in self.buffer[tail_start:].lower()
+
+    def text(self, resp: httpx.Response) -> str:
+        encoding = resp.charset_encoding
+        if not encoding:
+            match = _META_CHARSET.search(self.buffer[:4096])
+            encoding = match.group(1).decode("ascii") if match else "utf-8"
+        try:
+            return self.buffer.decode(encoding, errors="replace")
+        except LookupError:
+            return self.buffer.decode("utf-8", errors="replace")
+
+
+def _content_type(url: str, resp: httpx.Response) -> Optional[str]:
+    content_type = resp.headers.get("content-type", "").split(";")[0].strip().lower() or None
+    if content_type and content_type not in TEXT_CONTENT_TYPES:
+        raise UnsupportedContentError(url, content_type)
+    return content_type
+
+
+def _result(url: str, resp: httpx.Response, reader: Optional[_BodyReader], content_type: Optional[str]) -> FetchResult:
+    etag, last_modified = resp.headers.get("etag"), resp.headers.get("last-modified")
+    freshness = {"cache_control": resp.headers.get("cache-control"), "expires": resp.headers.get("expires"), "date": resp.headers.get("date")}
+    if reader is None:
+        return FetchResult(url, 304, "", etag, last_modified, **freshness)
+    if reader.truncated:
+        logger.info(f"[fetch] truncated at {reader.max_bytes} bytes url={url}")
+    return FetchResult(str(resp.url), resp.status_code, reader.text(resp), etag, last_modified, content_type, reader.truncated, **freshness)
+
+
+class _FetchObservation:
+    status: object = "error"
+    bytes = 0
+
+
+@contextmanager
+def _observe(url: str) -> Iterator[_FetchObservation]:
+    """Record latency, bytes read and status (or "error") for one fetch, labelled by host."""
+    observation = _FetchObservation()
+    started = time.perf_counter()
+    try:
+        yield observation
+    finally:
+        host = metrics.host_label(urlparse(url).netloc)
+        metrics.FETCH_LATENCY.labels(host=host).observe(time.perf_counter() - started)
+        metrics.FETCH_RESPONSES.labels(host=host, status=str(observation.status)).inc()
+        if observation.bytes:
+            metrics.FETCH_BYTES.labels(host=host).observe(observation.bytes)
+
+
+async def _read_async(url: str, client: httpx.AsyncClient, timeout: float, headers: Optional[Dict[str, str]]) -> FetchResult:
+    budget = _check_budget()
+    timeout = timeout_for(timeout)
+    with _observe(url) as observe:
+        async with client.stream("GET", url, timeout=timeout, headers=headers) as resp:
+            observe.status = resp.status_code
+            if resp.status_code == 304:
+                return _result(url, resp, None, None)
+            resp.raise_for_status()
+            content_type = _content_type(url, resp)
+            reader = _BodyReader(settings.fetch_max_bytes)
+            async for chunk in resp.aiter_bytes():
+                if budget is not None:
+                    budget.charge(len(chunk))
+                if not reader.feed(chunk):
+                    break
+            observe.bytes = len(reader.buffer)
+            return _result(url, resp, reader, content_type)
+
+
+def _read_sync(url: str, client: httpx.Client, timeout: float, headers: Optional[Dict[str, str]]) -> FetchResult:
+    budget = _check_budget()
+    timeout = timeout_for(timeout)
+    with _observe(url) as observe:
+        with client.stream("GET", url, timeout=timeout, headers=headers) as resp:
+            observe.status = resp.status_code
+            if resp.status_code == 304:
+                return _result(url, resp, None, None)
+            resp.raise_for_status()
+            content_type = _content_type(url, resp)
+            reader = _BodyReader(settings.fetch_max_bytes)
+            for chunk in resp.iter_bytes():
+                if budget is not None:
+                    budget.charge(len(chunk))
+                if not reader.feed(chunk):
+                    break
+            observe.bytes = len(reader.buffer)
+            return _result(url, resp, reader, content_type)
+
+
+def _retry_after(error: BaseException) -> Optional[float]:
+    if isinstance(error, httpx.HTTPStatusError) and error.response.status_code in (429, 503):
+        return parse_retry_after(error.response.headers.get("retry-after"))
+    return None
+
+
+def _retryable(error: BaseException) -> bool:
+    """429/5xx responses (unless Retry-After asks for more than we wait) and failed connects; timeouts are not
+    retried, a host that does not answer in REQUEST_TIMEOUT_SECONDS is left to the circuit breaker."""
+    if isinstance(error, httpx.HTTPStatusError):
+        retry_after = _retry_after(error)
+        return error.response.status_code in RETRY_STATUSES and (retry_after is None or retry_after <= settings.fetch_retry_max_wait_seconds)
+    return isinstance(error, httpx.ConnectError)
+
+
+_backoff = wait_random_exponential(multiplier=settings.fetch_retry_backoff_seconds, max=settings.fetch_retry_max_wait_seconds)
+
+
+def _wait(state: RetryCallState) -> float:
+    error = state.outcome.exception() if state.outcome is not None else None
+    retry_after = _retry_after(error) if error is not None else None
+    return retry_after if retry_after is not None else _backoff(state)
+
+
+def _before_retry(url: str) -> Callable[[RetryCallState], None]:
+    host = urlparse(url).netloc
+
+    def before_sleep(state: RetryCallState) -> None:
+        error = state.outcome.exception() if state.outcome is not None else None
+        reason = str(error.response.status_code) if isinstance(error, httpx.HTTPStatusError) else type(error).__name__
+        wait = state.next_action.sleep if state.next_action is not None else 0.0
+        get_host_scheduler().record_retry(host)
+        metrics.FETCH_RETRIES.labels(host=metrics.host_label(host), reason=reason).inc()
+        logger.info(f"[fetch] retry {state.attempt_number}/{settings.fetch_retry_attempts} in {wait:.2f}s reason={reason} url={url}")
+
+    return before_sleep
+
+
+def _deadline_passed() -> bool:
+    budget = current_budget()
+    remaining = budget.remaining() if budget is not None else None
+    return remaining is not None and remaining <= 0
+
+
+def _past_deadline(state: RetryCallState) -> bool:
+    """Stop retrying once the research run this fetch belongs to has no time left."""
+    return _deadline_passed()
+
+
+def _retry_kwargs(url: str) -> Dict[str, object]:
+    return {
+        "stop": stop_after_attempt(max(1, settings.fetch_retry_attempts)) | _past_deadline,
+        "wait": _wait,
+        "retry": retry_if_exception(_retryable),
+        "before_sleep": _before_retry(url),
+        "reraise": True,
+    }
+
+
+@contextmanager
+def _track(host: str) -> Iterator[None]:
+    """Feed the outcome of one attempt to the host's circuit breaker.
+
+    Only what the host did counts as a failure (timeouts, refused connections); errors on our side, such as an
+    exhausted connection pool, cancellation or our own deadline, just end the attempt.
+    """
+    scheduler = get_host_scheduler()
+    try:
+        yield
+    except httpx.TimeoutException as e:
+        if _deadline_passed():
+            # Our own deadline cut the request short; that says nothing about the host
+            scheduler.release(host)
+            raise BudgetExhausted("deadline") from e
+        if isinstance(e, httpx.PoolTimeout):
+            # No free connection in our own pool: the request never reached the host
+            scheduler.release(host)
+            raise
+        if scheduler.record_failure(host):
+            logger.warning(f"[fetch] circuit open host={host} for {settings.http_circuit_open_seconds}s")
+        raise
+    except httpx.ConnectError:
+        if scheduler.record_failure(host):
+            logger.warning(f"[fetch] circuit open host={host} for {settings.http_circuit_open_seconds}s")
+        raise
+    except httpx.HTTPStatusError as e:
+        scheduler.record_success(host)
+        retry_after = _retry_after(e)
+        if retry_after:
+            # Everyone else fetching from this host waits too (or fails fast when that is longer than we wait)
+            scheduler.cool_down(host, retry_after)
+        raise
+    except UnsupportedContentError:
+        scheduler.record_success(host)
+        raise
+    except BaseException:
+        scheduler.release(host)
+        raise
+    else:
+        scheduler.record_success(host)
+
+
+def _reserve(host: str) -> float:
+    try:
+        return get_host_scheduler().reserve(host)
+    except HostUnavailableError as e:
+        metrics.FETCH_REJECTED.labels(reason=e.reason).inc()
+        logger.info(f"[fetch] fail fast: {e}")
+        raise
+
+
+def _robots_parser(robots_url: str, status: Optional[int], text: str) -> RobotFileParser:
+    """Same rules as RobotFileParser.read(): 401/403 disallow everything, other errors (and no answer) allow everything."""
+    robots = RobotFileParser(robots_url)
+    if status in (401, 403):
+        robots.disallow_all = True
+    elif status is None or status >= 400:
+        robots.allow_all = True
+    else:
+        robots.parse(text.splitlines())
+    robots.modified()
+    return robots
+
+
+def _load_robots_sync(scheme: str, host: str) -> RobotFileParser:
+    robots_url = f"{scheme}://{host}/robots.txt"
+    status, text = None, ""
+    try:
+        resp = get_sync_client().get(robots_url, timeout=timeout_for(min(ROBOTS_TIMEOUT_SECONDS, settings.request_timeout_seconds)))
+        status, text = resp.status_code, resp.text
+    except httpx.HTTPError as e:
+        logger.info(f"[fetch] robots.txt unavailable host={host}: {type(e).__name__}")
+    robots = _robots_parser(robots_url, status, text)
+    get_host_scheduler().set_robots(host, robots)
+    return robots
+
+
+async def _load_robots(scheme: str, host: str) -> RobotFileParser:
+    client = get_async_client()
+    if client is None:
+        return await asyncio.to_thread(_load_robots_sync, scheme, host)
+    robots_url = f"{scheme}://{host}/robots.txt"
+    status, text = None, ""
+    try:
+        resp = await client.get(robots_url, timeout=timeout_for(min(ROBOTS_TIMEOUT_SECONDS, settings.request_timeout_seconds)))
+        status, text = resp.status_code, resp.text
+    except httpx.HTTPError as e:
+        logger.info(f"[fetch] robots.txt unavailable host={host}: {type(e).__name__}")
+    robots = _robots_parser(robots_url, status, text)
+    get_host_scheduler().set_robots(host, robots)
+    return robots
+
+
+def _disallowed(url: str, robots: RobotFileParser) -> None:
+    if not robots.can_fetch(settings.user_agent, url):
+        metrics.FETCH_REJECTED.labels(reason="robots").inc()
+        raise RobotsDisallowedError(url)
+
+
+def _check_robots_sync(url: str) -> None:
+    if not settings.fetch_respect_robots:
+        return
+    parsed = urlparse(url)
+    robots = get_host_scheduler().robots(parsed.netloc) or _robots_flight.do(parsed.netloc, _load_robots_sync, parsed.scheme, parsed.netloc)
+    _disallowed(url, robots)
+
+
+async def _check_robots(url: str) -> None:
+    if not settings.fetch_respect_robots:
+        return
+    parsed = urlparse(url)
+    robots = get_host_scheduler().robots(parsed.netloc) or await _robots_flight.do_async(parsed.netloc, _load_robots, parsed.scheme, parsed.netloc)
+    _disallowed(url, robots)
+
+
+async def _attempt_async(url: str, client: httpx.AsyncClient, timeout: float, headers: Optional[Dict[str, str]], shared: bool) -> FetchResult:
+    host = urlparse(url).netloc
+    delay = _reserve(host)
+    with _track(host):
+        if delay:
+            await asyncio.sleep(delay)
+        if not shared:
+            return await _read_async(url, client, timeout, headers)
+        async with _async_host_slot(url):
+            return await _read_async(url, client, timeout, headers)
+
+
+def _attempt_sync(url: str, client: httpx.Client, timeout: float, headers: Optional[Dict[str, str]]) -> FetchResult:
+    host = urlparse(url).netloc
+    delay = _reserve(host)
+    with _track(host):
+        if delay:
+            time.sleep(delay)
+        with _host_slot(url):
+            return _read_sync(url, client, timeout, headers)
+
+
+async def fetch(url: str, timeout: Optional[int] = None, headers: Optional[Dict[str, str]] = None) -> FetchResult:
+    """Stream a URL on the shared async pool, checking Content-Type up front and capping the body at FETCH_MAX_BYTES.
+
+    Conditional request headers may yield a 304 result with empty text. The host scheduler paces requests per
+    host and fails fast for unavailable hosts; 429/5xx and connect errors are retried with jittered backoff
+    (or after Retry-After). Raises RobotsDisallowedError for URLs the site's robots.txt disallows. Inside a
+    research run with a deadline, timeouts shrink to the time the run has left (BudgetExhausted when none is).
+    """
     timeout_seconds = timeout or settings.request_timeout_seconds
-    headers = {"User-Agent": settings.user_agent}
-    async with httpx.AsyncClient(timeout=timeout_seconds, headers=headers, follow_redirects=True) as client:
-        resp = await client.get(url)
-        resp.raise_for_status()
-        return resp.text
+    await _check_robots(url)
+    client = get_async_client()
+    if client is None:
+        async with httpx.AsyncClient(**_client_kwargs(True)) as own:  # type: ignore[arg-type]
+            return await AsyncRetrying(**_retry_kwargs(url))(_attempt_async, url, own, timeout_seconds, headers, False)  # type: ignore[arg-type]
+    return await AsyncRetrying(**_retry_kwargs(url))(_attempt_async, url, client, timeout_seconds, headers, True)  # type: ignore[arg-type]
 
 
-def fetch_text_sync(url: str, timeout: Optional[int] = None) -> str:
+def fetch_sync(url: str, timeout: Optional[int] = None, headers: Optional[Dict[str, str]] = None) -> FetchResult:
     timeout_seconds = timeout or settings.request_timeout_seconds
-    headers = {"User-Agent": settings.user_agent}
-    with httpx.Client(timeout=timeout_seconds, headers=headers, follow_redirects=True) as client:
-        resp = client.get(url)
-        resp.raise_for_status()
-        return resp.text
+    _check_robots_sync(url)
+    return Retrying(**_retry_kwargs(url))(_attempt_sync, url, get_sync_client(), timeout_seconds, headers)  # type: ignore[arg-type]
+
+
+async def fetch_text(url: str, timeout: Optional[int] = None) -> str:
+    return (await fetch(url, timeout)).text
+
+
+def fetch_text_sync(url: str, timeout: Optional[int] = None) -> str:
+    return fetch_sync(url, timeout).text
@@ -0,0 +1,204 @@
+from typing import Any, Dict, Optional
+from email.utils import parsedate_to_datetime
+from urllib.robotparser import RobotFileParser
+import threading
+import time
+
+
+class HostUnavailableError(Exception):
+    """Raised without touching the network while a host's circuit is open after repeated timeouts or connect
+    errors, or while it has asked us (Retry-After) to stay away for longer than we are willing to wait."""
+
+    def __init__(self, host: str, reason: str, retry_in: float) -> None:
+        super().__init__(f"host {host} is unavailable ({reason}, retry in {retry_in:.0f}s)")
+        self.host = host
+        self.reason = reason
+        self.retry_in = retry_in
+
+
+class RobotsDisallowedError(Exception):
+    """Raised before fetching a URL that the site's robots.txt disallows for our user agent."""
+
+    def __init__(self, url: str) -> None:
+        super().__init__(f"disallowed by robots.txt: {url}")
+        self.url = url
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date), or None when absent or invalid."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class _Host:
+    """Politeness state of one host: token bucket, Retry-After cooldown, circuit breaker and cached robots.txt."""
+
+    __slots__ = ("tokens", "updated", "cooldown_until", "failures", "open_until", "probing",
+                 "requests", "retries", "rejected", "robots", "robots_fetched")
+
+    def __init__(self, burst: float, now: float) -> None:
+        self.tokens = burst
+        self.updated = now
+        self.cooldown_until = 0.0
+        self.failures = 0
+        self.open_until = 0.0
+        self.probing = False
+        self.requests = 0
+        self.retries = 0
+        self.rejected = 0
+        self.robots: Optional[RobotFileParser] = None
+        self.robots_fetched = 0.0
+
+
+class HostScheduler:
+    """Process-wide per-host admission for outbound fetches.
+
+    - Token bucket: at most `rate` requests per second per host with bursts of `burst` (rate 0 disables it).
+      reserve() hands out the delay a caller must sleep before sending, so threads and coroutines can share it.
+    - Cooldown: a 429/503 Retry-After pushes every later request to that host past the given time; requests
+      that would have to wait longer than `max_wait` fail fast with HostUnavailableError instead.
+    - Circuit breaker: after `failure_threshold` consecutive timeouts or connect errors the host fails fast
+      with HostUnavailableError for `open_seconds`; then a single probe request decides whether it closes again.
+    - robots.txt: parsed files are cached per host for `robots_ttl` seconds (fetching them is the caller's job).
+    """
+
+    def __init__(self, rate: float, burst: int, failure_threshold: int, open_seconds: float, max_wait: float,
+                 robots_ttl: float, max_hosts: int = 4096) -> None:
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.max_wait = max_wait
+        self.robots_ttl = robots_ttl
+        self.max_hosts = max_hosts
+        self._hosts: Dict[str, _Host] = {}
+        self._lock = threading.Lock()
+
+    def _host(self, host: str, now: float) -> _Host:
+        state = self._hosts.get(host)
+        if state is None:
+            if len(self._hosts) >= self.max_hosts:
+                self._evict(now)
+            state = self._hosts[host] = _Host(self.burst, now)
+        return state
+
+    def _evict(self, now: float) -> None:
+        idle = [h for h, s in self._hosts.items() if s.open_until <= now and s.cooldown_until <= now and not s.probing]
+        for h in idle[: max(1, len(idle) // 2)]:
+            del self._hosts[h]
+
+    def reserve(self, host: str) -> float:
+        """Take a slot for one request to `host` and return how many seconds to wait before sending it.
+
+        Raises HostUnavailableError while the host's circuit is open or its cooldown exceeds `max_wait`.
+        """
+        now = time.monotonic()
+        with self._lock:
+            state = self._host(host, now)
+            if state.failures >= self.failure_threshold:
+                if now < state.open_until or state.probing:
+                    state.rejected += 1
+                    raise HostUnavailableError(host, "circuit open", max(0.0, state.open_until - now))
+                state.probing = True
+            delay = max(0.0, state.cooldown_until - now)
+            if delay > self.max_wait:
+                state.rejected += 1
+                state.probing = False
+                raise HostUnavailableError(host, "rate limited", delay)
+            state.requests += 1
+            if self.rate > 0:
+                state.tokens = min(float(self.burst), state.tokens + (now - state.updated) * self.rate)
+                state.updated = now
+                state.tokens -= 1
+                if state.tokens < 0:
+                    delay = max(delay, -state.tokens / self.rate)
+            return delay
+
+    def cool_down(self, host: str, seconds: float) -> None:
+        with self._lock:
+            state = self._host(host, time.monotonic())
+            state.cooldown_until = max(state.cooldown_until, time.monotonic() + seconds)
+
+    def record_retry(self, host: str) -> None:
+        with self._lock:
+            self._host(host, time.monotonic()).retries += 1
+
+    def record_success(self, host: str) -> None:
+        with self._lock:
+            state = self._hosts.get(host)
+            if state is not None:
+                state.failures = 0
+                state.probing = False
+
+    def release(self, host: str) -> None:
+        """End a request that neither reached the host nor failed to connect (e.g. cancelled before sending)."""
+        with self._lock:
+            state = self._hosts.get(host)
+            if state is not None:
+                state.probing = False
+
+    def record_failure(self, host: str) -> bool:
+        """Count a timeout or connect error; return True when this opens (or re-opens) the circuit."""
+        now = time.monotonic()
+        with self._lock:
+            state = self._host(host, now)
+            state.failures += 1
+            state.probing = False
+            if state.failures >= self.failure_threshold:
+                state.open_until = now + self.open_seconds
+                return True
+            return False
+
+    def robots(self, host: str) -> Optional[RobotFileParser]:
+        """The cached robots.txt of `host`, or None when it has not been fetched yet or has expired."""
+        with self._lock:
+            state = self._hosts.get(host)
+            if state is None or state.robots is None or time.monotonic() - state.robots_fetched > self.robots_ttl:
+                return None
+            return state.robots
+
+    def set_robots(self, host: str, robots: RobotFileParser) -> None:
+        now = time.monotonic()
+        with self._lock:
+            state = self._host(host, now)
+            state.robots = robots
+            state.robots_fetched = now
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            hosts = {
+                host: {
+                    "tokens": round(min(float(self.burst), s.tokens + (now - s.updated) * self.rate), 2) if self.rate > 0 else None,
+                    "cooldown_seconds": round(max(0.0, s.cooldown_until - now), 2),
+                    "circuit": "closed" if s.failures < self.failure_threshold else ("half-open" if now >= s.open_until else "open"),
+                    "consecutive_failures": s.failures,
+                    "requests": s.requests,
+                    "retries": s.retries,
+                    "rejected": s.rejected,
+                    "robots_cached": s.robots is not None and now - s.robots_fetched <= self.robots_ttl,
+                }
+                for host, s in self._hosts.items()
+            }
+        return {
+            "rate_per_second": self.rate,
+            "burst": self.burst,
+            "failure_threshold": self.failure_threshold,
+            "open_seconds": self.open_seconds,
+            "max_wait_seconds": self.max_wait,
+            "hosts": hosts,
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._hosts.clear()
+
+
+__all__ = ["HostScheduler", "HostUnavailableError", "RobotsDisallowedError", "parse_retry_after"]
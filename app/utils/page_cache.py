@@ -0,0 +1,185 @@
+from typing import Any, Dict, NamedTuple, Optional
+from email.utils import parsedate_to_datetime
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import orjson
+from ..config import settings
+from ..logging import logger
+from .urls import normalize_url
+
+
+class CachePolicy(NamedTuple):
+    store: bool
+    # Seconds the origin lets the page be reused without revalidation; None when it sets no limit
+    max_age: Optional[float] = None
+
+
+def _http_date(value: Optional[str]) -> Optional[float]:
+    try:
+        return parsedate_to_datetime(value).timestamp() if value else None
+    except (TypeError, ValueError):
+        return None
+
+
+def cache_policy(cache_control: Optional[str], expires: Optional[str] = None, date: Optional[str] = None) -> CachePolicy:
+    """How a response may be cached, from its Cache-Control, Expires and Date headers (RFC 9111).
+
+    `no-store` and `private` responses are not stored. `no-cache` ones are stored but revalidated on every use
+    (max_age 0). Otherwise `s-maxage`, `max-age` or `Expires` (relative to `Date`) caps the entry's lifetime.
+    """
+    directives: Dict[str, Optional[str]] = {}
+    for part in (cache_control or "").split(","):
+        name, _, value = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = value.strip().strip('"') or None
+    if "no-store" in directives or "private" in directives:
+        return CachePolicy(False)
+    if "no-cache" in directives:
+        return CachePolicy(True, 0.0)
+    for name in ("s-maxage", "max-age"):
+        if name in directives:
+            value = directives[name] or ""
+            # An invalid lifetime makes the response stale straight away
+            return CachePolicy(True, float(value) if value.isdigit() else 0.0)
+    if expires is not None:
+        expires_at = _http_date(expires)
+        now = _http_date(date) or time.time()
+        return CachePolicy(True, max(0.0, expires_at - now) if expires_at is not None else 0.0)
+    return CachePolicy(True)
+
+
+class CachedPage(NamedTuple):
+    page: Dict[str, Any]
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fetched_at: float
+    max_age: Optional[float] = None
+
+    def age(self) -> float:
+        return time.time() - self.fetched_at
+
+    def conditional_headers(self) -> Dict[str, str]:
+        headers: Dict[str, str] = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class PageCache:
+    """Disk-backed page cache keyed by normalized URL.
+
+    A SQLite table holds the parsed page, validators and access times; raw bodies are not kept, since a
+    304 revalidation reuses the parsed page. The least recently used entries are evicted once the pages'
+    total size exceeds `max_bytes`. An entry is fresh for as long as the origin's Cache-Control/Expires said
+    (see cache_policy()); when they set no lifetime it is fresh for `ttl_seconds`, which is 0 by default so
+    such pages are revalidated with their ETag/Last-Modified on every use.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, ttl_seconds: float) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._local = threading.local()
+        os.makedirs(directory, exist_ok=True)
+        with self._conn() as conn:
+            # Caches from before raw bodies were dropped: start them over rather than migrate
+            if "body_hash" in {row[1] for row in conn.execute("PRAGMA table_info(pages)")}:
+                conn.execute("DROP TABLE pages")
+                shutil.rmtree(os.path.join(directory, "bodies"), ignore_errors=True)
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS pages (url TEXT PRIMARY KEY, page BLOB NOT NULL, etag TEXT, last_modified TEXT, "
+                "size INTEGER NOT NULL, fetched_at REAL NOT NULL, accessed_at REAL NOT NULL, max_age REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS pages_accessed ON pages (accessed_at)")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(os.path.join(self.directory, "index.sqlite3"), timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def is_fresh(self, entry: CachedPage) -> bool:
+        return entry.age() <= (self.ttl_seconds if entry.max_age is None else entry.max_age)
+
+    def get(self, url: str) -> Optional[CachedPage]:
+        key = normalize_url(url)
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT page, etag, last_modified, fetched_at, max_age FROM pages WHERE url = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        with conn:
+            conn.execute("UPDATE pages SET accessed_at = ? WHERE url = ?", (time.time(), key))
+        return CachedPage(orjson.loads(row[0]), row[1], row[2], row[3], row[4])
+
+    def put(self, url: str, page: Dict[str, Any], etag: Optional[str], last_modified: Optional[str],
+            max_age: Optional[float] = None) -> None:
+        blob = orjson.dumps(page)
+        now = time.time()
+        with self._conn() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO pages (url, page, etag, last_modified, size, fetched_at, accessed_at, max_age) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (normalize_url(url), blob, etag, last_modified, len(blob), now, now, max_age),
+            )
+        self._evict()
+
+    def touch(self, url: str, etag: Optional[str], last_modified: Optional[str], max_age: Optional[float] = None) -> None:
+        """Mark an entry fresh again after a 304 revalidation, keeping validators and lifetime the server did not resend."""
+        with self._conn() as conn:
+            conn.execute(
+                "UPDATE pages SET fetched_at = ?, accessed_at = ?, etag = COALESCE(?, etag), "
+                "last_modified = COALESCE(?, last_modified), max_age = COALESCE(?, max_age) WHERE url = ?",
+                (time.time(), time.time(), etag, last_modified, max_age, normalize_url(url)),
+            )
+
+    def delete(self, url: str) -> None:
+        with self._conn() as conn:
+            conn.execute("DELETE FROM pages WHERE url = ?", (normalize_url(url),))
+
+    def _evict(self) -> None:
+        conn = self._conn()
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+        evicted = 0
+        while total > self.max_bytes:
+            victim = conn.execute("SELECT url, size FROM pages ORDER BY accessed_at LIMIT 1").fetchone()
+            if victim is None:
+                break
+            with conn:
+                conn.execute("DELETE FROM pages WHERE url = ?", (victim[0],))
+            total -= victim[1]
+            evicted += 1
+        if evicted:
+            logger.info(f"[fetch] cache: evicted={evicted} size={total}")
+
+    def stats(self) -> Dict[str, Any]:
+        count, total = self._conn().execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM pages").fetchone()
+        return {"entries": count, "bytes": total, "max_bytes": self.max_bytes, "directory": self.directory}
+
+
+_page_cache: Optional[PageCache] = None
+_page_cache_lock = threading.Lock()
+
+
+def get_page_cache() -> Optional[PageCache]:
+    """Process-wide page cache, or None when PAGE_CACHE_ENABLED is off."""
+    global _page_cache
+    if not settings.page_cache_enabled:
+        return None
+    if _page_cache is None:
+        with _page_cache_lock:
+            if _page_cache is None:
+                _page_cache = PageCache(settings.page_cache_dir, settings.page_cache_max_bytes, settings.page_cache_ttl_seconds)
+    return _page_cache
+
+
+__all__ = ["CachePolicy", "CachedPage", "PageCache", "cache_policy", "get_page_cache"]
@@ -1,41 +1,135 @@
-from bs4 import BeautifulSoup
+from lxml import html as lxml_html
+from lxml.etree import ParserError, XMLSyntaxError
 from readability import Document
-from typing import List, Tuple, Dict, Any
+from readability.htmls import shorten_title
+from typing import List, Tuple, Dict, Any, Optional
+import time
 from urllib.parse import urljoin, urlparse
+from ..observability import metrics
 
 
-def extract_main_content(html: str) -> Tuple[str, Dict[str, Any]]:
-    doc = Document(html)
-    title = doc.short_title() or None
-    summary_html = doc.summary(html_partial=True)
-    soup = BeautifulSoup(summary_html, "lxml")
-    text = soup.get_text("\n")
-    return text, {"title": title}
+HEADING_TAGS = ("h1", "h2", "h3", "h4", "h5", "h6")
+MAX_LINKS = 5
 
 
-def extract_links(html: str, base_url: str) -> List[str]:
-    soup = BeautifulSoup(html, "lxml")
+def _build_tree(html: str) -> Optional[lxml_html.HtmlElement]:
+    """The page's element tree, or None when lxml finds no document in it (e.g. only whitespace or an XML
+    declaration)."""
+    try:
+        try:
+            return lxml_html.document_fromstring(html)
+        except ValueError:
+            # Unicode strings with an XML encoding declaration must be handed to lxml as bytes
+            return lxml_html.document_fromstring(html.encode("utf-8"))
+    except (ParserError, XMLSyntaxError, ValueError):
+        return None
+
+
+def _text(el: lxml_html.HtmlElement) -> str:
+    return "\n".join(el.itertext())
+
+
+def _description(tree: lxml_html.HtmlElement) -> Optional[str]:
+    for xpath in ('//meta[@name="description"]/@content', '//meta[@property="og:description"]/@content'):
+        values = tree.xpath(xpath)
+        if values and values[0].strip():
+            return values[0].strip()
+    return None
+
+
+def _links(tree: lxml_html.HtmlElement, base_url: str) -> List[str]:
     base_host = urlparse(base_url).netloc
     unique: List[str] = []
-
-    def _add(h: str) -> None:
-        absolute = urljoin(base_url, h)
-        host = urlparse(absolute).netloc
-        if host != base_host:
-            return
+    for href in tree.xpath("//a/@href"):
+        href = href.strip()
+        if not href or href.startswith("#") or href.startswith("javascript:"):
+            continue
+        absolute = urljoin(base_url, href)
+        if urlparse(absolute).netloc != base_host:
+            continue
         if absolute not in unique:
             unique.append(absolute)
+            if len(unique) >= MAX_LINKS:
+                break
+    return unique
+
+
+def _sections(root: lxml_html.HtmlElement) -> List[Dict[str, Any]]:
+    """Split extracted content into sections at each heading, keeping the text between headings."""
+    sections: List[Dict[str, Any]] = []
+    heading: Optional[str] = None
+    parts: List[str] = []
 
-    for a in soup.find_all("a", href=True):
-        href = a.get("href")
-        if not href:
+    def flush() -> None:
+        content = "\n".join(p for p in parts if p)
+        if content or heading:
+            sections.append({"heading": heading, "content": content})
+
+    for el in root.iter():
+        if not isinstance(el.tag, str):
             continue
-        if href.startswith("#"):
+        if el.tag in HEADING_TAGS:
+            flush()
+            heading = " ".join(_text(el).split()) or None
+            parts = []
+            if el.tail and el.tail.strip():
+                parts.append(el.tail.strip())
             continue
-        if href.startswith("javascript:"):
+        if any(True for _ in el.iterancestors(*HEADING_TAGS)):
+            if el.tail and el.tail.strip():
+                parts.append(el.tail.strip())
             continue
-        _add(href)
-        if len(unique) >= 5:
-            break
+        if el.text and el.text.strip():
+            parts.append(el.text.strip())
+        if el.tail and el.tail.strip():
+            parts.append(el.tail.strip())
+    flush()
+    return sections
+
+
+def parse_page(html: str, base_url: str) -> Dict[str, Any]:
+    """Parse HTML once with lxml and derive title, description, main content, sections and in-site links from that tree.
+
+    Title, description and links are read before Readability runs, and that order matters: Document drops
+    hidden (`hidden`, `display:none`) elements from the tree it is given before it makes its own copy.
+    """
+    started = time.thread_time()
+    try:
+        return _parse_page(html, base_url)
+    finally:
+        metrics.PARSE_CPU.observe(time.thread_time() - started)
+
+
+def _parse_page(html: str, base_url: str) -> Dict[str, Any]:
+    tree = _build_tree(html)
+    if tree is None:
+        return {"title": None, "description": None, "content_text": "", "sections": [], "links": []}
+    title = shorten_title(tree) or None
+    description = _description(tree)
+    links = _links(tree, base_url)
+    summary_html = Document(tree).summary(html_partial=True)
+    summary = lxml_html.fragment_fromstring(summary_html, create_parent="div") if summary_html.strip() else None
+    return {
+        "title": title,
+        "description": description,
+        "content_text": _text(summary) if summary is not None else "",
+        "sections": _sections(summary) if summary is not None else [],
+        "links": links,
+    }
+
+
+# extract_main_content() and extract_links() are this module's original API, kept for code outside the app
+# that imports them; the app itself calls parse_page(), which derives both from a single parse.
+def extract_main_content(html: str) -> Tuple[str, Dict[str, Any]]:
+    """Main text and title of a page; parse_page() without the links, sections and description."""
+    page = parse_page(html, "")
+    return page["content_text"], {"title": page["title"]}
+
+
+def extract_links(html: str, base_url: str) -> List[str]:
+    """In-site links of a page, resolved against `base_url`."""
+    tree = _build_tree(html)
+    return _links(tree, base_url) if tree is not None else []
+
 
-    return unique[:5]
+__all__ = ["parse_page", "extract_main_content", "extract_links"]
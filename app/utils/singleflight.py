@@ -0,0 +1,103 @@
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Tuple, Type, TypeVar
+from concurrent.futures import Future
+import asyncio
+import threading
+from ..observability import metrics
+from ..observability.tracing import trace_span
+
+
+T = TypeVar("T")
+
+
+class _LeaderGone(Exception):
+    """The leading call was cancelled or interrupted; waiting callers retry instead of failing."""
+
+
+class SingleFlight:
+    """Deduplicate concurrent calls by key: the first caller runs the work, later callers with the same key
+    wait for its result (or exception) instead of repeating it.
+
+    Works across worker threads and the event loop alike, since the in-flight result is a
+    concurrent.futures.Future. Nothing is kept once the leader finishes; results are shared, so callers
+    must treat them as read-only. Errors listed in `retry_on` are specific to the leader's context (e.g.
+    its own budget running out); waiters retry the call themselves instead of receiving them.
+    """
+
+    def __init__(self, name: str, retry_on: Tuple[Type[BaseException], ...] = ()) -> None:
+        self.name = name
+        self.retry_on = retry_on
+        self._calls: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self._leaders = 0
+        self._coalesced = 0
+        _flights.append(self)
+
+    def _claim(self, key: Hashable) -> Tuple[Future, bool]:
+        with self._lock:
+            fut = self._calls.get(key)
+            if fut is not None:
+                self._coalesced += 1
+                metrics.COALESCED.labels(flight=self.name).inc()
+                return fut, False
+            fut = self._calls[key] = Future()
+            self._leaders += 1
+            return fut, True
+
+    def _settle(self, key: Hashable, fut: Future, value: Any = None, error: BaseException | None = None) -> None:
+        with self._lock:
+            self._calls.pop(key, None)
+        if error is None:
+            fut.set_result(value)
+        elif isinstance(error, Exception) and not isinstance(error, self.retry_on):
+            fut.set_exception(error)
+        else:
+            fut.set_exception(_LeaderGone())
+
+    def do(self, key: Hashable, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        while True:
+            fut, leader = self._claim(key)
+            if leader:
+                try:
+                    value = fn(*args, **kwargs)
+                except BaseException as e:
+                    self._settle(key, fut, error=e)
+                    raise
+                self._settle(key, fut, value)
+                return value
+            try:
+                with trace_span(f"{self.name} (coalesced)", "coalesced"):
+                    return fut.result()
+            except _LeaderGone:
+                continue
+
+    async def do_async(self, key: Hashable, fn: Callable[..., Awaitable[T]], *args: Any, **kwargs: Any) -> T:
+        while True:
+            fut, leader = self._claim(key)
+            if leader:
+                try:
+                    value = await fn(*args, **kwargs)
+                except BaseException as e:
+                    self._settle(key, fut, error=e)
+                    raise
+                self._settle(key, fut, value)
+                return value
+            try:
+                with trace_span(f"{self.name} (coalesced)", "coalesced"):
+                    # shield: a waiter being cancelled must not cancel the shared call
+                    return await asyncio.shield(asyncio.wrap_future(fut))
+            except _LeaderGone:
+                continue
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"in_flight": len(self._calls), "leaders": self._leaders, "coalesced": self._coalesced}
+
+
+_flights: List[SingleFlight] = []
+
+
+def flight_stats() -> Dict[str, Dict[str, int]]:
+    return {f.name: f.stats() for f in _flights}
+
+
+__all__ = ["SingleFlight", "flight_stats"]
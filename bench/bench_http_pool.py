@@ -0,0 +1,70 @@
+"""Micro-benchmark: per-call httpx clients vs the shared pooled client on repeated same-host fetches.
+
+Usage: python -m bench.bench_http_pool [--requests 200]
+"""
+import argparse
+import asyncio
+import socket
+import threading
+import time
+import httpx
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from app.utils.fetch import fetch_text_sync, init_http_clients, close_http_clients
+
+
+BODY = b"<html><body>" + b"<p>hello</p>" * 200 + b"</body></html>"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    connections = 0
+
+    def setup(self) -> None:
+        super().setup()
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        type(self).connections += 1
+
+    def do_GET(self) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, *args: object) -> None:
+        pass
+
+
+def _fresh_client(url: str) -> str:
+    with httpx.Client(follow_redirects=True) as client:
+        return client.get(url).text
+
+
+def _run(label: str, fn, url: str, n: int) -> None:
+    _Handler.connections = 0
+    start = time.perf_counter()
+    for _ in range(n):
+        fn(url)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<14} requests={n} total={elapsed * 1000:8.1f}ms per_req={elapsed / n * 1000:6.2f}ms tcp_connections={_Handler.connections}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/page"
+    try:
+        asyncio.run(init_http_clients())
+        _run("fresh-client", _fresh_client, url, args.requests)
+        _run("shared-pool", fetch_text_sync, url, args.requests)
+    finally:
+        asyncio.run(close_http_clients())
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Benchmark HTML extraction on the fixture corpus: the previous three-parse pipeline vs `parse_page`.
+
+Reports CPU time per page and peak traced memory for each pipeline.
+Usage: python -m bench.bench_parse [--pages 40] [--rounds 3]
+"""
+import argparse
+import time
+import tracemalloc
+from typing import Any, Callable, Dict
+from bs4 import BeautifulSoup
+from readability import Document
+from app.utils.parse import parse_page
+from .corpus import build_corpus
+
+
+BASE = "http://corpus.local"
+
+
+def legacy_parse(html: str, base_url: str) -> Dict[str, Any]:
+    """Extraction as it was before parse_page: readability, BeautifulSoup over the summary, BeautifulSoup over the raw page."""
+    doc = Document(html)
+    title = doc.short_title() or None
+    text = BeautifulSoup(doc.summary(html_partial=True), "lxml").get_text("\n")
+    soup = BeautifulSoup(html, "lxml")
+    hrefs = [a.get("href") for a in soup.find_all("a", href=True)]
+    return {"title": title, "content_text": text, "links": hrefs}
+
+
+def _measure(label: str, fn: Callable[[str, str], Dict[str, Any]], corpus: Dict[str, str], rounds: int) -> Dict[str, float]:
+    cpu_start = time.process_time()
+    for _ in range(rounds):
+        for path, html in corpus.items():
+            fn(html, BASE + path)
+    cpu_per_page = (time.process_time() - cpu_start) / (rounds * len(corpus))
+
+    tracemalloc.start()
+    for path, html in corpus.items():
+        fn(html, BASE + path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<10} pages={len(corpus)} cpu_per_page={cpu_per_page * 1000:7.2f}ms peak_mem={peak / 1024 / 1024:6.2f}MiB")
+    return {"cpu_ms_per_page": cpu_per_page * 1000, "peak_mib": peak / 1024 / 1024}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=40)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.pages)
+    avg_kb = sum(len(h) for h in corpus.values()) / len(corpus) / 1024
+    print(f"corpus: {len(corpus)} pages, avg {avg_kb:.0f} KiB")
+    before = _measure("legacy", legacy_parse, corpus, args.rounds)
+    after = _measure("parse_page", parse_page, corpus, args.rounds)
+    print(f"cpu speedup x{before['cpu_ms_per_page'] / after['cpu_ms_per_page']:.2f}, peak memory x{before['peak_mib'] / after['peak_mib']:.2f} lower")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,401 @@
+"""End-to-end load test of POST /research against local stand-ins (no API keys or internet needed).
+
+Starts the fake LLM, fake Google CSE and corpus servers from `bench/standins.py`, runs the real app
+under uvicorn in a child process pointed at them, then measures:
+- latency p50/p95/p99 and throughput at each client concurrency level (or, with `--batch`, each
+  server-side batch concurrency, latency being the time until each item's NDJSON line arrives),
+- server RSS growth per request (sequential phase) and server CPU per request,
+- wall and CPU time per stage (llm, tool, search, fetch, parse, compact) and LLM calls and prompt size from the request trace,
+- with `--modes fast,agent,auto`, all of the above per research mode plus each mode's latency and prompt-token savings vs agent.
+
+Results are written as JSON so runs on different commits can be diffed; `--compare` prints the deltas.
+Usage: python -m bench.bench_research [--concurrency 1,4,16] [--requests 40] [--output bench/results/research.json]
+"""
+from typing import Any, Dict, List, Optional
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+import httpx
+from .standins import CorpusServer, FakeCSE, FakeLLM
+
+
+ROOT = Path(__file__).resolve().parent.parent
+STAGES = ("llm", "tool", "search", "fetch", "parse", "compact")
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _percentiles(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {}
+    ordered = sorted(values)
+
+    def pick(q: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 2)
+
+    return {"p50": pick(0.50), "p95": pick(0.95), "p99": pick(0.99), "mean": round(statistics.fmean(ordered), 2), "max": round(ordered[-1], 2)}
+
+
+def _proc_stats(pid: int) -> Optional[Dict[str, float]]:
+    """RSS (KiB) and user+system CPU seconds of a process, read from /proc; None where unavailable."""
+    try:
+        status = Path(f"/proc/{pid}/status").read_text()
+        fields = Path(f"/proc/{pid}/stat").read_text().rsplit(")", 1)[1].split()
+    except OSError:
+        return None
+    rss = next(int(line.split()[1]) for line in status.splitlines() if line.startswith("VmRSS:"))
+    ticks = os.sysconf("SC_CLK_TCK")
+    return {"rss_kb": rss, "cpu_s": (int(fields[11]) + int(fields[12])) / ticks}
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _stage_totals(span: Dict[str, Any], totals: Dict[str, Dict[str, float]]) -> None:
+    """Sum wall and CPU time per span kind over one request's trace (inclusive of child spans)."""
+    kind = span.get("kind")
+    if kind in STAGES:
+        totals[kind]["wall_ms"] += span.get("duration_ms") or 0.0
+        totals[kind]["cpu_ms"] += span.get("cpu_ms") or 0.0
+    if kind == "llm":
+        attributes = span.get("attributes") or {}
+        totals[kind]["calls"] += 1
+        totals[kind]["prompt_chars"] += attributes.get("prompt_chars") or 0
+        totals[kind]["prompt_tokens"] += attributes.get("prompt_tokens") or 0
+    for child in span.get("children") or []:
+        _stage_totals(child, totals)
+
+
+def standin_env(llm: FakeLLM, cse: FakeCSE, workdir: Path, page_cache: bool = False) -> Dict[str, str]:
+    """Server environment pointing the app at the stand-ins, with no auth or trace export."""
+    return {
+        "OPENROUTER_BASE_URL": llm.base_url + "/v1",
+        "OPENROUTER_API_KEY": "bench",
+        "GOOGLE_API_KEY": "bench",
+        "GOOGLE_CSE_ID": "bench",
+        "GOOGLE_CSE_ENDPOINT": cse.endpoint,
+        "API_TOKEN": "",
+        "SEARCH_CACHE_BACKEND": "memory",
+        "PAGE_CACHE_ENABLED": "true" if page_cache else "false",
+        "PAGE_CACHE_DIR": str(workdir / "pages"),
+        "OTEL_EXPORTER_OTLP_ENDPOINT": "",
+        # The corpus is a single local host standing in for many sites; per-host pacing would measure the bench
+        "HTTP_HOST_RATE": "0",
+    }
+
+
+class Server:
+    """The app under uvicorn in a child process, configured through environment variables."""
+
+    def __init__(self, env: Dict[str, str], log_path: Path) -> None:
+        self.port = _free_port()
+        self.base_url = f"http://127.0.0.1:{self.port}"
+        self._log = open(log_path, "wb")
+        self.proc = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(self.port), "--log-level", "warning"],
+            cwd=ROOT,
+            env={**os.environ, **env},
+            stdout=self._log,
+            stderr=subprocess.STDOUT,
+        )
+
+    def wait_ready(self, timeout: float = 60.0) -> None:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.proc.poll() is not None:
+                raise RuntimeError(f"server exited with code {self.proc.returncode}; see {self._log.name}")
+            try:
+                # /ready answers 503 until the startup warm-up has loaded the research stack
+                if httpx.get(self.base_url + "/ready", timeout=1.0).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.1)
+        raise TimeoutError("server did not become ready")
+
+    def stats(self) -> Optional[Dict[str, float]]:
+        return _proc_stats(self.proc.pid)
+
+    def stop(self) -> None:
+        self.proc.terminate()
+        try:
+            self.proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+        self._log.close()
+
+
+class Load:
+    def __init__(self, base_url: str, body: Dict[str, Any], timeout: float) -> None:
+        self.base_url = base_url
+        self.body = body
+        self.timeout = timeout
+        self._next = 0
+
+    def _payload(self) -> Dict[str, Any]:
+        # Distinct queries per request so every run does a real (fake) search unless --repeat-queries is set
+        i = self._next
+        self._next += 1
+        repeat = self.body.get("_repeat")
+        n = i % repeat if repeat else i
+        return {k: v for k, v in self.body.items() if not k.startswith("_")} | {"query": f"bench query {n}", "trace": True}
+
+    async def one(self, client: httpx.AsyncClient) -> Dict[str, Any]:
+        started = time.perf_counter()
+        try:
+            resp = await client.post(self.base_url + "/research", json=self._payload())
+            ok = resp.status_code == 200
+            data = resp.json() if ok else None
+            status = resp.status_code
+        except httpx.HTTPError as e:
+            ok, data, status = False, None, type(e).__name__
+        return {"ok": ok, "status": status, "latency_ms": (time.perf_counter() - started) * 1000, "timings": (data or {}).get("timings")}
+
+    async def run(self, concurrency: int, requests: int) -> tuple[List[Dict[str, Any]], float]:
+        remaining = requests
+        results: List[Dict[str, Any]] = []
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+        async with httpx.AsyncClient(timeout=self.timeout, limits=limits) as client:
+            async def worker() -> None:
+                nonlocal remaining
+                while remaining > 0:
+                    remaining -= 1
+                    results.append(await self.one(client))
+
+            started = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+            return results, time.perf_counter() - started
+
+    async def run_batch(self, concurrency: int, requests: int) -> tuple[List[Dict[str, Any]], float]:
+        """Send `requests` as one POST /research/batch with server-side `concurrency`; latency is time to each NDJSON line."""
+        body = {"requests": [self._payload() for _ in range(requests)], "concurrency": concurrency}
+        results: List[Dict[str, Any]] = []
+        started = time.perf_counter()
+        async with httpx.AsyncClient(timeout=self.timeout) as client:
+            try:
+                async with client.stream("POST", self.base_url + "/research/batch", json=body) as resp:
+                    async for line in resp.aiter_lines():
+                        if not line.strip():
+                            continue
+                        item = json.loads(line)
+                        ok = item["status"] != "error"
+                        results.append({
+                            "ok": ok,
+                            "status": item["status"] if ok else item.get("error"),
+                            "latency_ms": (time.perf_counter() - started) * 1000,
+                            "timings": (item.get("result") or {}).get("timings"),
+                        })
+            except httpx.HTTPError as e:
+                results.append({"ok": False, "status": type(e).__name__, "latency_ms": 0.0, "timings": None})
+        return results, time.perf_counter() - started
+
+
+def _level(mode: Optional[str], concurrency: int, results: List[Dict[str, Any]], elapsed: float, cpu_s: Optional[float]) -> Dict[str, Any]:
+    ok = [r for r in results if r["ok"]]
+    errors: Dict[str, int] = defaultdict(int)
+    for r in results:
+        if not r["ok"]:
+            errors[str(r["status"])] += 1
+    return {
+        "mode": mode,
+        "concurrency": concurrency,
+        "requests": len(results),
+        "ok": len(ok),
+        "errors": dict(errors),
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(ok) / elapsed, 3) if elapsed else 0.0,
+        "latency_ms": _percentiles([r["latency_ms"] for r in ok]),
+        "server_cpu_ms_per_request": round(cpu_s / len(results) * 1000, 2) if cpu_s is not None and results else None,
+    }
+
+
+def _stages(results: List[Dict[str, Any]]) -> Dict[str, Dict[str, Dict[str, float]]]:
+    per_request: Dict[str, Dict[str, List[float]]] = {k: {"wall_ms": [], "cpu_ms": []} for k in STAGES}
+    per_request["llm"].update(calls=[], prompt_chars=[], prompt_tokens=[])
+    for r in results:
+        if not r.get("timings"):
+            continue
+        totals: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+        _stage_totals(r["timings"], totals)
+        for kind in STAGES:
+            for metric in per_request[kind]:
+                per_request[kind][metric].append(totals[kind][metric])
+    return {kind: {metric: _percentiles(values) for metric, values in v.items()} for kind, v in per_request.items()}
+
+
+def _mode_summary(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    stages = _stages(results)
+    return {
+        "latency_ms": _percentiles([r["latency_ms"] for r in results if r["ok"]]),
+        "llm": {metric: stages["llm"][metric] for metric in ("calls", "prompt_tokens", "prompt_chars", "wall_ms")},
+    }
+
+
+def _print_report(report: Dict[str, Any]) -> None:
+    for lvl in report["levels"]:
+        lat = lvl["latency_ms"]
+        mode = f"{lvl['mode']:<6} " if lvl.get("mode") else ""
+        print(
+            f"{mode}c={lvl['concurrency']:<3} ok={lvl['ok']}/{lvl['requests']} rps={lvl['throughput_rps']:7.2f} "
+            f"p50={lat.get('p50', 0):8.1f}ms p95={lat.get('p95', 0):8.1f}ms p99={lat.get('p99', 0):8.1f}ms "
+            f"cpu/req={lvl['server_cpu_ms_per_request']}ms errors={lvl['errors'] or '-'}"
+        )
+    for kind, v in report["stages"].items():
+        extra = f" calls p50={v['calls'].get('p50', 0):.0f} prompt_chars p50={v['prompt_chars'].get('p50', 0):.0f}" if "calls" in v else ""
+        print(f"stage {kind:<7} wall p50={v['wall_ms'].get('p50', 0):8.1f}ms cpu p50={v['cpu_ms'].get('p50', 0):7.1f}ms{extra}")
+    modes = report.get("modes") or {}
+    baseline = modes.get("agent")
+    for mode, summary in modes.items():
+        p50, llm = summary["latency_ms"].get("p50", 0), summary["llm"]
+        tokens, calls = llm["prompt_tokens"].get("mean", 0), llm["calls"].get("mean", 0)
+        savings = ""
+        if baseline and mode != "agent":
+            base_p50, base_tokens = baseline["latency_ms"].get("p50"), baseline["llm"]["prompt_tokens"].get("mean")
+            if base_p50 and base_tokens:
+                savings = f" vs agent: p50 {(p50 - base_p50) / base_p50 * 100:+.1f}% prompt tokens {(tokens - base_tokens) / base_tokens * 100:+.1f}%"
+        print(f"mode {mode:<6} p50={p50:8.1f}ms llm calls/req={calls:.2f} prompt tokens/req={tokens:.0f}{savings}")
+    rss = report["rss"]
+    if rss:
+        per_request = rss["per_request_kb"]
+        growth = f" per-request p50={per_request['p50']}KiB max={per_request['max']}KiB" if per_request else ""
+        print(f"rss start={rss['start_kb'] / 1024:.1f}MiB end={rss['end_kb'] / 1024:.1f}MiB{growth}")
+
+
+def _compare(report: Dict[str, Any], previous_path: str) -> None:
+    previous = json.loads(Path(previous_path).read_text())
+    before = {(lvl.get("mode"), lvl["concurrency"]): lvl for lvl in previous.get("levels", [])}
+    print(f"vs {previous_path} (commit {previous.get('meta', {}).get('commit')}):")
+    for lvl in report["levels"]:
+        old = before.get((lvl.get("mode"), lvl["concurrency"]))
+        if not old:
+            continue
+        parts = [f"rps {old['throughput_rps']} -> {lvl['throughput_rps']}"]
+        for q in ("p50", "p95", "p99"):
+            a, b = old["latency_ms"].get(q), lvl["latency_ms"].get(q)
+            if a and b:
+                parts.append(f"{q} {a} -> {b} ({(b - a) / a * 100:+.1f}%)")
+        mode = f"{lvl['mode']} " if lvl.get("mode") else ""
+        print(f"  {mode}c={lvl['concurrency']}: " + ", ".join(parts))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", default="1,4,16", help="Comma-separated client concurrency levels")
+    parser.add_argument("--requests", type=int, default=40, help="Requests per concurrency level")
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--batch", action="store_true", help="Send each level as one POST /research/batch with that server-side concurrency")
+    parser.add_argument("--rss-requests", type=int, default=10, help="Sequential requests used to measure RSS growth per request")
+    parser.add_argument("--pages", type=int, default=40, help="Size of the generated corpus")
+    parser.add_argument("--corpus-dir", default=None, help="Serve saved .html files from this directory instead of the generated corpus")
+    parser.add_argument("--llm-latency-ms", type=float, default=50.0)
+    parser.add_argument("--search-latency-ms", type=float, default=20.0)
+    parser.add_argument("--page-latency-ms", type=float, default=30.0)
+    parser.add_argument("--modes", default="", help="Comma-separated research modes to measure one after another (fast,agent,auto); default: the server's RESEARCH_MODE")
+    parser.add_argument("--fast-uncertain", type=float, default=0.2, help="Share of queries whose fast-path answer the fake LLM marks uncertain")
+    parser.add_argument("--fetches", type=int, default=2, help="Search results the scripted agent reads")
+    parser.add_argument("--fetch-mode", choices=("batch", "single"), default="batch", help="Read them with one fetch_pages call or one fetch_page call each")
+    parser.add_argument("--parse-top-n", type=int, default=3)
+    parser.add_argument("--repeat-queries", type=int, default=0, help="Cycle through this many distinct queries (0 = every query distinct)")
+    parser.add_argument("--page-cache", action="store_true", help="Keep the disk page cache enabled (in a temporary directory)")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE", help="Extra server environment, e.g. RESEARCH_MAX_WORKERS=8")
+    parser.add_argument("--output", default=str(ROOT / "bench" / "results" / "research.json"))
+    parser.add_argument("--compare", default=None, help="Previous results JSON to diff against")
+    args = parser.parse_args()
+
+    corpus = CorpusServer(args.pages, args.corpus_dir, args.page_latency_ms).start()
+    cse = FakeCSE(corpus, args.search_latency_ms).start()
+    llm = FakeLLM(args.fetches, args.llm_latency_ms, batch=args.fetch_mode == "batch", uncertain=args.fast_uncertain).start()
+    modes: List[Optional[str]] = [m.strip() for m in args.modes.split(",") if m.strip()] or [None]
+    workdir = Path(tempfile.mkdtemp(prefix="bench-research-"))
+    env = standin_env(llm, cse, workdir, page_cache=args.page_cache)
+    env.update(dict(item.split("=", 1) for item in args.env))
+    server = Server(env, workdir / "server.log")
+    body = {"parse_top_n": args.parse_top_n, "_repeat": args.repeat_queries}
+    report: Dict[str, Any] = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "args": {k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+        },
+        "levels": [],
+        "modes": {},
+        "stages": {},
+        "rss": {},
+    }
+    try:
+        server.wait_ready()
+        load = Load(server.base_url, body, args.timeout)
+
+        async def run() -> None:
+            await load.run(1, args.warmup)
+            start = server.stats()
+            deltas: List[float] = []
+            for _ in range(args.rss_requests):
+                before = server.stats()
+                await load.run(1, 1)
+                after = server.stats()
+                if before and after:
+                    deltas.append(after["rss_kb"] - before["rss_kb"])
+            all_results: List[Dict[str, Any]] = []
+            for mode in modes:
+                load.body["mode"] = mode
+                mode_results: List[Dict[str, Any]] = []
+                for concurrency in (int(c) for c in args.concurrency.split(",") if c.strip()):
+                    before = server.stats()
+                    if args.batch:
+                        results, elapsed = await load.run_batch(concurrency, args.requests)
+                    else:
+                        results, elapsed = await load.run(concurrency, args.requests)
+                    after = server.stats()
+                    cpu_s = after["cpu_s"] - before["cpu_s"] if before and after else None
+                    report["levels"].append(_level(mode, concurrency, results, elapsed, cpu_s))
+                    mode_results.extend(results)
+                if mode:
+                    report["modes"][mode] = _mode_summary(mode_results)
+                all_results.extend(mode_results)
+            end = server.stats()
+            report["stages"] = _stages(all_results)
+            if start and end:
+                report["rss"] = {"start_kb": start["rss_kb"], "end_kb": end["rss_kb"], "per_request_kb": _percentiles(deltas)}
+
+        asyncio.run(run())
+        report["standins"] = {"llm_calls": llm.requests, "searches": cse.requests, "page_fetches": corpus.requests}
+    finally:
+        server.stop()
+        for standin in (llm, cse, corpus):
+            standin.stop()
+
+    _print_report(report)
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2, sort_keys=True))
+    print(f"results written to {output} (server log: {workdir / 'server.log'})")
+    if args.compare:
+        _compare(report, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Benchmark encoding a /research response for each `include_content` / `fields` option.
+
+Builds a result from parsed fixture-corpus pages and reports, per option, serialization time with the
+stdlib encoder FastAPI's JSONResponse uses, with orjson (ORJSONResponse) and with pydantic's model_dump_json,
+plus the payload size raw, gzipped and (when the `brotli` package is installed) brotli-compressed.
+Usage: python -m bench.bench_response [--pages 5] [--rounds 200]
+"""
+import argparse
+import json
+import time
+from typing import Any, Callable, Dict, List
+import orjson
+from app.compression import _brotli, compress
+from app.routers.research import _build_result, _dump
+from app.schemas import ResearchRequest, ResearchResult
+from app.utils.parse import parse_page
+from .corpus import build_corpus
+
+
+BASE = "http://corpus.local"
+
+OPTIONS = {
+    "full": {},
+    "truncated": {"include_content": "truncated"},
+    "none": {"include_content": "none"},
+    "summary+citations": {"fields": ["summary", "citations"]},
+}
+
+
+def _raw(pages: int) -> tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    corpus = build_corpus(max(pages, 10))
+    parsed = [{**parse_page(html, BASE + path), "url": BASE + path} for path, html in list(corpus.items())[:pages]]
+    results = [{"title": p.get("title"), "link": p["url"], "snippet": (p.get("description") or "")[:160]} for p in parsed]
+    return results, parsed
+
+
+def _time(fn: Callable[[], bytes], rounds: int) -> float:
+    started = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    return (time.perf_counter() - started) / rounds * 1000
+
+
+def _stdlib(payload: ResearchRequest, result: ResearchResult) -> bytes:
+    # What JSONResponse.render does with the response model's JSON-mode dump
+    return json.dumps(_dump(payload, result), ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+
+
+def _orjson(payload: ResearchRequest, result: ResearchResult) -> bytes:
+    return orjson.dumps(_dump(payload, result))
+
+
+def _pydantic(payload: ResearchRequest, result: ResearchResult) -> bytes:
+    return result.model_dump_json(include=set(payload.fields) if payload.fields else None).encode()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=5)
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    results, pages = _raw(args.pages)
+    summary = "Grounded answer citing the sources [1][2][3]. " * 20
+    print(f"result: {len(pages)} pages, {len(results)} citations")
+    print(f"{'option':<18} {'stdlib':>9} {'orjson':>9} {'pydantic':>9} {'raw':>9} {'gzip':>9} {'br':>9}")
+    for name, selector in OPTIONS.items():
+        payload = ResearchRequest(query="benchmark query", **selector)
+        result = _build_result(payload, summary, results, pages, {})
+        times = {label: _time(lambda: fn(payload, result), args.rounds) for label, fn in (("stdlib", _stdlib), ("orjson", _orjson), ("pydantic", _pydantic))}
+        body = _orjson(payload, result)
+        gz = len(compress(body, "gzip"))
+        br = f"{len(compress(body, 'br')) / 1024:8.1f}K" if _brotli() is not None else f"{'-':>9}"
+        print(f"{name:<18} {times['stdlib']:7.3f}ms {times['orjson']:7.3f}ms {times['pydantic']:7.3f}ms {len(body) / 1024:8.1f}K {gz / 1024:8.1f}K {br}")
+
+
+if __name__ == "__main__":
+    main()
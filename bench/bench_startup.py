@@ -0,0 +1,141 @@
+"""Startup profile: where import time goes, and how long a cold server takes to listen, get ready and answer.
+
+Runs `python -X importtime` in a child process importing `app.main` and then the research stack that the
+lifespan warm-up loads in the background, and prints for each of the two: the total import time, the slowest
+modules (cumulative, i.e. including what they import) and the self time per top-level package. Of `--runs`
+child processes the fastest is reported. With `--serve` it also starts the app under uvicorn against the
+stand-ins in `bench/standins.py` and reports the time until the port answers, until `/ready` returns 200 (with
+the warm-up's own stage timings), and the latency of the first and second /research requests.
+Usage: python -m bench.bench_startup [--top 15] [--runs 3] [--serve]
+"""
+from typing import Any, Dict, List, NamedTuple, Optional
+import argparse
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+import httpx
+from .bench_research import ROOT, Server, standin_env
+from .standins import CorpusServer, FakeCSE, FakeLLM
+
+
+# What the server imports before it can listen, then what the warm-up loads
+TARGETS = ("app.main", "app.services.research")
+# Probes cost CPU here and in the server, so probing much more often slows down the warm-up being measured
+POLL_SECONDS = 0.2
+
+
+class Import(NamedTuple):
+    name: str
+    depth: int
+    self_ms: float
+    cumulative_ms: float
+
+
+def _importtime(targets: tuple[str, ...]) -> Dict[str, List[Import]]:
+    """Modules each target newly imports (the target last), from one `python -X importtime` child process."""
+    code = "; ".join(f"import {t}" for t in targets)
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    segments: Dict[str, List[Import]] = {}
+    pending: List[Import] = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        if not self_us.strip().isdigit():
+            continue  # the header line
+        # One space, then two per nesting level; a module is listed after everything it imports
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        pending.append(Import(name.strip(), depth, int(self_us) / 1000, int(cumulative_us) / 1000))
+        if depth == 0:
+            if pending[-1].name in targets:
+                segments[pending[-1].name] = pending
+            pending = []
+    return segments
+
+
+def _profile(runs: int) -> Dict[str, List[Import]]:
+    best: Optional[Dict[str, List[Import]]] = None
+    for _ in range(max(1, runs)):
+        segments = _importtime(TARGETS)
+        if best is None or sum(s[-1].cumulative_ms for s in segments.values()) < sum(s[-1].cumulative_ms for s in best.values()):
+            best = segments
+    assert best is not None
+    return best
+
+
+def _print_segment(target: str, imports: List[Import], top: int) -> None:
+    root = imports[-1]
+    print(f"\n{target}: {root.cumulative_ms:.0f}ms, {len(imports)} modules")
+    print(f"  slowest (cumulative):")
+    for imp in sorted(imports[:-1], key=lambda i: i.cumulative_ms, reverse=True)[:top]:
+        print(f"    {imp.cumulative_ms:8.1f}ms  {'  ' * (imp.depth - 1)}{imp.name}")
+    packages: Dict[str, float] = defaultdict(float)
+    for imp in imports:
+        packages[imp.name.split(".")[0]] += imp.self_ms
+    print(f"  self time per package:")
+    for package, ms in sorted(packages.items(), key=lambda p: p[1], reverse=True)[:top]:
+        print(f"    {ms:8.1f}ms  {package}")
+
+
+def _cold_start(timeout: float) -> Dict[str, Any]:
+    corpus = CorpusServer(20, None, 0).start()
+    cse = FakeCSE(corpus, 0).start()
+    llm = FakeLLM(2, 0).start()
+    workdir = Path(tempfile.mkdtemp(prefix="bench-startup-"))
+    started = time.perf_counter()
+    server = Server(standin_env(llm, cse, workdir), workdir / "server.log")
+    report: Dict[str, Any] = {}
+    try:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if server.proc.poll() is not None:
+                raise RuntimeError(f"server exited with code {server.proc.returncode}; see {workdir / 'server.log'}")
+            try:
+                resp = httpx.get(server.base_url + "/ready", timeout=1.0)
+            except httpx.HTTPError:
+                time.sleep(POLL_SECONDS)
+                continue
+            report.setdefault("listening_ms", (time.perf_counter() - started) * 1000)
+            if resp.status_code == 200:
+                report["ready_ms"] = (time.perf_counter() - started) * 1000
+                report["warmup"] = resp.json()
+                break
+            time.sleep(POLL_SECONDS)
+        else:
+            raise TimeoutError("server did not become ready")
+        for attempt in ("first_request_ms", "second_request_ms"):
+            request_started = time.perf_counter()
+            httpx.post(server.base_url + "/research", json={"query": f"startup {attempt}"}, timeout=timeout).raise_for_status()
+            report[attempt] = (time.perf_counter() - request_started) * 1000
+    finally:
+        server.stop()
+        for standin in (llm, cse, corpus):
+            standin.stop()
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--top", type=int, default=15, help="Modules and packages listed per target")
+    parser.add_argument("--runs", type=int, default=3, help="Child processes to profile; the fastest is reported")
+    parser.add_argument("--serve", action="store_true", help="Also time a cold start of the server against the stand-ins")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    args = parser.parse_args()
+
+    segments = _profile(args.runs)
+    for target in TARGETS:
+        _print_segment(target, segments[target], args.top)
+
+    if args.serve:
+        report = _cold_start(args.timeout)
+        warmup = report["warmup"]
+        print(f"\ncold start: listening {report['listening_ms']:.0f}ms, ready {report['ready_ms']:.0f}ms "
+              f"(warm-up {warmup['elapsed_ms']:.0f}ms: " + ", ".join(f"{k} {v:.0f}ms" for k, v in warmup["stages"].items()) + ")")
+        print(f"first /research {report['first_request_ms']:.0f}ms, second {report['second_request_ms']:.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Deterministic corpus of realistic HTML pages for the benchmarks.
+
+Pages mimic the shapes the researcher meets in practice: news/blog articles, docs pages with many
+sections, event listings with long tables, and link-heavy portal pages, each wrapped in navigation,
+sidebars, scripts and footers that readability has to discard.
+"""
+from typing import Dict
+import random
+
+
+_WORDS = (
+    "retrieval augmented generation vector database latency throughput index embedding query cache "
+    "production cluster replica shard consistency ticket concert showtime cinema schedule price venue "
+    "moscow city festival comedy standup evening weekend booking availability seats review rating "
+    "benchmark memory cpu network protocol handshake stream parser document section heading article"
+).split()
+
+
+def _sentence(rng: random.Random, n: int = 14) -> str:
+    words = [rng.choice(_WORDS) for _ in range(n)]
+    return " ".join(words).capitalize() + "."
+
+
+def _paragraph(rng: random.Random, sentences: int = 5) -> str:
+    return " ".join(_sentence(rng, rng.randint(8, 20)) for _ in range(sentences))
+
+
+def _chrome(rng: random.Random, slug: str, host_path: str) -> Dict[str, str]:
+    nav = "".join(f'<li><a href="/{host_path}/nav-{i}">Section {i}</a></li>' for i in range(25))
+    side = "".join(f'<li><a href="/{host_path}/related-{i}">{_sentence(rng, 6)}</a></li>' for i in range(15))
+    ext = "".join(f'<a href="https://partner{i}.example.org/{slug}">Partner {i}</a> ' for i in range(10))
+    script = "<script>" + "var x=1;" * 400 + "</script>"
+    return {
+        "head": f"<meta name=\"description\" content=\"{_sentence(rng, 18)}\">"
+        f"<style>{'.c{{color:red}}' * 200}</style>{script}",
+        "header": f'<header><nav class="menu"><ul>{nav}</ul></nav></header>',
+        "sidebar": f'<aside class="sidebar"><ul>{side}</ul><div class="ads">{ext}</div></aside>',
+        "footer": f'<footer class="footer"><p>{_sentence(rng, 10)}</p>{ext}</footer>{script}',
+    }
+
+
+def article_page(rng: random.Random, slug: str) -> str:
+    c = _chrome(rng, slug, "news")
+    body = "".join(
+        f"<h2>{_sentence(rng, 5)}</h2>" + "".join(f"<p>{_paragraph(rng)}</p>" for _ in range(4))
+        for _ in range(6)
+    )
+    return (
+        f"<!DOCTYPE html><html><head><title>{_sentence(rng, 7)} | News</title>{c['head']}</head><body>"
+        f"{c['header']}<main><article><h1>{_sentence(rng, 8)}</h1>{body}</article></main>{c['sidebar']}{c['footer']}"
+        "</body></html>"
+    )
+
+
+def docs_page(rng: random.Random, slug: str) -> str:
+    c = _chrome(rng, slug, "docs")
+    body = "".join(
+        f"<h3>{_sentence(rng, 4)}</h3><p>{_paragraph(rng, 3)}</p><pre>{'code line; ' * 30}</pre>"
+        f"<ul>{''.join(f'<li>{_sentence(rng, 9)}</li>' for _ in range(5))}</ul>"
+        for _ in range(14)
+    )
+    return (
+        f"<!DOCTYPE html><html><head><title>{_sentence(rng, 5)} - Docs</title>{c['head']}</head><body>"
+        f"{c['header']}<div class=\"content\"><div class=\"doc-body\">{body}</div></div>{c['sidebar']}{c['footer']}"
+        "</body></html>"
+    )
+
+
+def listing_page(rng: random.Random, slug: str) -> str:
+    c = _chrome(rng, slug, "events")
+    rows = "".join(
+        f"<tr><td>{rng.randint(10, 23)}:{rng.choice(['00', '30'])}</td><td>{_sentence(rng, 5)}</td>"
+        f"<td>{rng.randint(500, 5000)} RUB</td><td><a href=\"/events/{slug}/buy-{i}\">Buy</a></td></tr>"
+        for i in range(120)
+    )
+    return (
+        f"<!DOCTYPE html><html><head><title>{_sentence(rng, 6)} - Events</title>{c['head']}</head><body>"
+        f"{c['header']}<div id=\"main\"><h1>{_sentence(rng, 6)}</h1><p>{_paragraph(rng, 2)}</p>"
+        f"<table class=\"schedule\">{rows}</table></div>{c['sidebar']}{c['footer']}</body></html>"
+    )
+
+
+def portal_page(rng: random.Random, slug: str) -> str:
+    c = _chrome(rng, slug, "portal")
+    cards = "".join(
+        f'<div class="card"><a href="/portal/{slug}/item-{i}"><h4>{_sentence(rng, 6)}</h4></a><p>{_sentence(rng, 15)}</p></div>'
+        for i in range(80)
+    )
+    return (
+        f"<!DOCTYPE html><html><head><title>{_sentence(rng, 4)}</title>{c['head']}</head><body>"
+        f"{c['header']}<section class=\"cards\">{cards}</section>{c['sidebar']}{c['footer']}</body></html>"
+    )
+
+
+_KINDS = (article_page, docs_page, listing_page, portal_page)
+
+
+def build_corpus(n: int = 40, seed: int = 1234) -> Dict[str, str]:
+    """Return {path: html} for `n` pages; the same seed always yields byte-identical pages."""
+    rng = random.Random(seed)
+    pages: Dict[str, str] = {}
+    for i in range(n):
+        kind = _KINDS[i % len(_KINDS)]
+        slug = f"{kind.__name__.replace('_page', '')}-{i}"
+        pages[f"/{slug}"] = kind(rng, slug)
+    return pages
+
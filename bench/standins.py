@@ -0,0 +1,205 @@
+"""Local stand-ins for the services `/research` talks to, so the full app can be benchmarked offline.
+
+- FakeLLM: OpenAI-compatible `/v1/chat/completions` replaying a scripted structured-chat ReAct run
+  (search once, fetch the first results in one fetch_pages call or one fetch_page call each, answer),
+  with or without streaming.
+- FakeCSE: Google Custom Search JSON API returning corpus URLs chosen deterministically from the query.
+- CorpusServer: serves the fixture corpus (or a directory of saved `.html` files).
+
+Every server answers after a fixed, configurable delay and is fully deterministic.
+"""
+from typing import Any, Dict, List, Optional
+import hashlib
+import json
+import re
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+from .corpus import build_corpus
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    standin: "StandIn"
+
+    def setup(self) -> None:
+        super().setup()
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def do_GET(self) -> None:
+        self.standin.handle(self, None)
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        self.standin.handle(self, self.rfile.read(length))
+
+    def log_message(self, *args: object) -> None:
+        pass
+
+    def reply(self, status: int, body: bytes, content_type: str) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class StandIn:
+    """A threaded HTTP server on an ephemeral local port that sleeps `latency_ms` before every answer."""
+
+    def __init__(self, latency_ms: float = 0.0) -> None:
+        self.latency = latency_ms / 1000
+        self.requests = 0
+        self._lock = threading.Lock()
+        handler = type(f"{type(self).__name__}Handler", (_Handler,), {"standin": self})
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self._server.daemon_threads = True
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def start(self) -> "StandIn":
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def handle(self, request: _Handler, body: Optional[bytes]) -> None:
+        with self._lock:
+            self.requests += 1
+        if self.latency:
+            time.sleep(self.latency)
+        self.respond(request, body)
+
+    def respond(self, request: _Handler, body: Optional[bytes]) -> None:
+        raise NotImplementedError
+
+
+def _title(html: str) -> str:
+    match = re.search(r"<title>(.*?)</title>", html, re.S | re.I)
+    return match.group(1).strip() if match else ""
+
+
+class CorpusServer(StandIn):
+    def __init__(self, pages: int = 40, directory: Optional[str] = None, latency_ms: float = 0.0) -> None:
+        super().__init__(latency_ms)
+        if directory:
+            self.pages = {f"/{p.stem}": p.read_text(encoding="utf-8", errors="replace") for p in sorted(Path(directory).glob("*.html"))}
+        else:
+            self.pages = build_corpus(pages)
+        self.paths = sorted(self.pages)
+
+    def respond(self, request: _Handler, body: Optional[bytes]) -> None:
+        html = self.pages.get(urlparse(request.path).path)
+        if html is None:
+            request.reply(404, b"<html><body>Not found</body></html>", "text/html; charset=utf-8")
+            return
+        request.reply(200, html.encode("utf-8"), "text/html; charset=utf-8")
+
+
+class FakeCSE(StandIn):
+    """Answers `GET /customsearch/v1?q=...&num=...` with corpus pages picked by a hash of the query."""
+
+    def __init__(self, corpus: CorpusServer, latency_ms: float = 0.0) -> None:
+        super().__init__(latency_ms)
+        self.corpus = corpus
+
+    @property
+    def endpoint(self) -> str:
+        """API root to hand googleapiclient; it requests `customsearch/v1` below it."""
+        return self.base_url + "/"
+
+    def respond(self, request: _Handler, body: Optional[bytes]) -> None:
+        params = parse_qs(urlparse(request.path).query)
+        query = (params.get("q") or [""])[0]
+        num = min(10, int((params.get("num") or ["5"])[0]))
+        paths = self.corpus.paths
+        start = int(hashlib.sha1(query.encode()).hexdigest(), 16) % len(paths)
+        items = []
+        for i in range(min(num, len(paths))):
+            path = paths[(start + i) % len(paths)]
+            items.append({
+                "title": _title(self.corpus.pages[path]) or path,
+                "link": self.corpus.base_url + path,
+                "snippet": f"Result {i + 1} for {query}",
+            })
+        request.reply(200, json.dumps({"items": items}).encode(), "application/json")
+
+
+_URL_RE = re.compile(r"https?://127\.0\.0\.1:\d+/[^\s'\"\]\),]+")
+
+
+class FakeLLM(StandIn):
+    """OpenAI-compatible chat completions replaying a fixed structured-chat ReAct script.
+
+    Turn 1 calls cached_google_search with the query (first line of the user message). Then either one
+    fetch_pages call reads the first `fetches` results (batch mode) or `fetches` turns call fetch_page on
+    successive results. The last turn answers.
+
+    Fast-path synthesis prompts (a question followed by numbered sources) get a direct answer, marked
+    uncertain for a deterministic `uncertain` share of queries so `auto` mode falls back to the agent.
+    """
+
+    def __init__(self, fetches: int = 2, latency_ms: float = 0.0, batch: bool = True, uncertain: float = 0.0) -> None:
+        super().__init__(latency_ms)
+        self.fetches = fetches
+        self.batch = batch
+        self.uncertain = uncertain
+
+    def _answer(self, prompt: str) -> str:
+        query = prompt.strip().splitlines()[0].removeprefix("Question:").strip()
+        sources = len(re.findall(r"^\[\d+\] ", prompt, re.M))
+        if int(hashlib.sha1(query.encode()).hexdigest(), 16) % 1000 < self.uncertain * 1000:
+            return f"UNCERTAIN: the {sources} sources do not say enough about {query}."
+        return f"Summary for {query}: based on {sources} sources [1]."
+
+    def _script(self, prompt: str) -> str:
+        if "\n\nSources:\n" in prompt:
+            return self._answer(prompt)
+        query = prompt.strip().splitlines()[0] if prompt.strip() else ""
+        observations = prompt.split("Observation:")
+        turn = len(observations) - 1
+        if turn == 0:
+            return self._action("cached_google_search", {"query": query})
+        urls: List[str] = list(dict.fromkeys(_URL_RE.findall(observations[1])))
+        if self.batch:
+            if turn == 1 and urls and self.fetches:
+                return self._action("fetch_pages", {"urls": urls[: self.fetches]})
+        elif turn <= self.fetches and turn <= len(urls):
+            return self._action("fetch_page", {"url": urls[turn - 1]})
+        answer = f"Summary for {query}: based on {min(self.fetches, len(urls))} fetched sources. " + " ".join(urls[: self.fetches])
+        return self._action("Final Answer", answer)
+
+    @staticmethod
+    def _action(name: str, action_input: Any) -> str:
+        return f"Thought: next step\nAction:\n```\n{json.dumps({'action': name, 'action_input': action_input})}\n```"
+
+    def respond(self, request: _Handler, body: Optional[bytes]) -> None:
+        payload: Dict[str, Any] = json.loads(body or b"{}")
+        messages = payload.get("messages") or []
+        prompt = next((m.get("content") or "" for m in reversed(messages) if m.get("role") == "user"), "")
+        content = self._script(prompt if isinstance(prompt, str) else json.dumps(prompt))
+        usage = {"prompt_tokens": sum(len(str(m.get("content"))) for m in messages) // 4, "completion_tokens": len(content) // 4}
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        base = {"id": "chatcmpl-bench", "created": 0, "model": payload.get("model", "bench")}
+        if not payload.get("stream"):
+            out = {**base, "object": "chat.completion", "usage": usage, "choices": [
+                {"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}
+            ]}
+            request.reply(200, json.dumps(out).encode(), "application/json")
+            return
+        step = max(1, len(content) // 8)
+        chunks = [content[i:i + step] for i in range(0, len(content), step)]
+        events = [
+            {**base, "object": "chat.completion.chunk", "choices": [{"index": 0, "delta": {"role": "assistant", "content": c}, "finish_reason": None}]}
+            for c in chunks
+        ]
+        events.append({**base, "object": "chat.completion.chunk", "usage": usage, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]})
+        data = b"".join(b"data: " + json.dumps(e).encode() + b"\n\n" for e in events) + b"data: [DONE]\n\n"
+        request.reply(200, data, "text/event-stream")